@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import zipfile
+
+# Archive of the EOS commands outputs, in the device directory
+ARCHIVE_NAME = 'eos_commands.zip'
+
+# Member of the archive with the sha256 and the size of each output
+HASHES_NAME = 'sha256.json'
+
+# Manifest of the outputs of the last collection saved in the blob store (see audit.blobs), in the device directory
+MANIFEST_NAME = 'eos_commands.manifest.json'
+
+def member_name (command, format):
+    """Return the name of the output of an EOS command in the archive (json/<command>.json or text/<command>.txt)"""
+    if format == 'json':
+        return 'json/' + command + '.json'
+    return 'text/' + command + '.txt'
+
+class DirectoryWriter:
+    """Save the outputs of the EOS commands of a device, one file per command
+
+    Parameters
+    ----------
+    device_directory : str
+        Device directory.
+    json_directory : str
+        Directory of the JSON outputs.
+    text_directory : str
+        Directory of the text outputs.
+    """
+    def __init__ (self, device_directory, json_directory, text_directory):
+        self.device_directory = device_directory
+        self.directories = {'json': json_directory, 'text': text_directory}
+
+    def save (self, command, format, output):
+        """Save the output of an EOS command
+
+        Parameters
+        ----------
+        command : str
+            EOS command.
+        format : str
+            json or text.
+        output : str
+            Output of the EOS command.
+        """
+        f = open(self.directories[format] + '/' + member_name(command, format).split('/', 1)[1], 'w')
+        f.write(output)
+        f.close()
+
+    def close (self):
+        # an archive or a manifest from a previous collection would hide the new files
+        for name in (ARCHIVE_NAME, MANIFEST_NAME):
+            if os.path.exists(self.device_directory + '/' + name):
+                os.remove(self.device_directory + '/' + name)
+
+    def abort (self):
+        pass
+
+class ArchiveWriter:
+    """Save the outputs of the EOS commands of a device in one compressed archive
+
+    The archive is written in a temporary file and replaces the archive of the previous collection when it is closed.
+    The sha256 and the size of each output are saved in the member sha256.json, for the incremental audit.
+    The outputs can be read one by one with DeviceCommands.
+
+    Parameters
+    ----------
+    device_directory : str
+        Device directory.
+    """
+    def __init__ (self, device_directory):
+        self.device_directory = device_directory
+        self.name = device_directory + '/' + ARCHIVE_NAME
+        self.archive = zipfile.ZipFile(self.name + '.tmp', 'w', zipfile.ZIP_DEFLATED)
+        self.hashes = {}
+
+    def save (self, command, format, output):
+        """Save the output of an EOS command
+
+        Parameters
+        ----------
+        command : str
+            EOS command.
+        format : str
+            json or text.
+        output : str
+            Output of the EOS command.
+        """
+        data = output.encode()
+        self.archive.writestr(member_name(command, format), data)
+        self.hashes[member_name(command, format)] = [hashlib.sha256(data).hexdigest(), len(data)]
+
+    def close (self):
+        self.archive.writestr(HASHES_NAME, json.dumps(self.hashes, indent=1, sort_keys=True))
+        self.archive.close()
+        os.replace(self.name + '.tmp', self.name)
+        # a manifest from a previous collection would hide the new archive
+        manifest = self.device_directory + '/' + MANIFEST_NAME
+        if os.path.exists(manifest):
+            os.remove(manifest)
+
+    def abort (self):
+        self.archive.close()
+        os.remove(self.name + '.tmp')
+
+def open_archive (device_directory):
+    """Open the archive of a device for reading
+
+    Returns
+    -------
+    zipfile.ZipFile
+        The archive, or None if the device has no archive.
+    """
+    name = device_directory + '/' + ARCHIVE_NAME
+    if not os.path.exists(name):
+        return None
+    return zipfile.ZipFile(name, 'r')
+
+def archive_hashes (archive):
+    """Return the sha256 and the size of each output of an archive, by member name
+
+    Returns
+    -------
+    dict
+        The content of the member sha256.json, empty if the archive was written without it.
+    """
+    try:
+        data = archive.read(HASHES_NAME)
+    except KeyError:
+        return {}
+    return json.loads(data)
+
+def archive_fingerprint (archive, command, format='json', hashes=None):
+    """Return the fingerprint of the output of an EOS command in an archive
+
+    The sha256 is read from hashes (see archive_hashes), the output is decompressed and hashed only if it is not in hashes.
+
+    Returns
+    -------
+    list
+        Modification time of the archive in ns, size and sha256 of the output, or None if the archive has no output for the command.
+    """
+    name = member_name(command, format)
+    mtime = os.stat(archive.filename).st_mtime_ns
+    if hashes is not None and name in hashes:
+        digest, size = hashes[name]
+        return [mtime, size, digest]
+    try:
+        data = archive.read(name)
+    except KeyError:
+        return None
+    return [mtime, len(data), hashlib.sha256(data).hexdigest()]
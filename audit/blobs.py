@@ -0,0 +1,100 @@
+import datetime
+import hashlib
+import json
+import os
+from audit.archive import ARCHIVE_NAME, MANIFEST_NAME, member_name
+
+# Content-addressed store of the EOS commands outputs of all the devices, in the output directory
+BLOBS_NAME = 'blobs'
+
+# Manifests of all the collections of a device, in the device directory
+SNAPSHOTS_NAME = 'snapshots'
+
+MANIFEST_VERSION = 1
+
+def blob_name (blob_directory, digest):
+    """Return the file name of a blob, blobs are spread in 256 directories by the first 2 characters of their hash"""
+    return blob_directory + '/' + digest[:2] + '/' + digest[2:]
+
+class BlobWriter:
+    """Save the outputs of the EOS commands of a device in a content-addressed blob store
+
+    Each output is saved in a file named after its sha256, shared by all the devices and all the collections: an output already in the store is not written again.
+    When the writer is closed, the manifest of the collection (hash and size of each output) is saved in the snapshots directory of the device and replaces the manifest of the previous collection.
+    The outputs can be read one by one with DeviceCommands.
+
+    Parameters
+    ----------
+    device_directory : str
+        Device directory.
+    blob_directory : str
+        Directory of the blob store.
+    """
+    def __init__ (self, device_directory, blob_directory):
+        self.device_directory = device_directory
+        self.blob_directory = blob_directory
+        self.time = datetime.datetime.now()
+        self.outputs = {}
+
+    def save (self, command, format, output):
+        """Save the output of an EOS command
+
+        Parameters
+        ----------
+        command : str
+            EOS command.
+        format : str
+            json or text.
+        output : str
+            Output of the EOS command.
+        """
+        data = output.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        name = blob_name(self.blob_directory, digest)
+        if not os.path.exists(name):
+            os.makedirs(os.path.dirname(name), exist_ok=True)
+            # written in a file of this device first, so a blob being written by another device is never read
+            f = open(name + '.' + os.path.basename(self.device_directory) + '.tmp', 'wb')
+            f.write(data)
+            f.close()
+            os.replace(f.name, name)
+        self.outputs[member_name(command, format)] = [digest, len(data)]
+
+    def close (self):
+        manifest = {'version': MANIFEST_VERSION, 'time': self.time.isoformat(), 'outputs': self.outputs}
+        snapshots_directory = self.device_directory + '/' + SNAPSHOTS_NAME
+        os.makedirs(snapshots_directory, exist_ok=True)
+        f = open(snapshots_directory + '/' + self.time.strftime('%Y%m%d-%H%M%S-%f') + '.json', 'w')
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.close()
+        name = self.device_directory + '/' + MANIFEST_NAME
+        f = open(name + '.tmp', 'w')
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.close()
+        os.replace(name + '.tmp', name)
+        # an archive from a previous collection would hide the new outputs
+        archive = self.device_directory + '/' + ARCHIVE_NAME
+        if os.path.exists(archive):
+            os.remove(archive)
+
+    def abort (self):
+        # the blobs already written are kept, the next collections can use them
+        pass
+
+def open_manifest (device_directory):
+    """Read the manifest of the last collection of a device
+
+    Returns
+    -------
+    dict
+        The manifest, or None if the outputs of the device are not in the blob store.
+    """
+    name = device_directory + '/' + MANIFEST_NAME
+    if not os.path.exists(name):
+        return None
+    f = open(name, 'r')
+    manifest = json.load(f)
+    f.close()
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
@@ -0,0 +1,41 @@
+from audit.functions import DeviceCommands, iter_bgp_peers
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+@audit_check(commands=['show ip bgp summary vrf all'])
+def check_bgp (device, root_dir, commands=None):
+    """Check BGP status for all configured vrf.
+
+    Required EOS command: show ip bgp summary vrf all | json
+    Test failure conditions: A test fails if a BGP session is not established.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+
+    Returns
+    -------
+    TopicResult
+        The tests result. 
+    """
+    command = "show ip bgp summary vrf all"
+    result = TopicResult(device, 'check_bgp', 'BGP sessions state', 'include tests report about the bgp status for all configured vrf', command, 'A test fails if a BGP session is not established')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    for vrf, peer, asn, peerState, upDownTime, upDownTimestamp in iter_bgp_peers(commands, command): 
+        if peer is None:
+            section = result.section("vrf: " + vrf, summary=ALL)
+            continue
+        if peerState != 'Established': 
+            status = FAIL
+        else:
+            status = PASS
+        result.add(section, peer, status, (('Peer', peer), ('ASN', asn), ('State', peerState), ('Up/Down', upDownTime)), (('Up/Down time', upDownTimestamp),))
+    # the list of vrf is followed by an empty line
+    result.section()
+    return result
@@ -0,0 +1,51 @@
+from audit.functions import DeviceCommands, iter_bgp_peers
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+@audit_check(commands=['show ip bgp summary vrf all'])
+def check_bgp_summary (device, root_dir, commands=None):
+    """Count the established BGP sessions of each configured vrf and list the sessions not established.
+
+    Unlike check_bgp, the established sessions are only counted, so the memory used does not depend on the number of established sessions.
+
+    Required EOS command: show ip bgp summary vrf all | json
+    Test failure conditions: A test fails if a BGP session is not established.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+
+    Returns
+    -------
+    TopicResult
+        The tests result. 
+    """
+    command = "show ip bgp summary vrf all"
+    result = TopicResult(device, 'check_bgp_summary', 'BGP sessions summary', 'include the number of established bgp sessions and the bgp sessions not established for all configured vrf', command, 'A test fails if a BGP session is not established')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    vrfs = []
+    for vrf, peer, asn, peerState, upDownTime, upDownTimestamp in iter_bgp_peers(commands, command): 
+        if peer is None:
+            vrfs.append([vrf, 0, []])
+        elif peerState == 'Established': 
+            vrfs[-1][1] = vrfs[-1][1] + 1
+        else:
+            vrfs[-1][2].append((peer, (('Peer', peer), ('ASN', asn), ('State', peerState), ('Up/Down', upDownTime)), (('Up/Down time', upDownTimestamp),)))
+    for vrf, established, not_established in vrfs:
+        section = result.section("vrf: " + vrf, summary=ALL)
+        if not_established:
+            status = FAIL
+        else:
+            status = PASS
+        result.add(section, vrf, status, (('Established', established), ('Not established', len(not_established))))
+        for peer, fields, values in not_established:
+            result.add(section, peer, FAIL, fields, values)
+    # the list of vrf is followed by an empty line
+    result.section()
+    return result
@@ -0,0 +1,42 @@
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+@audit_check(commands=['show system environment cooling'])
+def check_cooling (device, root_dir, commands=None):
+    """Check the cooling status.
+
+    Required EOS command: show system environment cooling | json
+    Test failure conditions: A test fails if the status of a fan is not ok.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+
+    Returns
+    -------
+    TopicResult
+        The tests result. 
+    """
+    command = "show system environment cooling"
+    result = TopicResult(device, 'check_cooling', 'Cooling status', 'include tests report about the cooling status', command, 'A test fails if the status of a fan is not ok')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    for title, slots in [('Power supplies: ', data_json['powerSupplySlots']), ('Fan modules: ', data_json['fanTraySlots'])]:
+        section = result.section(title, summary=ALL)
+        for slot in slots:
+            for fan in slot['fans']: 
+                fan_status = fan['status'] 
+                label = fan['label']
+                if fan_status == 'ok': 
+                    status = PASS
+                else:
+                    status = FAIL
+                result.add(section, label, status, (('Fan', label), ('Status', fan_status)))
+    return result
@@ -0,0 +1,56 @@
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+@audit_check(commands=['show inventory'])
+def check_inventory (device, root_dir, commands=None):
+    """Check the hardware inventory.
+
+    Required EOS command: show inventory | json
+    Test failure conditions: A transceiver test fails if its manufacturer is neither "Arista Networks" nor "Arastra, Inc". A power supply test fails if a power supply slot has no power supply unit inserted. 
+
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+
+    Returns
+    -------
+    TopicResult
+        The tests result.  
+    """
+    command = "show inventory"
+    result = TopicResult(device, 'check_inventory', 'Device inventory', 'include tests report about the hardware inventory', command, 'A test fails if the manufacturer of a transceiver is neither "Arista Networks" nor "Arastra, Inc", or if a power supply slot has no power supply unit inserted')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    section = result.section()
+    result.add(section, 'description', None, (('Device description', data_json['systemInformation']['description']),))
+    section = result.section('Power Supplies: ', summary=ALL)
+    for ps, details in data_json['powerSupplySlots'].items(): 
+        slot = str(ps)
+        name = details['name']
+        if name == 'Not Inserted': 
+            status = FAIL
+        else:
+            status = PASS
+        result.add(section, slot, status, (('Slot', slot), ('Model', name), ('SN', details['serialNum'])))
+    section = result.section('Fan modules: ', note="The script doesnt run tests about the Fans modules ...")
+    for fan_module, details in data_json['fanTraySlots'].items(): 
+        slot = str(fan_module)
+        result.add(section, slot, None, (('Module', slot), ('Model', details['name'])))
+    section = result.section('Transceivers: ', summary=ALL)
+    for transceiver in sorted(data_json["xcvrSlots"]):
+        details = data_json['xcvrSlots'][transceiver]
+        transceiver = str(transceiver)
+        mfgName = details['mfgName']
+        if mfgName == "Not Present": 
+            continue
+        if (mfgName == 'Arista Networks') or (mfgName == 'Arastra, Inc'):
+            status = PASS
+        else:
+            status = FAIL
+        result.add(section, transceiver, status, (('Port', transceiver), ('Manufacturer', mfgName), ('Model', details['modelName']), ('SN', details['serialNum'])))
+    return result
@@ -0,0 +1,46 @@
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, SINGLE
+
+@audit_check(commands=['show mlag detail'])
+def check_mlag (device, root_dir, commands=None):
+    """Check MLAG state.
+
+    Required EOS command: show mlag detail | json
+    Test failure conditions: The test fails if the MLAG state is active and the negotiation status is not connected.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+
+    Returns
+    -------
+    TopicResult
+        The tests result. 
+    """
+    command = "show mlag detail"
+    result = TopicResult(device, 'check_mlag', 'MLAG state', 'include tests report about the mlag status', command, 'The test fails if the MLAG state is active and the negotiation status is not connected')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    state = data_json["state"] 
+    if state == "active": 
+        negStatus = data_json["negStatus"]
+        peerAddress = data_json["peerAddress"] 
+        if negStatus != 'connected': 
+            status = FAIL
+        else:
+            status = PASS 
+        section = result.section(summary=SINGLE, block=True)
+        result.add(section, peerAddress, status, (('Peer', peerAddress), ('State', state), ('Negotiation Status', negStatus), ('Config Sanity', data_json["configSanity"])))
+    elif state == "disabled": 
+        section = result.section()
+        result.add(section, 'state', None, ((None, "MLAG is " + state),))
+    else:
+        result.section()
+    return result
@@ -0,0 +1,39 @@
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+@audit_check(commands=['show system environment power'])
+def check_power (device, root_dir, commands=None):
+    """Check the power status.
+
+    Required EOS command: show system environment power | json
+    Test failure conditions: A test fails if the status of a power supply is not ok. 
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+
+    Returns
+    -------
+    TopicResult
+        The tests result.  
+    """
+    command = "show system environment power"
+    result = TopicResult(device, 'check_power', 'Power supplies status', 'include tests report about the power status', command, 'A test fails if the status of a power supply is not ok')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    section = result.section(summary=ALL)
+    for powersupply, details in data_json['powerSupplies'].items():
+        state = details['state']
+        if state == 'ok': 
+            status = PASS
+        else:
+            status = FAIL
+        result.add(section, powersupply, status, (('Power supply', powersupply), ('Status', state)))
+    return result
@@ -0,0 +1,41 @@
+import datetime
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+@audit_check(commands=['show reload cause full'])
+def check_reload_cause_full (device, root_dir, commands=None):
+    """Check the cause for the most recent reload.
+
+    Required EOS command: show reload cause full | json
+    Test failure conditions: The test fails if the device reload was not requested by user.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+    
+    Returns
+    -------
+    TopicResult
+        The tests result. 
+    """
+    command = "show reload cause full"
+    result = TopicResult(device, 'check_reload_cause_full', 'Reload cause full', 'include tests report about the cause of the most recent reload', command, 'The test fails if the device reload was not requested by user')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    section = result.section(summary=ALL)
+    for item in data_json["resetCauses"]: 
+        description = item['description']
+        timestamp = datetime.datetime.fromtimestamp(item['timestamp']).strftime("%d %b %Y %H:%M:%S")
+        if description != "Reload requested by the user.": 
+            status = FAIL
+        else:
+            status = PASS
+        result.add(section, timestamp, status, (('Time', timestamp), ('Reason', description)))
+    return result
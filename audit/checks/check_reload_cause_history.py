@@ -0,0 +1,44 @@
+import datetime
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+@audit_check(commands=['show reload cause history'])
+def check_reload_cause_history (device, root_dir, commands=None):
+    """Check the cause for the last 10 reload.
+
+    Required EOS command: show reload cause history | json
+    Test failure conditions: A test fails if a device reload was not requested by user.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+    
+    Returns
+    -------
+    TopicResult
+        The tests result. 
+    """
+    command = "show reload cause history"
+    result = TopicResult(device, 'check_reload_cause_history', 'Reload cause history', 'include tests report about the cause for the last 10 reload', command, 'A test fails if the device reload was not requested by user')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    section = result.section(summary=ALL)
+    for reboot_id in range(0,10):
+        reboot_id = str(reboot_id)
+        if reboot_id in data_json["resetHistory"]:
+            for reboot in data_json["resetHistory"][reboot_id].values():
+                description = reboot[0]['description']
+                timestamp = datetime.datetime.fromtimestamp(reboot[0]['timestamp']).strftime("%d %b %Y %H:%M:%S")
+                if description != "Reload requested by the user.": 
+                    status = FAIL
+                else:
+                    status = PASS
+                result.add(section, timestamp, status, (('Time', timestamp), ('Reason', description)))
+    return result
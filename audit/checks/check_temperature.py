@@ -0,0 +1,50 @@
+from audit.functions import DeviceCommands, temperature_sensor_status, temperature_sensor_fields, temperature_sensor_values
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL, SINGLE
+
+@audit_check(commands=['show system environment temperature'])
+def check_temperature (device, root_dir, commands=None):
+    """Check the temperature status.
+
+    Required EOS command: show system environment temperature | json
+    Test failure conditions: A sensor test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state. The system temperature test fails if the system status is not OK.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+
+    Returns
+    -------
+    TopicResult
+        The tests result. 
+    """
+    command = "show system environment temperature"
+    result = TopicResult(device, 'check_temperature', 'Temperature status', 'include tests report about the temperature status', command, 'A test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state. The system temperature test fails if the system status is not OK')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    systemStatus = data_json['systemStatus']
+    if systemStatus != 'temperatureOk': 
+        status = FAIL
+    else:
+        status = PASS
+        systemStatus = 'ok'
+    section = result.section("System temperature: ", summary=SINGLE)
+    result.add(section, 'system', status, (('Status', systemStatus),))
+    section = result.section("Sensors: ", summary=ALL)
+    for sensor in data_json["tempSensors"]:
+        result.add(section, sensor['name'], temperature_sensor_status(sensor), (('Sensor', sensor['name']), ('Description', sensor['description'])) + temperature_sensor_fields(sensor), temperature_sensor_values(sensor))
+    section = result.section("Card Slot: ", summary=ALL)
+    for card in data_json["cardSlots"]: 
+        for sensor in card["tempSensors"]: 
+            result.add(section, sensor['name'], temperature_sensor_status(sensor), (('Sensor', sensor['name']), ('Description', sensor['description']), ('Card type', card['entPhysicalClass']), ('Card position', card['relPos'])) + temperature_sensor_fields(sensor), temperature_sensor_values(sensor))
+    section = result.section("Power Supplies: ", summary=ALL)
+    for item in data_json["powerSupplySlots"]: 
+        for sensor in item["tempSensors"]: 
+            result.add(section, sensor['name'], temperature_sensor_status(sensor), (('Sensor', sensor['name']), ('Description', sensor['description'])) + temperature_sensor_fields(sensor), temperature_sensor_values(sensor))
+    return result
@@ -0,0 +1,38 @@
+from audit.functions import DeviceCommands, temperature_sensor_status, temperature_sensor_fields, temperature_sensor_values
+from audit.registry import audit_check
+from audit.results import TopicResult, ALL
+
+@audit_check(commands=['show system environment temperature transceiver'])
+def check_temperature_transceivers (device, root_dir, commands=None):
+    """Check the transceivers temperature status.
+
+    Required EOS command: show system environment temperature transceiver | json
+    Test failure conditions: A test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+    
+    Returns
+    -------
+    TopicResult
+        The tests result. 
+    """
+    command = "show system environment temperature transceiver"
+    result = TopicResult(device, 'check_temperature_transceivers', 'transceivers temperature status', 'include tests report about the transceivers temperature status', command, 'A test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    sensors = list(data_json["tempSensors"])
+    for card in data_json["cardSlots"]: 
+        if card['entPhysicalClass'] == "Linecard":
+            sensors.extend(card["tempSensors"])
+    section = result.section(summary=ALL)
+    for sensor in sensors:
+        result.add(section, sensor['description'], temperature_sensor_status(sensor), (('Description', sensor['description']),) + temperature_sensor_fields(sensor), temperature_sensor_values(sensor))
+    return result
@@ -0,0 +1,33 @@
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult
+
+@audit_check(commands=['show hostname'])
+def print_hostname (device, root_dir, commands=None):
+    """Report the device hostname and fqdn.
+
+    Required EOS command: show hostname | json
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+
+    Returns
+    -------
+    TopicResult
+        The device hostname and fqdn. 
+    """
+    command = "show hostname"
+    result = TopicResult(device, 'print_hostname', 'Device hostname', 'include the device hostname and fqdn', command, 'This is a report without any test so there is no failure/passing condition')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    section = result.section()
+    result.add(section, 'hostname', None, (('Hostname', data_json['hostname']),))
+    result.add(section, 'fqdn', None, (('FQDN', data_json['fqdn']),))
+    return result
@@ -0,0 +1,33 @@
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult
+
+@audit_check(commands=['show lldp neighbors'])
+def print_lldp (device, root_dir, commands=None):
+    """Report the LLDP topology.
+
+    Required EOS command: show lldp neighbors | json
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+    
+    Returns
+    -------
+    TopicResult
+        The LLDP neighbors. 
+    """
+    command = "show lldp neighbors"
+    result = TopicResult(device, 'print_lldp', 'LLDP topology', 'include the lldp topology', command, 'This is a report without any test so there is no failure/passing condition')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    section = result.section()
+    for item in data_json['lldpNeighbors']:  
+        result.add(section, item['port'], None, (('Interface', item['port']), ('LLDP neighbor', item['neighborDevice']), ('LLDP remote port', item['neighborPort'])))
+    return result
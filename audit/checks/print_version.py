@@ -0,0 +1,37 @@
+import datetime
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult
+
+@audit_check(commands=['show version'])
+def print_version (device, root_dir, commands=None):
+    """Report some details regarding the device (HW model, SN, SW release, uptime).
+
+    Required EOS command: show version | json
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device. They are read from root_dir if None.
+
+    Returns
+    -------
+    TopicResult
+        The device details. 
+    """
+    command = "show version"
+    result = TopicResult(device, 'print_version', 'Device details', 'include some details regarding the device (HW model, SN, SW release, uptime)', command, 'This is a report without any test so there is no failure/passing condition')
+    if commands is None:
+        commands = DeviceCommands(device, root_dir)
+    data_json = commands.json(command)
+    uptime = str(datetime.timedelta(seconds = int(data_json["uptime"]))) 
+    section = result.section()
+    result.add(section, 'modelName', None, (('Model', data_json['modelName']),))
+    result.add(section, 'serialNumber', None, (('Serial number', data_json["serialNumber"]),))
+    result.add(section, 'version', None, (('Version', data_json['version']),))
+    result.add(section, 'uptime', None, (('Uptime', uptime),))
+    return result
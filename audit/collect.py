@@ -0,0 +1,565 @@
+import concurrent.futures
+import functools
+import json
+import os
+import time
+from audit import decoder
+from audit.archive import ArchiveWriter, DirectoryWriter
+from audit.blobs import BLOBS_NAME, BlobWriter
+from audit.eapi import CommandError, EapiConnection
+from audit.functions import device_directories
+from audit.metrics import percentile
+from audit.sessions import SessionPool
+
+def json_to_text (data, indent=0):
+    """Render the JSON output of an EOS command as text
+
+    The text has one line per value, nested objects and lists are indented. It is not the EOS text output of the command.
+
+    Parameters
+    ----------
+    data : object
+        Parsed JSON output.
+    indent : int
+        Indentation level.
+
+    Returns
+    -------
+    str
+        Text output.
+    """
+    prefix = '  '*indent
+    lines = []
+    if isinstance(data, dict):
+        items = [(str(key) + ':', value) for key, value in data.items()]
+    elif isinstance(data, list):
+        items = [('-', value) for value in data]
+    else:
+        return prefix + str(data) + '\n'
+    for label, value in items:
+        if isinstance(value, (dict, list)) and value:
+            lines.append(prefix + label + '\n')
+            lines.append(json_to_text(value, indent + 1))
+        else:
+            lines.append(prefix + label + ' ' + json.dumps(value) + '\n')
+    return ''.join(lines)
+
+def unique (cmds):
+    """Return a list of EOS commands without duplicates, in the same order"""
+    seen = set()
+    result = []
+    for cmd in cmds or []:
+        if cmd not in seen:
+            seen.add(cmd)
+            result.append(cmd)
+    return result
+
+class CollectionPlan:
+    """EOS commands to collect from every device
+
+    Attributes
+    ----------
+    text_cmds : list
+        EOS commands to collect in text format.
+    json_cmds : list
+        EOS commands to collect in JSON format.
+    derived_text_cmds : list
+        JSON commands whose text output is rendered from the JSON output.
+    """
+    def __init__ (self, text_cmds, json_cmds, derived_text_cmds):
+        self.text_cmds = text_cmds
+        self.json_cmds = json_cmds
+        self.derived_text_cmds = derived_text_cmds
+
+def plan_collection (text_cmds, json_cmds, text_and_json_cmds, derive_text=False, native_text_cmds=None):
+    """Merge the lists of commands of input.yml into the commands to collect from every device
+
+    Parameters
+    ----------
+    text_cmds : list
+        EOS commands to collect in text format.
+    json_cmds : list
+        EOS commands to collect in JSON format.
+    text_and_json_cmds : list
+        EOS commands to collect in text and JSON format.
+    derive_text : bool
+        Render the text output of the text_and_json_cmds from their JSON output instead of collecting it.
+    native_text_cmds : list
+        text_and_json_cmds always collected in text format, when derive_text is True.
+
+    Returns
+    -------
+    CollectionPlan
+        The commands to collect, each one once per format.
+    """
+    text_cmds = unique(text_cmds)
+    json_cmds = unique(json_cmds)
+    text_and_json_cmds = unique(text_and_json_cmds)
+    text_set = set(text_cmds)
+    derived_text_cmds = []
+    if derive_text:
+        native = set(native_text_cmds or [])
+        derived_text_cmds = [cmd for cmd in text_and_json_cmds if cmd not in native and cmd not in text_set]
+    derived_set = set(derived_text_cmds)
+    json_set = set(json_cmds)
+    text_cmds = text_cmds + [cmd for cmd in text_and_json_cmds if cmd not in text_set and cmd not in derived_set]
+    json_cmds = json_cmds + [cmd for cmd in text_and_json_cmds if cmd not in json_set]
+    return CollectionPlan(text_cmds, json_cmds, derived_text_cmds)
+
+def plan_audit_commands (audit_func_list, show_tech_support_cmds=None, text_cmds=None, json_cmds=None):
+    """Return the minimal lists of commands to collect for audit functions and the custom show tech-support
+
+    The JSON commands are the ones declared by the functions (see audit.registry.audit_check), the text commands are the ones of the custom show tech-support.
+
+    Parameters
+    ----------
+    audit_func_list : list
+        Audit functions and fleet functions.
+    show_tech_support_cmds : list
+        EOS commands (text format) of the custom show tech-support.
+    text_cmds : list
+        Other EOS commands to collect in text format.
+    json_cmds : list
+        Other EOS commands to collect in JSON format.
+
+    Returns
+    -------
+    tuple
+        text_cmds, json_cmds and text_and_json_cmds, to give to plan_collection or collect_devices.
+    """
+    required_json = unique([cmd for item in audit_func_list for cmd in getattr(item, 'commands', [])])
+    required_text = unique(show_tech_support_cmds)
+    json_set = set(required_json)
+    text_set = set(required_text)
+    text_and_json_cmds = [cmd for cmd in required_json if cmd in text_set]
+    json_cmds = unique((json_cmds or []) + [cmd for cmd in required_json if cmd not in text_set])
+    text_cmds = unique((text_cmds or []) + [cmd for cmd in required_text if cmd not in json_set])
+    return text_cmds, json_cmds, text_and_json_cmds
+
+def open_connection (device, username, password, timeout=180, transport='ssh', eapi_protocol='https', eapi_port=None, eapi_verify_ssl=False):
+    """Open a connection to a device
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    username : str
+        Device username.
+    password : str
+        Device password.
+    timeout : int
+        Connection timeout in seconds.
+    transport : str
+        ssh (netmiko) or eapi.
+    eapi_protocol : str
+        http or https, for the eapi transport.
+    eapi_port : int
+        eAPI TCP port. Defaults to the protocol port.
+    eapi_verify_ssl : bool
+        Verify the device certificate, for the eapi transport with https.
+
+    Returns
+    -------
+    object
+        A netmiko connection or an EapiConnection.
+    """
+    if transport == 'eapi':
+        return EapiConnection(device, username, password, eapi_protocol, eapi_port, timeout, eapi_verify_ssl)
+    # netmiko is only required by the ssh transport
+    from netmiko import ConnectHandler
+    switch = {'device_type': 'arista_eos', 'host': device, 'username': username, 'password': password, 'port': '22', 'timeout': timeout}
+    return ConnectHandler(**switch)
+
+def collect_device (device, username, password, root_dir, text_cmds, json_cmds, text_and_json_cmds, timeout=180, transport='ssh', eapi_protocol='https', eapi_port=None, eapi_verify_ssl=False, derive_text=False, native_text_cmds=None, pool=None, archive=False, metrics=None, plan=None, blob_store=False):
+    """Collect EOS commands from one device and save them in the device directories
+
+    Any error is caught and returned so a device that fails does not stop the collection from the other devices.
+    With the ssh transport, the commands are sent one by one. With the eapi transport, all the text commands are sent in one runCmds request and all the JSON commands in another one.
+    With derive_text, the text_and_json_cmds are collected only in JSON format and their text file is rendered from the JSON output (see json_to_text), except for the native_text_cmds and the text_cmds.
+    With a pool, the connection to the device is taken from the pool and kept open after the collection. If a connection from the pool fails, the collection is done again with a new connection.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    username : str
+        Device username.
+    password : str
+        Device password.
+    root_dir: str
+        Root directory for all the outputs.
+    text_cmds : list
+        EOS commands to collect in text format.
+    json_cmds : list
+        EOS commands to collect in JSON format.
+    text_and_json_cmds : list
+        EOS commands to collect in text and JSON format.
+    timeout : int
+        Connection timeout in seconds.
+    transport : str
+        ssh (netmiko) or eapi.
+    eapi_protocol : str
+        http or https, for the eapi transport.
+    eapi_port : int
+        eAPI TCP port. Defaults to the protocol port.
+    eapi_verify_ssl : bool
+        Verify the device certificate, for the eapi transport with https.
+    derive_text : bool
+        Render the text output of the text_and_json_cmds from their JSON output instead of collecting it.
+    native_text_cmds : list
+        text_and_json_cmds always collected in text format, when derive_text is True.
+    pool : SessionPool
+        Pool of connections to reuse. A new connection is opened and closed for each device if None.
+    archive : bool
+        Save the outputs in one compressed archive per device (see audit.archive) instead of one file per command.
+    metrics : CollectionMetrics
+        Record the connection time, the time and size of each command and the failures if not None.
+    plan : CollectionPlan
+        Commands to collect, computed once for all the devices by collect_devices. Computed from the lists of commands if None.
+    blob_store : bool
+        Save the outputs in the content-addressed blob store of root_dir (see audit.blobs) with a manifest per collection, instead of one file per command.
+
+    Returns
+    -------
+    tuple
+        device, wall time in seconds, error message (None if the collection succeeded).
+    """
+    start = time.time()
+    directories = device_directories(device, root_dir)
+    if plan is None:
+        plan = plan_collection(text_cmds, json_cmds, text_and_json_cmds, derive_text, native_text_cmds)
+    text_cmds = plan.text_cmds
+    json_cmds = plan.json_cmds
+    derived_text_cmds = plan.derived_text_cmds
+    blob_directory = None
+    if blob_store:
+        blob_directory = os.path.dirname(directories[0]) + '/' + BLOBS_NAME
+    try:
+        if pool is None:
+            print("opening connection to " + device)
+            connect_start = time.time()
+            try:
+                connection = open_connection(device, username, password, timeout, transport, eapi_protocol, eapi_port, eapi_verify_ssl)
+            except Exception as error:
+                record(metrics, device, 'connect', time=time.time() - connect_start, reused=False, error=str(error))
+                raise
+            record(metrics, device, 'connect', time=time.time() - connect_start, reused=False, error=None)
+            try:
+                save_commands(connection, device, transport, text_cmds, json_cmds, derived_text_cmds, directories, archive, metrics, blob_directory)
+            finally:
+                print("closing connection to " + device)
+                connection.disconnect()
+        else:
+            while True:
+                connect_start = time.time()
+                try:
+                    connection, reused = pool.acquire(device)
+                except Exception as error:
+                    record(metrics, device, 'connect', time=time.time() - connect_start, reused=False, error=str(error))
+                    raise
+                record(metrics, device, 'connect', time=time.time() - connect_start, reused=reused, error=None)
+                if reused:
+                    print("reusing connection to " + device)
+                else:
+                    print("opening connection to " + device)
+                try:
+                    save_commands(connection, device, transport, text_cmds, json_cmds, derived_text_cmds, directories, archive, metrics, blob_directory)
+                except Exception:
+                    pool.release(device, connection, failed=True)
+                    if reused:
+                        # the connection kept in the pool is broken, retry with a new connection
+                        print("connection to " + device + " failed, reconnecting")
+                        continue
+                    raise
+                pool.release(device, connection)
+                break
+    except Exception as error:
+        print("collection failed on device " + device + ": " + str(error))
+        record(metrics, device, 'device', time=time.time() - start, error=str(error))
+        return device, time.time() - start, str(error)
+    record(metrics, device, 'device', time=time.time() - start, error=None)
+    return device, time.time() - start, None
+
+def record (metrics, device, event, **fields):
+    """Record an event in the collection metrics, if there are metrics"""
+    if metrics is not None:
+        metrics.record(device, event, **fields)
+
+def run_command (connection, device, cmd, format, metrics=None):
+    """Send an EOS command on a netmiko connection and record its time and size
+
+    Returns
+    -------
+    str
+        Output of the command.
+    """
+    start = time.time()
+    try:
+        if format == 'json':
+            output = connection.send_command(cmd + "| json")
+        else:
+            output = connection.send_command(cmd)
+    except Exception as error:
+        record(metrics, device, 'command', command=cmd, format=format, time=time.time() - start, bytes=0, error=str(error))
+        raise
+    record(metrics, device, 'command', command=cmd, format=format, time=time.time() - start, bytes=len(output.encode()), error=None)
+    return output
+
+def run_request (connection, device, cmds, format, metrics=None):
+    """Send EOS commands in one eAPI request and record the time of the request
+
+    Returns
+    -------
+    list
+        Output of each command.
+    """
+    start = time.time()
+    try:
+        outputs = connection.run_cmds(cmds, format)
+    except Exception as error:
+        record(metrics, device, 'request', commands=len(cmds), format=format, time=time.time() - start, error=str(error))
+        raise
+    record(metrics, device, 'request', commands=len(cmds), format=format, time=time.time() - start, error=None)
+    return outputs
+
+def command_error (cmd_output):
+    """Return the error message of a command which failed in an eAPI request, or None if the command succeeded"""
+    if isinstance(cmd_output, CommandError):
+        return str(cmd_output) + '\n'
+    return None
+
+def save_commands (connection, device, transport, text_cmds, json_cmds, derived_text_cmds, directories, archive=False, metrics=None, blob_directory=None):
+    """Collect EOS commands on an open connection and save them
+
+    Parameters
+    ----------
+    connection : object
+        A netmiko connection or an EapiConnection.
+    device : str
+        Device IP address or hostname.
+    transport : str
+        ssh (netmiko) or eapi.
+    text_cmds : list
+        EOS commands to collect in text format.
+    json_cmds : list
+        EOS commands to collect in JSON format.
+    derived_text_cmds : list
+        JSON commands whose text output is rendered from the JSON output.
+    directories : tuple
+        Directories of the device, as returned by device_directories.
+    archive : bool
+        Save the outputs in one compressed archive instead of one file per command.
+    metrics : CollectionMetrics
+        Record the time and size of each command if not None.
+    blob_directory : str
+        Directory of the blob store to save the outputs in (see audit.blobs), None to save them as files or in an archive.
+    """
+    if blob_directory is not None:
+        writer = BlobWriter(directories[0], blob_directory)
+    elif archive:
+        writer = ArchiveWriter(directories[0])
+    else:
+        writer = DirectoryWriter(directories[0], directories[2], directories[3])
+    try:
+        print("collecting show commands on device " + device)
+        if transport == 'eapi':
+            if text_cmds:
+                print(device + ": collecting " + str(len(text_cmds)) + " text commands")
+                for cmd, cmd_output in zip(text_cmds, run_request(connection, device, text_cmds, 'text', metrics)):
+                    error = command_error(cmd_output)
+                    if error is not None:
+                        # like the ssh transport, the error message of the device is saved as the output
+                        writer.save(cmd, 'text', error)
+                        record(metrics, device, 'command', command=cmd, format='text', time=None, bytes=len(error.encode()), error=error)
+                        continue
+                    writer.save(cmd, 'text', cmd_output['output'])
+                    record(metrics, device, 'command', command=cmd, format='text', time=None, bytes=len(cmd_output['output'].encode()), error=None)
+            if json_cmds:
+                print(device + ": collecting " + str(len(json_cmds)) + " json commands")
+                for cmd, cmd_output in zip(json_cmds, run_request(connection, device, json_cmds, 'json', metrics)):
+                    error = command_error(cmd_output)
+                    if error is not None:
+                        writer.save(cmd, 'json', error)
+                        record(metrics, device, 'command', command=cmd, format='json', time=None, bytes=len(error.encode()), error=error)
+                        if cmd in derived_text_cmds:
+                            writer.save(cmd, 'text', error)
+                        continue
+                    output = json.dumps(cmd_output, indent=4)
+                    writer.save(cmd, 'json', output)
+                    record(metrics, device, 'command', command=cmd, format='json', time=None, bytes=len(output.encode()), error=None)
+                    if cmd in derived_text_cmds:
+                        writer.save(cmd, 'text', json_to_text(cmd_output))
+        else:
+            # collect text commands
+            for cmd in text_cmds:
+                print(device + ": collecting " + cmd)
+                writer.save(cmd, 'text', run_command(connection, device, cmd, 'text', metrics))
+            # collect json commands
+            for cmd in json_cmds:
+                print(device + ": collecting " + cmd + "| json")
+                cmd_output = run_command(connection, device, cmd, 'json', metrics)
+                writer.save(cmd, 'json', cmd_output)
+                if cmd in derived_text_cmds:
+                    try:
+                        text_output = json_to_text(decoder.loads(cmd_output))
+                    except ValueError:
+                        # no JSON output (unsupported command), collect the text output
+                        print(device + ": collecting " + cmd)
+                        text_output = run_command(connection, device, cmd, 'text', metrics)
+                    writer.save(cmd, 'text', text_output)
+    except Exception:
+        writer.abort()
+        raise
+    writer.close()
+
+def collect_devices (devices, username, password, root_dir, text_cmds, json_cmds, text_and_json_cmds, max_parallel_sessions=10, timeout=180, transport='ssh', eapi_protocol='https', eapi_port=None, eapi_verify_ssl=False, derive_text=False, native_text_cmds=None, pool=None, archive=False, metrics=None, blob_store=False):
+    """Collect EOS commands from several devices in parallel
+
+    Each device is collected in its own session by a pool of at most max_parallel_sessions workers, so a slow or unreachable device only holds one worker.
+
+    Parameters
+    ----------
+    devices : list
+        List of devices IP addresses or hostnames.
+    username : str
+        Devices username.
+    password : str
+        Devices password.
+    root_dir: str
+        Root directory for all the outputs.
+    text_cmds : list
+        EOS commands to collect in text format.
+    json_cmds : list
+        EOS commands to collect in JSON format.
+    text_and_json_cmds : list
+        EOS commands to collect in text and JSON format.
+    max_parallel_sessions : int
+        Maximum number of devices collected at the same time.
+    timeout : int
+        Connection timeout in seconds.
+    transport : str
+        ssh (netmiko) or eapi.
+    eapi_protocol : str
+        http or https, for the eapi transport.
+    eapi_port : int
+        eAPI TCP port. Defaults to the protocol port.
+    eapi_verify_ssl : bool
+        Verify the device certificate, for the eapi transport with https.
+    derive_text : bool
+        Render the text output of the text_and_json_cmds from their JSON output instead of collecting it.
+    native_text_cmds : list
+        text_and_json_cmds always collected in text format, when derive_text is True.
+    pool : SessionPool
+        Pool of connections to reuse. A new connection is opened and closed for each device if None.
+    archive : bool
+        Save the outputs in one compressed archive per device (see audit.archive) instead of one file per command.
+    metrics : CollectionMetrics
+        Record the connection time, the time and size of each command and the failures if not None.
+    blob_store : bool
+        Save the outputs in the content-addressed blob store of root_dir (see audit.blobs) with a manifest per collection, instead of one file per command.
+
+    Returns
+    -------
+    list
+        One (device, wall time in seconds, error message) tuple per device, in the devices order.
+    """
+    plan = plan_collection(text_cmds, json_cmds, text_and_json_cmds, derive_text, native_text_cmds)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_parallel_sessions)) as executor:
+        futures = [executor.submit(collect_device, device, username, password, root_dir, text_cmds, json_cmds, text_and_json_cmds, timeout, transport, eapi_protocol, eapi_port, eapi_verify_ssl, derive_text, native_text_cmds, pool, archive, metrics, plan, blob_store) for device in devices]
+        return [future.result() for future in futures]
+
+def create_session_pool (username, password, timeout=180, transport='ssh', eapi_protocol='https', eapi_port=None, eapi_verify_ssl=False, idle_timeout=300):
+    """Create a pool of connections to the devices for repeated collections
+
+    Parameters
+    ----------
+    username : str
+        Devices username.
+    password : str
+        Devices password.
+    timeout : int
+        Connection timeout in seconds.
+    transport : str
+        ssh (netmiko) or eapi.
+    eapi_protocol : str
+        http or https, for the eapi transport.
+    eapi_port : int
+        eAPI TCP port. Defaults to the protocol port.
+    eapi_verify_ssl : bool
+        Verify the device certificate, for the eapi transport with https.
+    idle_timeout : int
+        Time in seconds after which an unused connection is closed.
+
+    Returns
+    -------
+    SessionPool
+        Pool to give to collect_devices.
+    """
+    factory = functools.partial(open_connection, username=username, password=password, timeout=timeout, transport=transport, eapi_protocol=eapi_protocol, eapi_port=eapi_port, eapi_verify_ssl=eapi_verify_ssl)
+    return SessionPool(factory, idle_timeout)
+
+def print_collection_summary (results):
+    """Print the wall time and the result of the collection for each device
+
+    Parameters
+    ----------
+    results : list
+        List of (device, wall time in seconds, error message) tuples as returned by collect_devices.
+    """
+    print('\n' + '-'*13 + ' Collection summary ' + '-'*13 + '\n')
+    for device, elapsed, error in results:
+        if error is None:
+            result = 'PASS'
+        else:
+            result = 'FAIL (' + error + ')'
+        print('Device: ' + device + ' *** Time (s): ' + '%.2f' % elapsed + ' *** Result: ' + result)
+    failed = [item[0] for item in results if item[2] is not None]
+    print('\n' + str(len(results) - len(failed)) + ' device(s) collected, ' + str(len(failed)) + ' device(s) failed')
+    if failed:
+        print('Failed devices: ' + str(failed))
+
+def print_collection_metrics (metrics):
+    """Print the p50, p95 and max connection time and command time, and the slowest devices
+
+    Parameters
+    ----------
+    metrics : CollectionMetrics
+        Metrics of the last collection run.
+    """
+    events = list(metrics.events)
+    print('\n' + '-'*13 + ' Collection metrics ' + '-'*13 + '\n')
+    lines = []
+    connect_times = [event['time'] for event in events if event['event'] == 'connect' and event['error'] is None]
+    connect_failures = len([event for event in events if event['event'] == 'connect' and event['error'] is not None])
+    if connect_times or connect_failures:
+        lines.append(('Connect', len(connect_times) + connect_failures, connect_times, None, connect_failures))
+    commands = {}
+    for event in events:
+        if event['event'] in ('command', 'request'):
+            if event['event'] == 'command':
+                name = 'Command: ' + event['command'] + ' (' + event['format'] + ')'
+            else:
+                name = 'eAPI request: ' + event['format']
+            commands.setdefault(name, []).append(event)
+    for name, command_events in commands.items():
+        times = [event['time'] for event in command_events if event['time'] is not None]
+        sizes = [event['bytes'] for event in command_events if 'bytes' in event]
+        failures = len([event for event in command_events if event['error'] is not None])
+        lines.append((name, len(command_events), times, sizes, failures))
+    lines.sort(key=lambda line: -max(line[2] or [0]))
+    for name, count, times, sizes, failures in lines:
+        text = name + ' *** Count: ' + str(count)
+        if times:
+            text = text + ' *** p50 (s): ' + '%.3f' % percentile(times, 50) + ' *** p95 (s): ' + '%.3f' % percentile(times, 95) + ' *** Max (s): ' + '%.3f' % max(times)
+        if sizes:
+            text = text + ' *** Max size (bytes): ' + str(max(sizes))
+        print(text + ' *** Failures: ' + str(failures))
+    devices = {}
+    for event in events:
+        if event['event'] in ('command', 'request') and event['time'] is not None:
+            devices[event['device']] = devices.get(event['device'], 0) + event['time']
+    if devices:
+        print('')
+        for device, total in sorted(devices.items(), key=lambda item: -item[1])[:10]:
+            size = sum([event.get('bytes', 0) for event in events if event['device'] == device and event['event'] == 'command'])
+            print('Device: ' + device + ' *** Commands time (s): ' + '%.2f' % total + ' *** Size (bytes): ' + str(size))
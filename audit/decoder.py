@@ -0,0 +1,123 @@
+import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+def backend ():
+    """Return the name of the JSON decoder used by loads"""
+    if orjson is not None:
+        return 'orjson'
+    return 'json'
+
+def loads (data):
+    """Parse a JSON document with the fastest decoder installed (orjson, otherwise the json module)
+
+    Parameters
+    ----------
+    data : str or bytes
+        JSON document.
+
+    Returns
+    -------
+    object
+        The parsed document.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def match (position, path):
+    """Return True if the keys of a position in a JSON document match a path, '*' matches any key"""
+    if len(position) != len(path):
+        return False
+    for key, expected in zip(position, path):
+        if not isinstance(key, str) or (expected != '*' and key != expected):
+            return False
+    return True
+
+def walk_items (data, path, keys=()):
+    """Iterate over the items of the objects at a path of a parsed JSON document, see iter_items"""
+    if not path:
+        if isinstance(data, dict):
+            yield keys, None, None
+            for key, value in data.items():
+                yield keys, key, value
+        return
+    if not isinstance(data, dict):
+        return
+    if path[0] == '*':
+        for key, value in data.items():
+            for item in walk_items(value, path[1:], keys + (key,)):
+                yield item
+    elif path[0] in data:
+        for item in walk_items(data[path[0]], path[1:], keys):
+            yield item
+
+def iter_items (f, path):
+    """Iterate over the items of the objects at a path of a JSON document
+
+    With ijson installed, the document is parsed as a stream: only the value of the current item is held in memory.
+    Otherwise the document is parsed with loads.
+
+    Parameters
+    ----------
+    f : file object
+        Binary file object of the JSON document.
+    path : tuple
+        Keys from the root of the document to the objects, '*' matches any key.
+        ('vrfs', '*', 'peers') matches the peers object of each vrf.
+
+    Yields
+    ------
+    tuple
+        The keys matched by the '*' of the path, the item key and the item value.
+        Each object matched by the path first yields its keys, None and None, so the empty objects are also seen.
+    """
+    if ijson is None:
+        for item in walk_items(loads(f.read()), path):
+            yield item
+        return
+    # keys of the containers from the root to the current event, None in an array
+    stack = []
+    builder = None
+    depth = 0
+    item = None
+    for event, value in ijson.basic_parse(f, use_float=True):
+        if builder is not None:
+            # value of the current item, built until its container is closed
+            builder.event(event, value)
+            if event in ('start_map', 'start_array'):
+                depth = depth + 1
+            elif event in ('end_map', 'end_array'):
+                depth = depth - 1
+                if depth == 0:
+                    yield item[0], item[1], builder.value
+                    builder = None
+                    item = None
+            continue
+        if item is not None:
+            if event in ('start_map', 'start_array'):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                depth = 1
+            else:
+                yield item[0], item[1], value
+                item = None
+            continue
+        if event == 'start_map':
+            if match(stack, path):
+                yield tuple(key for key, expected in zip(stack, path) if expected == '*'), None, None
+            stack.append(None)
+        elif event == 'start_array':
+            stack.append(None)
+        elif event in ('end_map', 'end_array'):
+            stack.pop()
+        elif event == 'map_key':
+            stack[-1] = value
+            if match(stack[:-1], path):
+                item = (tuple(key for key, expected in zip(stack, path) if expected == '*'), value)
@@ -0,0 +1,118 @@
+import base64
+import http.client
+import json
+import ssl
+from audit import decoder
+
+class EapiError(Exception):
+    """Error returned by the eAPI of a device"""
+
+class CommandError:
+    """Result of a command which failed in a runCmds request
+
+    Attributes
+    ----------
+    errors : list
+        Error messages of the device.
+    """
+    __slots__ = ('errors',)
+
+    def __init__ (self, errors):
+        self.errors = errors
+
+    def __str__ (self):
+        return '\n'.join(str(error) for error in self.errors)
+
+class EapiConnection:
+    """Connection to the eAPI (JSON-RPC) of an EOS device
+
+    The HTTP connection is kept open between requests.
+
+    Parameters
+    ----------
+    host : str
+        Device IP address or hostname.
+    username : str
+        Device username.
+    password : str
+        Device password.
+    protocol : str
+        http or https.
+    port : int
+        TCP port. Defaults to 80 for http and 443 for https.
+    timeout : int
+        Connection timeout in seconds.
+    verify_ssl : bool
+        Verify the device certificate (https only).
+    """
+    def __init__ (self, host, username, password, protocol='https', port=None, timeout=180, verify_ssl=False):
+        self.host = host
+        self.protocol = protocol
+        self.request_id = 0
+        credentials = base64.b64encode((username + ':' + password).encode()).decode()
+        self.headers = {'Content-Type': 'application/json', 'Authorization': 'Basic ' + credentials}
+        if protocol == 'https':
+            context = None
+            if not verify_ssl:
+                context = ssl._create_unverified_context()
+            self.connection = http.client.HTTPSConnection(host, port or 443, timeout=timeout, context=context)
+        else:
+            self.connection = http.client.HTTPConnection(host, port or 80, timeout=timeout)
+
+    def run_cmds (self, cmds, format='json'):
+        """Run a list of commands in one runCmds request
+
+        A command which fails (unsupported or invalid command) does not fail the other commands: its result is a CommandError.
+        EOS stops at the first failing command, so the commands after it are sent again in a new request.
+
+        Parameters
+        ----------
+        cmds : list
+            EOS commands.
+        format : str
+            json or text.
+
+        Returns
+        -------
+        list
+            One result per command. A result is the parsed JSON output of the command for the json format, and a dict with the key output for the text format.
+
+        Raises
+        ------
+        EapiError
+            The request failed (HTTP error, authentication, ...).
+        """
+        cmds = list(cmds)
+        results = []
+        while cmds:
+            self.request_id = self.request_id + 1
+            request = {'jsonrpc': '2.0', 'method': 'runCmds', 'params': {'version': 1, 'cmds': cmds, 'format': format}, 'id': str(self.request_id)}
+            self.connection.request('POST', '/command-api', json.dumps(request), self.headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            if response.status != 200:
+                raise EapiError(self.host + ': HTTP error ' + str(response.status) + ' ' + response.reason)
+            data_json = decoder.loads(data)
+            if 'error' not in data_json:
+                return results + data_json['result']
+            error = data_json['error']
+            # the data of a command error has the results of the commands run before the failing one, then the errors of the failing one
+            command_results = error.get('data')
+            if not isinstance(command_results, list) or not command_results:
+                raise EapiError(self.host + ': ' + error.get('message', str(error)))
+            failed = len(command_results) - 1
+            for position, command_result in enumerate(command_results):
+                if isinstance(command_result, dict) and 'errors' in command_result:
+                    failed = position
+                    break
+            command_error = command_results[failed]
+            if isinstance(command_error, dict) and 'errors' in command_error:
+                command_error = CommandError(command_error['errors'])
+            else:
+                command_error = CommandError([error.get('message', str(error))])
+            results = results + command_results[:failed] + [command_error]
+            cmds = cmds[failed + 1:]
+        return results
+
+    def disconnect (self):
+        self.connection.close()
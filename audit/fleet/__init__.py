@@ -0,0 +1,22 @@
+from audit.registry import get_fleet_check
+
+def str_to_fleet_function (audit_str_list):
+    """map a list of string into a list of fleet functions
+
+    A fleet function audits all the devices at once, it is called with the list of devices and root_dir and returns a TopicResult.
+    Only the modules of the listed functions are imported, see audit.registry.
+
+    Parameters
+    ----------
+    audit_str_list : list
+        list of string
+
+    Returns
+    -------
+    list
+        list of functions
+    """
+    audit_func_list = []
+    for item in audit_str_list or []:
+        audit_func_list.append(get_fleet_check(item))
+    return audit_func_list
@@ -0,0 +1,208 @@
+import ipaddress
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+COMMANDS = ['show ip bgp summary vrf all', 'show ip interface']
+
+# Kinds of problems of a session
+HALF_ESTABLISHED = 'half-established'
+ASN_MISMATCH = 'ASN mismatch'
+ONE_SIDED = 'one-sided'
+
+class BgpSessionIndex:
+    """BGP sessions of all the devices, indexed by (device, vrf, peer address)
+
+    A peer is matched to a device with the router ID or an interface address of the device in the vrf.
+    The local address of a session is the interface address of the device in the subnet of the peer, or the router ID if no interface of the device is in this subnet.
+
+    Parameters
+    ----------
+    devices : list
+        List of devices IP addresses or hostnames.
+
+    Attributes
+    ----------
+    sessions : dict
+        (peer ASN, peer state) of each (device index, vrf, peer address).
+    local : dict
+        (ASN, router ID) of each (device index, vrf).
+    owners : dict
+        Device index of each (vrf, router ID).
+    duplicates : dict
+        Device indices of each (vrf, router ID) used by more than one device.
+    addresses : dict
+        Device index of each (vrf, interface address), None if the address is used by more than one device.
+    subnets : dict
+        Interface address of each network, by mask length, of each (device index, vrf).
+    """
+    def __init__ (self, devices):
+        self.devices = devices
+        self.sessions = {}
+        self.local = {}
+        self.owners = {}
+        self.duplicates = {}
+        self.addresses = {}
+        self.subnets = {}
+
+    def add_device (self, index, bgp_vrfs):
+        """Add the vrfs of the output of show ip bgp summary vrf all of a device"""
+        sessions = self.sessions
+        for vrf, details in bgp_vrfs.items():
+            router_id = details.get('routerId')
+            self.local[(index, vrf)] = (details.get('asn'), router_id)
+            if router_id is not None:
+                owner = self.owners.setdefault((vrf, router_id), index)
+                if owner != index:
+                    self.duplicates.setdefault((vrf, router_id), [owner]).append(index)
+            for peer, peer_details in details.get('peers', {}).items():
+                sessions[(index, vrf, peer)] = (peer_details['asn'], peer_details['peerState'])
+
+    def add_interfaces (self, index, interfaces):
+        """Add the interface addresses of the output of show ip interface of a device"""
+        for details in interfaces.values():
+            vrf = details.get('vrf', 'default')
+            interface_address = details.get('interfaceAddress', {})
+            ips = [interface_address.get('primaryIp')] + interface_address.get('secondaryIpsOrderedList', [])
+            for ip in ips:
+                if ip is None or ip['maskLen'] == 0:
+                    continue
+                address = ip['address']
+                if self.addresses.setdefault((vrf, address), index) != index:
+                    # an address of more than one device does not identify the peer
+                    self.addresses[(vrf, address)] = None
+                network = ipaddress.ip_network(address + '/' + str(ip['maskLen']), strict=False)
+                self.subnets.setdefault((index, vrf), {}).setdefault(ip['maskLen'], {})[network] = address
+
+    def remote (self, vrf, peer):
+        """Return the index of the device which has a peer address in a vrf, None if the peer is not one of the devices"""
+        remote = self.owners.get((vrf, peer))
+        if remote is None:
+            remote = self.addresses.get((vrf, peer))
+        return remote
+
+    def local_address (self, index, vrf, peer):
+        """Return the local address of the session of a device to a peer address in a vrf"""
+        for mask_length, networks in self.subnets.get((index, vrf), {}).items():
+            address = networks.get(ipaddress.ip_network(peer + '/' + str(mask_length), strict=False))
+            if address is not None:
+                return address
+        return self.local[(index, vrf)][1]
+
+    def matches (self):
+        """Iterate over the sessions with the problems found by matching them with the remote end
+
+        Each session is matched with one lookup of the peer address in owners or addresses, one lookup of its local address in subnets and one lookup of the reverse session in sessions.
+        A session between two devices is yielded once, from the device which has it if the other does not, from the first device otherwise.
+
+        Yields
+        ------
+        tuple
+            device index, vrf, peer address, peer device index (None if not one of the devices) and list of (kind of problem, problem, likely culprit device index).
+        """
+        sessions = self.sessions
+        local = self.local
+        for (index, vrf, peer), (asn, state) in sessions.items():
+            remote = self.remote(vrf, peer)
+            if remote is None or remote == index or (remote, vrf) not in local:
+                yield index, vrf, peer, None, []
+                continue
+            local_asn = local[(index, vrf)][0]
+            local_address = self.local_address(index, vrf, peer)
+            remote_asn = local[(remote, vrf)][0]
+            reverse = sessions.get((remote, vrf, local_address))
+            if reverse is not None and remote < index:
+                continue
+            problems = []
+            if remote_asn is not None and str(asn) != str(remote_asn):
+                problems.append((ASN_MISMATCH, ASN_MISMATCH + ' (' + str(asn) + ' configured, ' + str(remote_asn) + ' on the peer)', index))
+            if reverse is None:
+                problems.append((ONE_SIDED, ONE_SIDED + ' (no session to ' + str(local_address) + ' on the peer)', remote))
+            else:
+                reverse_asn, reverse_state = reverse
+                if local_asn is not None and str(reverse_asn) != str(local_asn):
+                    problems.append((ASN_MISMATCH, ASN_MISMATCH + ' (' + str(reverse_asn) + ' configured on the peer, ' + str(local_asn) + ' on the device)', remote))
+                if (state == 'Established') != (reverse_state == 'Established'):
+                    # the end which is not established is the likely culprit
+                    if state == 'Established':
+                        culprit = remote
+                    else:
+                        culprit = index
+                    problems.append((HALF_ESTABLISHED, HALF_ESTABLISHED + ' (' + state + ' and ' + reverse_state + ' on the peer)', culprit))
+            yield index, vrf, peer, remote, problems
+
+def load_sessions (devices, root_dir):
+    """Read the outputs of show ip bgp summary vrf all and show ip interface of all the devices
+
+    Returns
+    -------
+    BgpSessionIndex
+        The BGP sessions of all the devices.
+    """
+    index = BgpSessionIndex(devices)
+    for position, device in enumerate(devices):
+        commands = DeviceCommands(device, root_dir)
+        index.add_device(position, commands.json('show ip bgp summary vrf all')['vrfs'])
+        index.add_interfaces(position, commands.json('show ip interface')['interfaces'])
+        commands.clear()
+    return index
+
+def unique_names (names):
+    """Return the names without duplicates, in their order"""
+    return list(dict.fromkeys(names))
+
+@audit_check(commands=COMMANDS)
+def fleet_bgp (devices, root_dir):
+    """Check that the two ends of each BGP session between the devices agree.
+
+    The sessions of all the devices are indexed by (device, vrf, peer address), the peers are matched to the devices with their router ID or their interface addresses in the vrf.
+    Each session is matched with its remote end in one pass, the sessions to peers which are not one of the devices are listed as unmatched.
+
+    Required EOS commands: show ip bgp summary vrf all | json, show ip interface | json
+    Test failure conditions: A test fails if a session is established on one end only (half-established), if the remote end has no session back (one-sided), if the peer ASN of one end is not the ASN of the other end, or if a router ID is used by more than one device in a vrf.
+
+    Parameters
+    ----------
+    devices : list
+        List of devices IP addresses or hostnames.
+    root_dir: str
+        Root directory for all the outputs.
+
+    Returns
+    -------
+    TopicResult
+        The tests result, for the device 'fleet'.
+    """
+    result = TopicResult('fleet', 'fleet_bgp', 'Fleet BGP sessions', 'include tests report about the consistency of the BGP sessions between the devices', ' | json, '.join(COMMANDS), 'A test fails if a session is established on one end only (half-established), if the remote end has no session back (one-sided), if the peer ASN of one end is not the ASN of the other end, or if a router ID is used by more than one device in a vrf')
+    index = load_sessions(devices, root_dir)
+    sessions = 0
+    unmatched = []
+    counts = {HALF_ESTABLISHED: 0, ASN_MISMATCH: 0, ONE_SIDED: 0}
+    failures = []
+    for (vrf, router_id), owners in index.duplicates.items():
+        failures.append((vrf + ' ' + router_id, (('VRF', vrf), ('Router ID', router_id), ('Devices', ', '.join(devices[owner] for owner in owners)), ('Problem', 'duplicate router ID'))))
+    for position, vrf, peer, remote, problems in index.matches():
+        if remote is None:
+            device = devices[position]
+            unmatched.append((device + ' ' + vrf + ' ' + peer, (('Device', device), ('VRF', vrf), ('Peer', peer), ('Peer ASN', index.sessions[(position, vrf, peer)][0]))))
+            continue
+        sessions = sessions + 1
+        # a session with two ASN mismatches is counted once
+        for kind in set(kind for kind, problem, culprit in problems):
+            counts[kind] = counts[kind] + 1
+        if problems:
+            device = devices[position]
+            failures.append((device + ' ' + vrf + ' ' + peer, (('Device', device), ('VRF', vrf), ('Peer', peer), ('Peer device', devices[remote]), ('Problem', ', '.join(problem for kind, problem, culprit in problems)), ('Likely culprit', ', '.join(unique_names(devices[culprit] for kind, problem, culprit in problems))))))
+    section = result.section('Sessions: ', summary=ALL)
+    if failures:
+        status = FAIL
+    else:
+        status = PASS
+    result.add(section, 'sessions', status, (('Sessions between devices', sessions), ('Half-established', counts[HALF_ESTABLISHED]), ('ASN mismatch', counts[ASN_MISMATCH]), ('One-sided', counts[ONE_SIDED]), ('Unmatched peers', len(unmatched))))
+    for item, fields in failures:
+        result.add(section, item, FAIL, fields)
+    if unmatched:
+        section = result.section('Unmatched peers (not one of the devices): ', note='The unmatched peers are listed in the main report')
+        for item, fields in unmatched:
+            result.add(section, item, None, fields)
+    return result
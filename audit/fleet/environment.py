@@ -0,0 +1,192 @@
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# number of sensors and devices listed in the fleet rankings
+TOP = 10
+
+COMMANDS = ['show system environment temperature', 'show system environment temperature transceiver', 'show system environment power', 'show system environment cooling']
+
+class EnvironmentArrays:
+    """Environment data of all the devices, one array per value
+
+    The values of each device are converted to NumPy arrays in one step by the add methods, then the arrays of all the devices are concatenated by finalize.
+    The device attribute of each table is the index of the device in the devices list.
+
+    Attributes
+    ----------
+    sensors : dict
+        Temperature sensors (system and transceivers): device, name, current, overheat, critical, alert_count, hw_ok, in_alert.
+    fans : dict
+        Fans: device, label, speed, ok.
+    power_supplies : dict
+        Power supplies: device, name, output, capacity, ok.
+    """
+    def __init__ (self):
+        self.sensors = {'device': [], 'name': [], 'current': [], 'overheat': [], 'critical': [], 'alert_count': [], 'hw_ok': [], 'in_alert': []}
+        self.fans = {'device': [], 'label': [], 'speed': [], 'ok': []}
+        self.power_supplies = {'device': [], 'name': [], 'output': [], 'capacity': [], 'ok': []}
+
+    def add_sensors (self, device, sensors):
+        """Add all the temperature sensors of a device"""
+        table = self.sensors
+        count = len(sensors)
+        table['device'].append(numpy.full(count, device, dtype=numpy.int64))
+        table['name'].extend(sensor['name'] for sensor in sensors)
+        table['current'].append(numpy.fromiter((sensor.get('currentTemperature', numpy.nan) for sensor in sensors), float, count))
+        table['overheat'].append(numpy.fromiter((sensor.get('overheatThreshold', numpy.nan) for sensor in sensors), float, count))
+        table['critical'].append(numpy.fromiter((sensor.get('criticalThreshold', numpy.nan) for sensor in sensors), float, count))
+        table['alert_count'].append(numpy.fromiter((sensor['alertCount'] for sensor in sensors), float, count))
+        table['hw_ok'].append(numpy.fromiter((sensor['hwStatus'] == 'ok' for sensor in sensors), bool, count))
+        table['in_alert'].append(numpy.fromiter((str(sensor['inAlertState']) != "False" for sensor in sensors), bool, count))
+
+    def add_fans (self, device, fans):
+        """Add all the fans of a device"""
+        table = self.fans
+        count = len(fans)
+        table['device'].append(numpy.full(count, device, dtype=numpy.int64))
+        table['label'].extend(fan['label'] for fan in fans)
+        table['speed'].append(numpy.fromiter((fan.get('actualSpeed', numpy.nan) for fan in fans), float, count))
+        table['ok'].append(numpy.fromiter((fan['status'] == 'ok' for fan in fans), bool, count))
+
+    def add_power_supplies (self, device, power_supplies):
+        """Add all the power supplies of a device"""
+        table = self.power_supplies
+        count = len(power_supplies)
+        details = list(power_supplies.values())
+        table['device'].append(numpy.full(count, device, dtype=numpy.int64))
+        table['name'].extend(power_supplies)
+        table['output'].append(numpy.fromiter((item.get('outputPower', numpy.nan) for item in details), float, count))
+        table['capacity'].append(numpy.fromiter((item.get('capacity', numpy.nan) for item in details), float, count))
+        table['ok'].append(numpy.fromiter((item['state'] == 'ok' for item in details), bool, count))
+
+    def finalize (self):
+        """Concatenate the arrays of all the devices, the names and labels stay lists"""
+        for table in [self.sensors, self.fans, self.power_supplies]:
+            for key, values in table.items():
+                if key in ('name', 'label'):
+                    continue
+                if values:
+                    table[key] = numpy.concatenate(values)
+                elif key == 'device':
+                    table[key] = numpy.array([], dtype=numpy.int64)
+                elif key in ('hw_ok', 'in_alert', 'ok'):
+                    table[key] = numpy.array([], dtype=bool)
+                else:
+                    table[key] = numpy.array([], dtype=float)
+
+def load_environment (devices, root_dir):
+    """Read the environment outputs of all the devices
+
+    Parameters
+    ----------
+    devices : list
+        List of devices IP addresses or hostnames.
+    root_dir: str
+        Root directory for all the outputs.
+
+    Returns
+    -------
+    EnvironmentArrays
+        The environment data of all the devices.
+    """
+    arrays = EnvironmentArrays()
+    for index, device in enumerate(devices):
+        commands = DeviceCommands(device, root_dir)
+        data_json = commands.json('show system environment temperature')
+        sensors = list(data_json['tempSensors'])
+        for slot in data_json['cardSlots'] + data_json['powerSupplySlots']:
+            sensors.extend(slot['tempSensors'])
+        data_json = commands.json('show system environment temperature transceiver')
+        sensors.extend(data_json['tempSensors'])
+        # same transceiver sensors as check_temperature_transceivers
+        for slot in data_json['cardSlots']:
+            if slot['entPhysicalClass'] == 'Linecard':
+                sensors.extend(slot['tempSensors'])
+        arrays.add_sensors(index, sensors)
+        data_json = commands.json('show system environment power')
+        arrays.add_power_supplies(index, data_json['powerSupplies'])
+        data_json = commands.json('show system environment cooling')
+        fans = []
+        for slot in data_json['powerSupplySlots'] + data_json['fanTraySlots']:
+            fans.extend(slot['fans'])
+        arrays.add_fans(index, fans)
+        commands.clear()
+    arrays.finalize()
+    return arrays
+
+def top_indices (values, count):
+    """Return the indices of the count highest values, highest first, ignoring the NaN values"""
+    indices = numpy.flatnonzero(~numpy.isnan(values))
+    if len(indices) > count:
+        indices = indices[numpy.argpartition(-values[indices], count - 1)[:count]]
+    return indices[numpy.argsort(-values[indices], kind='stable')]
+
+def format_value (value):
+    if numpy.isnan(value):
+        return 'n/a'
+    return '%.1f' % value
+
+@audit_check(commands=COMMANDS)
+def fleet_environment (devices, root_dir):
+    """Evaluate the environment of all the devices at once.
+
+    The temperature sensors, fans and power supplies of all the devices are loaded in NumPy arrays and tested in a vectorized way.
+    The report also ranks the hottest sensors, the sensors with the lowest headroom to their overheat threshold and the devices with the highest power output.
+
+    Required EOS commands: show system environment temperature | json, show system environment temperature transceiver | json, show system environment power | json, show system environment cooling | json
+    Test failure conditions: A sensor test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state. A fan test fails if the status of a fan is not ok. A power supply test fails if the status of a power supply is not ok.
+
+    Parameters
+    ----------
+    devices : list
+        List of devices IP addresses or hostnames.
+    root_dir: str
+        Root directory for all the outputs.
+
+    Returns
+    -------
+    TopicResult
+        The tests result, for the device 'fleet'.
+    """
+    if numpy is None:
+        raise ImportError('fleet_environment requires numpy')
+    result = TopicResult('fleet', 'fleet_environment', 'Fleet environment', 'include tests report about the temperature, cooling and power status of all the devices', ' | json, '.join(COMMANDS), 'A test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state, if the status of a fan is not ok or if the status of a power supply is not ok')
+    arrays = load_environment(devices, root_dir)
+    sensors = arrays.sensors
+    fans = arrays.fans
+    power_supplies = arrays.power_supplies
+    sensor_failed = ~sensors['hw_ok'] | (sensors['alert_count'] != 0) | sensors['in_alert']
+    fan_failed = ~fans['ok']
+    power_supply_failed = ~power_supplies['ok']
+    for title, table, failed, name, label, item_label in [('Temperature sensors: ', sensors, sensor_failed, 'name', 'Sensors', 'Sensor'), ('Fans: ', fans, fan_failed, 'label', 'Fans', 'Fan'), ('Power supplies: ', power_supplies, power_supply_failed, 'name', 'Power supplies', 'Power supply')]:
+        section = result.section(title, summary=ALL)
+        failed_indices = numpy.flatnonzero(failed)
+        failed_devices = numpy.unique(table['device'][failed_indices])
+        if len(failed_indices):
+            status = FAIL
+        else:
+            status = PASS
+        result.add(section, label, status, ((label, len(failed)), ('Failed', len(failed_indices)), ('Devices with failures', len(failed_devices))))
+        for index in failed_indices:
+            device = devices[table['device'][index]]
+            result.add(section, device + ' ' + table[name][index], FAIL, (('Device', device), (item_label, table[name][index])))
+    headroom = sensors['overheat'] - sensors['current']
+    section = result.section('Hottest sensors: ')
+    for index in top_indices(sensors['current'], TOP):
+        result.add(section, sensors['name'][index], None, (('Device', devices[sensors['device'][index]]), ('Sensor', sensors['name'][index]), ('Temperature (C)', format_value(sensors['current'][index])), ('Overheat threshold (C)', format_value(sensors['overheat'][index])), ('Headroom (C)', format_value(headroom[index]))))
+    section = result.section('Lowest headroom to the overheat threshold: ')
+    for index in top_indices(-headroom, TOP):
+        result.add(section, sensors['name'][index], None, (('Device', devices[sensors['device'][index]]), ('Sensor', sensors['name'][index]), ('Temperature (C)', format_value(sensors['current'][index])), ('Overheat threshold (C)', format_value(sensors['overheat'][index])), ('Headroom (C)', format_value(headroom[index]))))
+    section = result.section('Highest power output: ')
+    output = numpy.bincount(power_supplies['device'], weights=numpy.nan_to_num(power_supplies['output']), minlength=len(devices))
+    for index in top_indices(output, TOP):
+        result.add(section, devices[index], None, (('Device', devices[index]), ('Power output (W)', format_value(output[index]))))
+    if len(fans['speed']) and not numpy.isnan(fans['speed']).all():
+        section = result.section('Fan speed: ')
+        result.add(section, 'speed', None, (('Mean (%)', format_value(numpy.nanmean(fans['speed']))), ('Max (%)', format_value(numpy.nanmax(fans['speed'])))))
+    return result
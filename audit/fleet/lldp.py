@@ -0,0 +1,159 @@
+import json
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+# Graph of the LLDP links of all the devices, next to the reports for all devices
+TOPOLOGY_NAME = 'lldp_topology.json'
+
+# Values of the link state in the topology
+SYMMETRIC = 'symmetric'
+ASYMMETRIC = 'asymmetric'
+ONE_SIDED = 'one-sided'
+DUPLICATE = 'duplicate'
+EXTERNAL = 'external'
+
+class LldpTopology:
+    """LLDP neighbors of all the devices, indexed by (device, port)
+
+    Parameters
+    ----------
+    devices : list
+        List of devices IP addresses or hostnames.
+
+    Attributes
+    ----------
+    neighbors : dict
+        List of the (neighbor name, neighbor port) seen on each (device, port).
+    names : dict
+        Device of each hostname and fqdn, to find the devices in the neighbor names.
+    """
+    def __init__ (self, devices):
+        self.devices = devices
+        self.neighbors = {}
+        self.names = {}
+
+    def add_device (self, device, hostname, fqdn, lldp_neighbors):
+        """Add the outputs of show hostname and show lldp neighbors of a device"""
+        self.names[device] = device
+        for name in (hostname, fqdn):
+            if name:
+                self.names[name] = device
+        for neighbor in lldp_neighbors:
+            self.neighbors.setdefault((device, neighbor['port']), []).append((neighbor['neighborDevice'], neighbor['neighborPort']))
+
+    def resolve (self, name):
+        """Return the device of a neighbor name, or None if the neighbor is not one of the devices"""
+        device = self.names.get(name)
+        if device is None and '.' in name:
+            device = self.names.get(name.split('.', 1)[0])
+        return device
+
+    def links (self):
+        """Iterate over the LLDP neighbors with the state of their link
+
+        Each neighbor is checked against the neighbors of the remote port with one lookup in the index.
+
+        Yields
+        ------
+        tuple
+            device, port, neighbor name, neighbor port, neighbor device (None if not one of the devices) and state of the link.
+        """
+        for (device, port), neighbors in self.neighbors.items():
+            for name, neighbor_port in neighbors:
+                neighbor = self.resolve(name)
+                if len(neighbors) > 1:
+                    state = DUPLICATE
+                elif neighbor is None:
+                    state = EXTERNAL
+                else:
+                    remote = self.neighbors.get((neighbor, neighbor_port))
+                    if remote is None:
+                        state = ONE_SIDED
+                    elif any(self.resolve(remote_name) == device and remote_port == port for remote_name, remote_port in remote):
+                        # the remote port also sees this port, it is a duplicate if it sees other neighbors too
+                        if len(remote) == 1:
+                            state = SYMMETRIC
+                        else:
+                            state = DUPLICATE
+                    else:
+                        state = ASYMMETRIC
+                yield device, port, name, neighbor_port, neighbor, state
+
+    def export (self, name):
+        """Save the graph in a JSON file
+
+        The file has the list of devices and one [device index, port, neighbor index or neighbor name, neighbor port, state] list per neighbor.
+        A symmetric link is saved once.
+        """
+        index = dict((device, position) for position, device in enumerate(self.devices))
+        links = []
+        for device, port, neighbor_name, neighbor_port, neighbor, state in self.links():
+            if state == SYMMETRIC and (neighbor, neighbor_port) < (device, port):
+                continue
+            if neighbor is None:
+                remote = neighbor_name
+            else:
+                remote = index[neighbor]
+            links.append([index[device], port, remote, neighbor_port, state])
+        f = open(name, 'w')
+        json.dump({'devices': self.devices, 'links': links}, f, separators=(',', ':'))
+        f.close()
+
+def load_topology (devices, root_dir):
+    """Read the outputs of show hostname and show lldp neighbors of all the devices
+
+    Returns
+    -------
+    LldpTopology
+        The LLDP neighbors of all the devices.
+    """
+    topology = LldpTopology(devices)
+    for device in devices:
+        commands = DeviceCommands(device, root_dir)
+        hostname = commands.json('show hostname')
+        topology.add_device(device, hostname.get('hostname'), hostname.get('fqdn'), commands.json('show lldp neighbors')['lldpNeighbors'])
+        commands.clear()
+    return topology
+
+@audit_check(commands=['show hostname', 'show lldp neighbors'])
+def fleet_lldp (devices, root_dir):
+    """Check that the two ends of each LLDP link agree.
+
+    The LLDP neighbors of all the devices are indexed by (device, port), the neighbors are matched to the devices with their hostname and fqdn.
+    The graph is saved in root_dir/lldp_topology.json.
+
+    Required EOS commands: show hostname | json, show lldp neighbors | json
+    Test failure conditions: A test fails if a port has more than one neighbor, if the remote port of a neighbor which is one of the devices has no LLDP neighbor (one-sided) or has another neighbor (asymmetric).
+
+    Parameters
+    ----------
+    devices : list
+        List of devices IP addresses or hostnames.
+    root_dir: str
+        Root directory for all the outputs.
+
+    Returns
+    -------
+    TopicResult
+        The tests result, for the device 'fleet'.
+    """
+    result = TopicResult('fleet', 'fleet_lldp', 'Fleet LLDP topology', 'include tests report about the LLDP links between the devices', 'show hostname | json, show lldp neighbors', 'A test fails if a port has more than one neighbor, if the remote port of a neighbor which is one of the devices has no LLDP neighbor (one-sided) or has another neighbor (asymmetric)')
+    topology = load_topology(devices, root_dir)
+    counts = {SYMMETRIC: 0, ASYMMETRIC: 0, ONE_SIDED: 0, DUPLICATE: 0, EXTERNAL: 0}
+    failures = []
+    for device, port, neighbor_name, neighbor_port, neighbor, state in topology.links():
+        counts[state] = counts[state] + 1
+        if state in (ASYMMETRIC, ONE_SIDED, DUPLICATE):
+            failures.append((device + ' ' + port, (('Device', device), ('Port', port), ('Neighbor', neighbor_name), ('Neighbor port', neighbor_port), ('Problem', state))))
+    section = result.section('Links: ', summary=ALL)
+    if failures:
+        status = FAIL
+    else:
+        status = PASS
+    # a symmetric link is seen from both ends
+    result.add(section, 'links', status, (('Links between devices', counts[SYMMETRIC]//2), ('Asymmetric', counts[ASYMMETRIC]), ('One-sided', counts[ONE_SIDED]), ('Duplicate', counts[DUPLICATE]), ('External neighbors', counts[EXTERNAL])))
+    for item, fields in failures:
+        result.add(section, item, FAIL, fields)
+    topology.export(root_dir + '/' + TOPOLOGY_NAME)
+    return result
@@ -0,0 +1,138 @@
+from audit.functions import DeviceCommands
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL, ALL
+
+COMMANDS = ['show mlag detail', 'show ip interface']
+
+class MlagPeer:
+    """MLAG state of a device, from show mlag detail"""
+    __slots__ = ('device', 'domain', 'system_id', 'peer_address', 'state', 'neg_status', 'config_sanity', 'mlag_state', 'peer_mlag_state')
+
+    def __init__ (self, device, data_json):
+        detail = data_json.get('detail', {})
+        self.device = device
+        self.domain = data_json.get('domainId')
+        self.system_id = data_json.get('systemId')
+        self.peer_address = data_json.get('peerAddress')
+        self.state = data_json['state']
+        self.neg_status = data_json.get('negStatus')
+        self.config_sanity = data_json.get('configSanity')
+        self.mlag_state = detail.get('mlagState')
+        self.peer_mlag_state = detail.get('peerMlagState')
+
+def interface_addresses (data_json):
+    """Return the primary and secondary addresses of the interfaces in the output of show ip interface"""
+    addresses = []
+    for details in data_json['interfaces'].values():
+        interface_address = details.get('interfaceAddress', {})
+        for ip in [interface_address.get('primaryIp')] + interface_address.get('secondaryIpsOrderedList', []):
+            if ip is not None and ip['maskLen'] != 0:
+                addresses.append(ip['address'])
+    return addresses
+
+def pair_problems (first, second):
+    """Return the inconsistencies between the two devices of an MLAG domain"""
+    problems = []
+    if first.peer_address == second.peer_address:
+        problems.append('same peer address ' + str(first.peer_address))
+    if first.system_id is not None and second.system_id is not None and first.system_id != second.system_id:
+        problems.append('system ID ' + first.system_id + ' and ' + second.system_id)
+    for label, attribute, expected in [('state', 'state', 'active'), ('negotiation status', 'neg_status', 'connected'), ('config sanity', 'config_sanity', 'consistent')]:
+        values = (getattr(first, attribute), getattr(second, attribute))
+        if values[0] != expected or values[1] != expected:
+            problems.append(label + ' ' + str(values[0]) + ' and ' + str(values[1]))
+    if first.mlag_state is not None and second.mlag_state is not None:
+        if first.mlag_state == second.mlag_state:
+            problems.append('both ' + str(first.mlag_state))
+        elif first.peer_mlag_state != second.mlag_state or second.peer_mlag_state != first.mlag_state:
+            problems.append('peer MLAG state ' + str(first.peer_mlag_state) + ' and ' + str(second.peer_mlag_state))
+    return problems
+
+@audit_check(commands=COMMANDS)
+def fleet_mlag (devices, root_dir):
+    """Check that the two devices of each MLAG domain agree.
+
+    The devices with MLAG configured are indexed by domain ID and by system ID, so each device is joined to its peer with one lookup.
+    The devices whose MLAG is disabled are not indexed.
+    The interface addresses of the devices with MLAG configured are indexed too: two orphans whose peer addresses are on each other are the two devices of a domain with different domain IDs.
+
+    Required EOS commands: show mlag detail | json, show ip interface | json
+    Test failure conditions: A test fails if a domain has only one audited device (orphan) or more than two, if the devices of a domain do not have the same system ID, point to the same peer address, are not both active, connected and consistent, or do not agree on their primary and secondary roles, or if devices with the same system ID or whose peer addresses are on each other have different domain IDs.
+
+    Parameters
+    ----------
+    devices : list
+        List of devices IP addresses or hostnames.
+    root_dir: str
+        Root directory for all the outputs.
+
+    Returns
+    -------
+    TopicResult
+        The tests result, for the device 'fleet'.
+    """
+    result = TopicResult('fleet', 'fleet_mlag', 'Fleet MLAG peers', 'include tests report about the consistency of the MLAG peers', ' | json, '.join(COMMANDS), 'A test fails if a domain has only one audited device (orphan) or more than two, if the devices of a domain do not have the same system ID, point to the same peer address, are not both active, connected and consistent, or do not agree on their primary and secondary roles, or if devices with the same system ID or whose peer addresses are on each other have different domain IDs')
+    domains = {}
+    systems = {}
+    # device with MLAG configured of each interface address, None if the address is on more than one device
+    owners = {}
+    disabled = 0
+    for device in devices:
+        commands = DeviceCommands(device, root_dir)
+        data_json = commands.json('show mlag detail')
+        if data_json['state'] == 'disabled':
+            commands.clear()
+            disabled = disabled + 1
+            continue
+        for address in interface_addresses(commands.json('show ip interface')):
+            if owners.setdefault(address, device) != device:
+                owners[address] = None
+        commands.clear()
+        peer = MlagPeer(device, data_json)
+        domains.setdefault(peer.domain, []).append(peer)
+        if peer.system_id is not None:
+            systems.setdefault(peer.system_id, {}).setdefault(peer.domain, []).append(peer.device)
+    records = []
+    pairs = 0
+    orphans = {}
+    for domain, peers in domains.items():
+        if len(peers) == 1:
+            peer = peers[0]
+            if len(systems.get(peer.system_id, ())) > 1:
+                # the peer is in another domain, reported with the system ID
+                continue
+            orphans[peer.device] = peer
+        elif len(peers) > 2:
+            records.append((domain, FAIL, (('Domain', domain), ('Devices', ', '.join(peer.device for peer in peers)), ('Problem', 'more than two devices'))))
+        else:
+            pairs = pairs + 1
+            problems = pair_problems(peers[0], peers[1])
+            if problems:
+                status = FAIL
+                fields = (('Problem', ', '.join(problems)),)
+            else:
+                status = PASS
+                fields = ()
+            records.append((domain, status, (('Domain', domain), ('Devices', peers[0].device + ', ' + peers[1].device)) + fields))
+    for device, peer in orphans.items():
+        remote = orphans.get(owners.get(peer.peer_address))
+        if remote is not None and owners.get(remote.peer_address) == device:
+            # the two orphans are the peers of each other, the pair is reported once
+            if device < remote.device:
+                problems = ['different domain IDs'] + pair_problems(peer, remote)
+                records.append((device + ', ' + remote.device, FAIL, (('Domains', str(peer.domain) + ' (' + device + '), ' + str(remote.domain) + ' (' + remote.device + ')'), ('Devices', device + ', ' + remote.device), ('Problem', ', '.join(problems)))))
+            continue
+        records.append((device, FAIL, (('Domain', peer.domain), ('Devices', device), ('Peer address', peer.peer_address), ('Problem', 'orphan, the peer is not audited or its MLAG is disabled'))))
+    for system_id, system_domains in systems.items():
+        if len(system_domains) > 1:
+            records.append((system_id, FAIL, (('System ID', system_id), ('Domains', ', '.join(str(domain) + ' (' + ', '.join(names) + ')' for domain, names in system_domains.items())), ('Problem', 'different domain IDs'))))
+    section = result.section('MLAG domains: ', summary=ALL)
+    failed = len([record for record in records if record[1] == FAIL])
+    if failed:
+        status = FAIL
+    else:
+        status = PASS
+    result.add(section, 'domains', status, (('Pairs', pairs), ('Domains', len(domains)), ('Failed', failed), ('MLAG disabled', disabled)))
+    for item, status, fields in records:
+        result.add(section, item, status, fields)
+    return result
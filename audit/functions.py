@@ -1,6 +1,17 @@
+import concurrent.futures
+import cProfile
 import datetime
+import math
 import os
-import json
+import time
+from audit import decoder
+from audit.archive import archive_fingerprint, archive_hashes, member_name, open_archive
+from audit.blobs import BLOBS_NAME, blob_name, open_manifest
+from audit.history import HISTORY_NAME, HistoryStore, result_rows
+from audit.incremental import DeviceAuditCache, code_fingerprint, file_fingerprint, load_manifest, save_manifest
+from audit.metrics import peak_rss, render_metrics_summary, run_peak_rss, save_metrics, start_measure, summarize, topic_metrics
+from audit.registry import get_check
+from audit.results import PASS, FAIL, render_device_header, render_fleet_header, render_topic, result_to_dict, result_from_dict
 
 def device_directories (device, root_dir):
     """Create directories for the device
@@ -34,28 +45,27 @@ def device_directories (device, root_dir):
     result = device_directory, eos_commands_directory, json_directory, text_directory, reports_directory, main_reports_directory, failures_only_reports_directory
     return result
 
-def str_to_function (audit_str_list):
-    """map a list of string into a list of functions 
+def write_file (name, text):
+    """Write a text in a file
 
     Parameters
     ----------
-    audit_str_list : list
-        list of string
-
-    Returns
-    -------
-    list
-        list of functions
+    name : str
+        File name.
+    text : str
+        Text to write.
     """
-    map = {'print_hostname': print_hostname, 'print_version': print_version, 'check_inventory': check_inventory, 'check_power': check_power, 'check_cooling': check_cooling, 'check_temperature': check_temperature, 'check_temperature_transceivers': check_temperature_transceivers, 'check_reload_cause_history': check_reload_cause_history, 'check_reload_cause_full': check_reload_cause_full, 'print_lldp': print_lldp, 'check_bgp': check_bgp, 'check_mlag': check_mlag} 
-    audit_func_list = []
-    for item in audit_str_list : 
-        audit_func_list.append(map[item])
-    return audit_func_list
+    f = open(name, 'w')
+    f.write(text)
+    f.close()
 
+class DeviceCommands:
+    """Outputs of the EOS commands collected from a device
 
-def init (device, root_dir):
-    """Generates files with the device IP address or hostname.
+    The outputs are read from the device archive (see audit.archive) if the device has one, from the blob store (see audit.blobs) if the device has a manifest, otherwise from the files of the eos_commands directory.
+    A JSON output is read and parsed the first time it is requested, then it is shared by all the audit functions run for the device.
+    The audit functions must not modify the parsed outputs. 
+    The number of bytes read and the time spent parsing JSON are counted in bytes_read and parse_time.
 
     Parameters
     ----------
@@ -63,859 +73,559 @@ def init (device, root_dir):
         Device IP address or hostname.
     root_dir: str
         Root directory for all the outputs.
-
-    Returns
-    -------
-    tuple
-        name of the two generated files. 
     """
-    directories = device_directories(device, root_dir)
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    main_report = open(main_reports_directory + '/init.txt', 'w') 
-    failures_only_report = open(failures_only_reports_directory + '/init.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write ('-'*13 + ' Report for device ' + device + ' ' + '-'*13 + "\n"*2)
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
+    def __init__ (self, device, root_dir):
+        self.device = device
+        self.root_dir = root_dir
+        directories = device_directories(device, root_dir)
+        self.device_directory = directories[0]
+        self.directories = {'json': directories[2], 'text': directories[3]}
+        self.blob_directory = os.path.dirname(self.device_directory) + '/' + BLOBS_NAME
+        self.archive = None
+        self.archive_opened = False
+        self.hashes = None
+        self.manifest = None
+        self.manifest_opened = False
+        self.parsed = {}
+        self.bytes_read = 0
+        self.parse_time = 0.0
+
+    def get_archive (self):
+        if not self.archive_opened:
+            self.archive = open_archive(self.device_directory)
+            self.archive_opened = True
+        return self.archive
+
+    def get_manifest (self):
+        if not self.manifest_opened:
+            self.manifest = open_manifest(self.device_directory)
+            self.manifest_opened = True
+        return self.manifest
+
+    def blob (self, command, format='json'):
+        """Return the hash and the size of an EOS command output in the blob store, or None if the output is not in the blob store"""
+        manifest = self.get_manifest()
+        if manifest is None:
+            return None
+        return manifest['outputs'].get(member_name(command, format))
+
+    def file_name (self, command, format='json'):
+        """Return the name of the file of an EOS command output in the eos_commands directory"""
+        return self.directories[format] + '/' + member_name(command, format).split('/', 1)[1]
+
+    def read (self, command, format='json'):
+        """Return the output of an EOS command
+
+        Parameters
+        ----------
+        command : str
+            EOS command.
+        format : str
+            json or text.
+
+        Returns
+        -------
+        str
+            The output of the command.
+        """
+        archive = self.get_archive()
+        if archive is not None:
+            try:
+                data = archive.read(member_name(command, format))
+            except KeyError:
+                pass
+            else:
+                self.bytes_read = self.bytes_read + len(data)
+                return data.decode()
+        blob = self.blob(command, format)
+        if blob is not None:
+            f = open(blob_name(self.blob_directory, blob[0]), 'r')
+        else:
+            f = open(self.file_name(command, format), 'r')
+        data = f.read()
+        self.bytes_read = self.bytes_read + os.fstat(f.fileno()).st_size
+        f.close()
+        return data
+
+    def open (self, command, format='json'):
+        """Return a binary file object to read the output of an EOS command
+
+        The file object is an archive member if the output is in the device archive, the blob file if the output is in the blob store, otherwise the file of the eos_commands directory.
+        """
+        archive = self.get_archive()
+        if archive is not None:
+            try:
+                return archive.open(member_name(command, format))
+            except KeyError:
+                pass
+        blob = self.blob(command, format)
+        if blob is not None:
+            return open(blob_name(self.blob_directory, blob[0]), 'rb')
+        return open(self.file_name(command, format), 'rb')
+
+    def json (self, command):
+        """Return the parsed JSON output of an EOS command"""
+        if command not in self.parsed:
+            data = self.read(command, 'json')
+            start = time.perf_counter()
+            self.parsed[command] = decoder.loads(data)
+            self.parse_time = self.parse_time + time.perf_counter() - start
+        return self.parsed[command]
+
+    def iter_items (self, command, path):
+        """Iterate over the items of the objects at a path of the JSON output of an EOS command
+
+        The output is parsed as a stream and is not kept, see audit.decoder.iter_items.
+        If the output was already parsed by json, the parsed output is used.
+        """
+        if command in self.parsed:
+            for item in decoder.walk_items(self.parsed[command], path):
+                yield item
+            return
+        f = self.open(command, 'json')
+        try:
+            start = time.perf_counter()
+            for item in decoder.iter_items(f, path):
+                self.parse_time = self.parse_time + time.perf_counter() - start
+                yield item
+                start = time.perf_counter()
+            self.parse_time = self.parse_time + time.perf_counter() - start
+            self.bytes_read = self.bytes_read + f.tell()
+        finally:
+            f.close()
+
+    def text (self, command):
+        """Return the text output of an EOS command"""
+        return self.read(command, 'text')
+
+    def fingerprint (self, command, previous=None):
+        """Return the fingerprint of the JSON output of an EOS command, see audit.incremental.file_fingerprint
+
+        The hash of an output in the blob store is read from the manifest, the hash of an output in the archive from its member sha256.json, the output is not read.
+        """
+        archive = self.get_archive()
+        if archive is not None:
+            if self.hashes is None:
+                self.hashes = archive_hashes(archive)
+            fingerprint = archive_fingerprint(archive, command, 'json', self.hashes)
+            if fingerprint is not None:
+                return fingerprint
+        blob = self.blob(command)
+        if blob is not None:
+            return [None, blob[1], blob[0]]
+        return file_fingerprint(self.file_name(command), previous)
+
+    def clear (self):
+        """Evict all the parsed outputs, close the archive and forget the manifest"""
+        self.parsed.clear()
+        if self.archive is not None:
+            self.archive.close()
+        self.archive = None
+        self.archive_opened = False
+        self.hashes = None
+        self.manifest = None
+        self.manifest_opened = False
 
-def print_hostname (device, root_dir):
-    """Generates files with the device hostname and fqdn.
+def str_to_function (audit_str_list):
+    """map a list of string into a list of functions 
 
-    Required EOS command: show hostname | json
+    Only the modules of the listed functions are imported, see audit.registry.
 
     Parameters
     ----------
-    device : str
-        Device IP address or hostname.
-    root_dir: str
-        Root directory for all the outputs.
+    audit_str_list : list
+        list of string
 
     Returns
     -------
-    tuple
-        name of the two generated files. 
+    list
+        list of functions
     """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show hostname"
-    main_report = open(main_reports_directory + '/print_hostname.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/print_hostname.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " Device hostname " + '*'*10 + "\n"*2)
-        item.write('Description: include the device hostname and fqdn\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: This is a report without any test so there is no failure/passing condition\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    hostname = data_json['hostname']
-    fqdn = data_json['fqdn']
-    for item in [main_report, failures_only_report]:
-        item.write('Hostname: ' + hostname + '\n')
-        item.write('FQDN: ' + fqdn + '\n')
-        item.write('\n')
-        item.close() 
-    result = main_report.name, failures_only_report.name
-    return result
-
-def print_version (device, root_dir):
-    """Generates files with some details regarding the device (HW model, SN, SW release, uptime).
+    audit_func_list = []
+    for item in audit_str_list : 
+        audit_func_list.append(get_check(item))
+    return audit_func_list
 
-    Required EOS command: show version | json
+def __getattr__ (name):
+    """Import the audit functions moved to audit.checks on first access, for the code importing them from audit.functions"""
+    try:
+        return get_check(name)
+    except KeyError:
+        raise AttributeError("module 'audit.functions' has no attribute '" + name + "'")
 
-    Parameters
-    ----------
-    device : str
-        Device IP address or hostname.
-    root_dir: str
-        Root directory for all the outputs.
+def temperature_sensor_status (sensor):
+    """Return the test result for a temperature sensor
 
-    Returns
-    -------
-    tuple
-        name of the two generated files. 
+    A test fails if the sensor HW status is not OK or if the sensor alert count is > 0 or if the sensor is currently in alert state.
     """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show version"
-    main_report = open(main_reports_directory + '/print_version.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/print_version.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " Device details " + '*'*10 + "\n"*2)
-        item.write('Description: include some details regarding the device (HW model, SN, SW release, uptime)\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: This is a report without any test so there is no failure/passing condition\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    modelName = data_json['modelName']
-    version = data_json['version']
-    uptime_seconds = data_json["uptime"]
-    uptime = str(datetime.timedelta(seconds = int(uptime_seconds))) 
-    serialNumber = data_json["serialNumber"]
-    for item in [main_report, failures_only_report]:
-        item.write('Model: ' + modelName + '\n')
-        item.write('Serial number: ' + serialNumber + '\n')
-        item.write('Version: ' + version + '\n')
-        item.write('Uptime: ' + uptime + '\n')
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
+    if sensor['hwStatus'] != 'ok' or sensor['alertCount'] != 0 or str(sensor['inAlertState']) != "False": 
+        return FAIL
+    return PASS
 
-def check_inventory (device, root_dir):
-    """Check the hardware inventory and generates files with the tests result.
+def temperature_sensor_fields (sensor):
+    """Return the fields reported for a temperature sensor, after its description"""
+    maxTemperatureLastChange = datetime.datetime.fromtimestamp(sensor['maxTemperatureLastChange']).strftime("%d %b %Y %H:%M:%S")
+    return (('HW status', sensor['hwStatus']), ('Alert count', sensor['alertCount']), ('In alert state', sensor['inAlertState']), ('Max temperature (C)', int(sensor['maxTemperature'])), ('Max temperature last change', maxTemperatureLastChange))
 
-    Required EOS command: show version | json
-    Test failure conditions: A transceiver test fails if its manufacturer is neither "Arista Networks" nor "Arastra, Inc". A power supply test fails if a power supply slot has no power supply unit inserted. 
+def temperature_sensor_values (sensor):
+    """Return the values of a temperature sensor saved in the history and not printed, see Record"""
+    if sensor.get('currentTemperature') is None:
+        return ()
+    return (('Temperature (C)', sensor['currentTemperature']),)
 
-    device : str
-        Device IP address or hostname.
-    root_dir: str
-        Root directory for all the outputs.
+# number of BGP peers whose up/down time is formatted at once
+BGP_BATCH_SIZE = 1024
 
-    Returns
-    -------
-    tuple
-        The name of the main report file and the name of the failures_only report file.  
-    """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show inventory"
-    main_report = open(main_reports_directory + '/check_inventory.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/check_inventory.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " Device inventory " + '*'*10 + "\n"*2)
-        item.write('Description: include tests report about the hardware inventory\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write('Test failure conditions: A test fails if the manufacturer of a transceiver is neither "Arista Networks" nor "Arastra, Inc", or if a power supply slot has no power supply unit inserted\n\n')
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    description = data_json['systemInformation']['description']
-    for item in [main_report, failures_only_report]:
-        item.write('Device description: ' + description + '\n')
-        item.write('\n')
-    for item in [main_report, failures_only_report]:
-        item.write('Power Supplies: \n')
-    at_least_one_test_in_the_loop_failed = False
-    for ps in data_json['powerSupplySlots']: 
-        slot = str(ps)
-        name = data_json['powerSupplySlots'][ps]['name']
-        serialNum = data_json['powerSupplySlots'][ps]['serialNum']
-        if name == 'Not Inserted': 
-            result = 'FAIL'
-            at_least_one_test_in_the_loop_failed = True
-        else:
-            result = 'PASS'
-        message = 'Slot: ' + slot + ' *** Model: ' + name + ' *** SN: ' + serialNum + ' *** Result: ' + result + '\n'
-        main_report.write(message)
-        if result == 'FAIL':
-            failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.write('Fan modules: \n')
-    for fan_module in data_json['fanTraySlots']: 
-        slot = str(fan_module)
-        name = data_json['fanTraySlots'][fan_module]['name']
-        main_report.write('Module: ' + slot + ' *** Model: ' + name + '\n')
-    failures_only_report.write("The script doesnt run tests about the Fans modules ...\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.write('Transceivers: \n')
-    at_least_one_test_in_the_loop_failed = False
-    for transceiver in sorted(data_json["xcvrSlots"]):
-        transceiver = str(transceiver)
-        mfgName = data_json['xcvrSlots'][transceiver]['mfgName']
-        serialNum = data_json['xcvrSlots'][transceiver]['serialNum']
-        modelName = data_json['xcvrSlots'][transceiver]['modelName']
-        if (mfgName == 'Arista Networks') or (mfgName == 'Arastra, Inc'):
-            result = 'PASS'
-        elif mfgName == 'Not Present': 
-            result = 'PASS'
-        else:
-            result = 'FAIL'
-            at_least_one_test_in_the_loop_failed = True
-        if mfgName != "Not Present": 
-            message = "Port: " + transceiver + ' *** Manufacturer: ' + mfgName + ' *** Model: ' + modelName + ' *** SN: ' + serialNum + ' *** Result: ' + result + "\n"
-            main_report.write(message)
-            if result == 'FAIL':
-                failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
-
-def check_power (device, root_dir):
-    """Check the power status and generates files with the tests result.
+def format_timestamps (timestamps):
+    """Format timestamps as "%d %b %Y %H:%M:%S" in local time
 
-    Required EOS command: show system environment power | json
-    Test failure conditions: A test fails if the status of a power supply is not ok. 
+    The date part is formatted once per day, the time part is computed from time.localtime.
+    The timestamps are rounded to the microsecond like datetime.datetime.fromtimestamp.
 
     Parameters
     ----------
-    device : str
-        Device IP address or hostname.
-    root_dir: str
-        Root directory for all the outputs.
+    timestamps : list
+        Timestamps in seconds since the epoch.
 
     Returns
     -------
-    tuple
-        The name of the main report file and the name of the failures_only report file.  
+    list
+        The formatted timestamps.
     """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show system environment power"
-    main_report = open(main_reports_directory + '/check_power.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/check_power.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " Power supplies status " + '*'*10 + "\n"*2)
-        item.write('Description: include tests report about the power status\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: A test fails if the status of a power supply is not ok\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    at_least_one_test_in_the_loop_failed = False
-    for powersupply in data_json['powerSupplies']:
-        state = data_json['powerSupplies'][powersupply]['state']
-        if state == 'ok': 
-            result = 'PASS'
-        else:
-            result = 'FAIL'
-            at_least_one_test_in_the_loop_failed = True
-        message = "Power supply: " + powersupply + ' *** Status: ' + state + ' *** Result: ' + result + "\n"
-        main_report.write(message)
-        if result == 'FAIL':
-            failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
+    dates = {}
+    result = []
+    localtime = time.localtime
+    for timestamp in timestamps:
+        seconds = math.floor(timestamp)
+        if timestamp - seconds >= 0.9999995 and round((timestamp - seconds)*1e6) >= 1000000:
+            seconds = seconds + 1
+        local = localtime(seconds)
+        date = dates.get(local[:3])
+        if date is None:
+            date = dates[local[:3]] = time.strftime("%d %b %Y ", local)
+        result.append('%s%02d:%02d:%02d' % (date, local[3], local[4], local[5]))
     return result
 
-def check_cooling (device, root_dir):
-    """Check the cooling status and generates files with the tests result.
-
-    Required EOS command: show system environment cooling | json
-    Test failure conditions: A test fails if the status of a fan is not ok.
+def iter_bgp_peers (commands, command):
+    """Iterate over the peers of all vrf of the output of show ip bgp summary vrf all
 
-    Parameters
-    ----------
-    device : str
-        Device IP address or hostname.
-    root_dir: str
-        Root directory for all the outputs.
+    The peers are read one by one from the output (see DeviceCommands.iter_items) and their up/down times are formatted by batches of BGP_BATCH_SIZE peers.
 
-    Returns
-    -------
+    Yields
+    ------
     tuple
-        The name of the main report file and the name of the failures_only report file. 
+        vrf, peer, ASN, state, formatted up/down time and up/down time in seconds since the epoch of each peer.
+        Each vrf is first yielded with None for the other values, before its peers.
     """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show system environment cooling"
-    main_report = open(main_reports_directory + '/check_cooling.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/check_cooling.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " Cooling status " + '*'*10 + "\n"*2)
-        item.write('Description: include tests report about the cooling status\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: A test fails if the status of a fan is not ok\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    for item in [main_report, failures_only_report]:
-        item.write('Power supplies: \n')
-    at_least_one_test_in_the_loop_failed = False
-    for ps in data_json['powerSupplySlots']:
-        for fan in ps['fans']: 
-            status = fan['status'] 
-            label = fan['label']
-            if status == 'ok': 
-                result = 'PASS'
-            else:
-                result = 'FAIL'
-                at_least_one_test_in_the_loop_failed = True
-            message = "Fan: " + label + ' *** Status: ' + status + ' *** Result: ' + result + "\n"
-            main_report.write(message)
-            if result == 'FAIL':
-                failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\nFan modules: \n')
-    at_least_one_test_in_the_loop_failed = False
-    for fantrayslot in data_json['fanTraySlots']:
-        for fan in fantrayslot['fans']: 
-            status = fan['status'] 
-            label = fan['label']
-            if status == 'ok': 
-                result = 'PASS'
-            else:
-                result = 'FAIL'
-                at_least_one_test_in_the_loop_failed = True
-            message = "Fan: " + label + ' *** Status: ' + status + ' *** Result: ' + result + "\n"
-            main_report.write(message)
-            if result == 'FAIL':
-                failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
-
-def check_temperature (device, root_dir):
-    """Check the temperature status and generates files with the tests result.
-
-    Required EOS command: show system environment temperature | json
-    Test failure conditions: A sensor test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state. The system temperature test fails if the system status is not OK.
+    batch = []
+    for (vrf,), peer, details in commands.iter_items(command, ('vrfs', '*', 'peers')):
+        if peer is not None:
+            batch.append((vrf, peer, details['asn'], details['peerState'], details['upDownTime']))
+            if len(batch) < BGP_BATCH_SIZE:
+                continue
+        for peer_details, upDownTime in zip(batch, format_timestamps([item[4] for item in batch])):
+            yield peer_details[:4] + (upDownTime, peer_details[4])
+        batch = []
+        if peer is None:
+            yield vrf, None, None, None, None, None
+    for peer_details, upDownTime in zip(batch, format_timestamps([item[4] for item in batch])):
+        yield peer_details[:4] + (upDownTime, peer_details[4])
+
+def audit_device(dev, topic, root_dir, device_reports=True, topic_reports=True, cache=None, metrics=None): 
+    """Run the audit functions for a device and render its reports
+
+    Each function is run only once and both reports are rendered from the results it returned.
 
     Parameters
     ----------
-    device : str
+    dev : str
         Device IP address or hostname.
+    topic : list
+        The list of functions to use to generate the device report 
     root_dir: str
         Root directory for all the outputs.
+    device_reports : bool
+        Write the device reports main.txt and failures_only.txt in root_dir/device/reports.
+    topic_reports : bool
+        Write the report of each topic in root_dir/device/reports/main and root_dir/device/reports/failures_only.
+    cache : DeviceAuditCache
+        Results of the previous runs. A function is not run again if the outputs of the EOS commands it requires (see audit.registry.audit_check) did not change. 
+    metrics : dict
+        Filled with the metrics of each function (see audit.metrics.topic_metrics) and of the device if not None.
 
     Returns
     -------
     tuple
-        The name of the main report file and the name of the failures_only report file. 
+        The list of TopicResult returned by the functions, the text of the main report and the text of the failures_only report.
     """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
+    device_start = time.perf_counter()
+    directories = device_directories(dev, root_dir)
+    reports_directory = directories[4]
     main_reports_directory = directories[5]
     failures_only_reports_directory = directories[6]
-    command = "show system environment temperature"
-    main_report = open(main_reports_directory + '/check_temperature.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/check_temperature.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " Temperature status " + '*'*10 + "\n"*2)
-        item.write('Description: include tests report about the temperature status\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: A test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state. The system temperature test fails if the system status is not OK\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    systemStatus = json.loads(data)['systemStatus']
-    if systemStatus != 'temperatureOk': 
-        result = 'FAIL'
+    if cache is not None:
+        commands = cache.commands
     else:
-        result = 'PASS'
-        systemStatus = 'ok'
-    for item in [main_report, failures_only_report]:
-        item.write("System temperature: \n") 
-    message = "Status: " + systemStatus + ' *** Result: ' + result + '\n'
-    main_report.write(message)
-    if result == 'FAIL': 
-        failures_only_report.write(message)
-    if result == 'PASS': 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write("\nSensors: \n" ) 
-    at_least_one_test_in_the_loop_failed = False
-    for sensor in data_json["tempSensors"]:
-        hwStatus = sensor['hwStatus']
-        alertCount = sensor['alertCount']
-        description = sensor['description']
-        name = sensor['name']
-        maxTemperature = sensor['maxTemperature']
-        inAlertState = sensor['inAlertState']
-        maxTemperatureLastChange_epoch = sensor['maxTemperatureLastChange']
-        maxTemperatureLastChange = datetime.datetime.fromtimestamp(maxTemperatureLastChange_epoch).strftime("%d %b %Y %H:%M:%S")
-        if hwStatus != 'ok' or alertCount!= 0 or str(inAlertState) != "False": 
-            result = 'FAIL'
-            at_least_one_test_in_the_loop_failed = True
+        commands = DeviceCommands(dev, root_dir)
+    results = []
+    header = render_device_header(dev)
+    main = [header]
+    failures_only = [header]
+    topic_files = [('init', header, header)]
+    topic_metrics_list = {}
+    for item in topic:
+        start = start_measure(commands)
+        cached = None
+        required = getattr(item, 'commands', None)
+        if cache is not None and required is not None:
+            code = code_fingerprint(item)
+            cached = cache.lookup(item.__name__, required, code)
+        if cached is not None:
+            result = result_from_dict(cached['result'])
+            text = cached['main'], cached['failures_only']
         else:
-            result = 'PASS'
-        message = "Sensor: " + name + ' *** Description: ' + description + ' *** HW status: ' + hwStatus + ' *** Alert count: ' + str(alertCount) + ' *** In alert state: ' + str(inAlertState) + ' *** Max temperature (C): ' + str(int(maxTemperature)) + ' *** Max temperature last change: ' + maxTemperatureLastChange + ' *** Result: ' + result + "\n"
-        main_report.write(message)
-        if result == 'FAIL':
-            failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write("\nCard Slot: \n" ) 
-    at_least_one_test_in_the_loop_failed = False
-    for card in data_json["cardSlots"]: 
-        entPhysicalClass = card['entPhysicalClass']
-        relPos = card['relPos']
-        for sensor in card["tempSensors"]: 
-            hwStatus = sensor['hwStatus']
-            alertCount = sensor['alertCount']
-            description = sensor['description']
-            name = sensor['name']
-            maxTemperature = sensor['maxTemperature']
-            inAlertState = sensor['inAlertState']
-            maxTemperatureLastChange_epoch = sensor['maxTemperatureLastChange']
-            maxTemperatureLastChange = datetime.datetime.fromtimestamp(maxTemperatureLastChange_epoch).strftime("%d %b %Y %H:%M:%S")
-            if hwStatus != 'ok' or alertCount!= 0 or str(inAlertState) != "False": 
-                result = 'FAIL'
-                at_least_one_test_in_the_loop_failed = True
-            else:
-                result = 'PASS'
-            message = "Sensor: " + name + ' *** Description: ' + description + ' *** Card type: ' + entPhysicalClass + ' *** Card position: ' + relPos + ' *** HW status: ' + hwStatus + ' *** Alert count: ' + str(alertCount) + ' *** In alert state: ' + str(inAlertState) + ' *** Max temperature (C): ' + str(int(maxTemperature)) + ' *** Max temperature last change: ' + maxTemperatureLastChange + ' *** Result: ' + result + "\n"
-            main_report.write(message)
-            if result == 'FAIL':
-                failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.write("Power Supplies: \n" ) 
-    at_least_one_test_in_the_loop_failed = False
-    for item in data_json["powerSupplySlots"]: 
-        for sensor in item["tempSensors"]: 
-            hwStatus = sensor['hwStatus']
-            alertCount = sensor['alertCount']
-            description = sensor['description']
-            name = sensor['name']
-            maxTemperature = sensor['maxTemperature']
-            inAlertState = sensor['inAlertState']
-            maxTemperatureLastChange_epoch = sensor['maxTemperatureLastChange']
-            maxTemperatureLastChange = datetime.datetime.fromtimestamp(maxTemperatureLastChange_epoch).strftime("%d %b %Y %H:%M:%S")
-            if hwStatus != 'ok' or alertCount!= 0 or str(inAlertState) != "False": 
-                result = 'FAIL'
-                at_least_one_test_in_the_loop_failed = True
-            else:
-                result = 'PASS'
-            message = "Sensor: " + name + ' *** Description: ' + description + ' *** HW status: ' + hwStatus + ' *** Alert count: ' + str(alertCount) + ' *** In alert state: ' + str(inAlertState) + ' *** Max temperature (C): ' + str(int(maxTemperature)) + ' *** Max temperature last change: ' + maxTemperatureLastChange + ' *** Result: ' + result + "\n"
-            main_report.write(message)
-            if result == 'FAIL':
-                failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
-
-def check_temperature_transceivers (device, root_dir):
-    """Check the transceivers temperature status and generates files with the tests result.
-
-    Required EOS command: show system environment temperature transceiver | json
-    Test failure conditions: A test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state.
+            result = item(dev, root_dir, commands)
+            text = render_topic(result)
+            if cache is not None and required is not None:
+                cache.store(item.__name__, required, code, result_to_dict(result), text[0], text[1])
+        if metrics is not None:
+            topic_metrics_list[item.__name__] = topic_metrics(commands, start, cached is not None)
+        results.append(result)
+        main.append(text[0])
+        failures_only.append(text[1])
+        topic_files.append((result.topic, text[0], text[1]))
+    commands.clear()
+    if cache is not None:
+        cache.save()
+    if topic_reports:
+        for name, main_text, failures_only_text in topic_files:
+            write_file(main_reports_directory + '/' + name + '.txt', main_text)
+            write_file(failures_only_reports_directory + '/' + name + '.txt', failures_only_text)
+    main = ''.join(main)
+    failures_only = ''.join(failures_only)
+    if device_reports:
+        write_file(reports_directory + "/main.txt", main)
+        write_file(reports_directory + "/failures_only.txt", failures_only)
+    if metrics is not None:
+        metrics['topics'] = topic_metrics_list
+        metrics['wall_time'] = time.perf_counter() - device_start
+        metrics['bytes_read'] = commands.bytes_read
+        metrics['parse_time'] = commands.parse_time
+        metrics['peak_rss'] = peak_rss()
+    return results, main, failures_only
+
+def generate_reports(dev, topic, root_dir): 
+    """Generate the main report and the failures_only report for a device
+
+    The device reports and the report of each topic are written in root_dir/device/reports.
 
     Parameters
     ----------
-    device : str
+    dev : str
         Device IP address or hostname.
+    topic : list
+        The list of functions to use to generate the device report 
     root_dir: str
         Root directory for all the outputs.
-    
-    Returns
-    -------
-    tuple
-        The name of the main report file and the name of the failures_only report file. 
-    """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show system environment temperature transceiver"
-    main_report = open(main_reports_directory + '/check_temperature_transceivers.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/check_temperature_transceivers.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " transceivers temperature status " + '*'*10 + "\n"*2)
-        item.write('Description: include tests report about the transceivers temperature status\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: A test fails if a sensor HW status is not OK or if a sensor alert count is > 0 or if a sensor is currently in alert state\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    at_least_one_test_in_the_loop_failed = False
-    for sensor in data_json["tempSensors"]:
-        hwStatus = sensor['hwStatus']
-        alertCount = sensor['alertCount']
-        description = sensor['description']
-        maxTemperature = sensor['maxTemperature']
-        inAlertState = sensor['inAlertState']
-        maxTemperatureLastChange_epoch = sensor['maxTemperatureLastChange']
-        maxTemperatureLastChange = datetime.datetime.fromtimestamp(maxTemperatureLastChange_epoch).strftime("%d %b %Y %H:%M:%S")
-        if hwStatus != 'ok' or alertCount!= 0 or str(inAlertState) != "False": 
-            result = 'FAIL'
-            at_least_one_test_in_the_loop_failed = True
-        else:
-            result = 'PASS'
-        message = 'Description: ' + description + ' *** HW status: ' + hwStatus + ' *** Alert count: ' + str(alertCount) + ' *** In alert state: ' + str(inAlertState) + ' *** Max temperature (C): ' + str(int(maxTemperature)) + ' *** Max temperature last change: ' + maxTemperatureLastChange + ' *** Result: ' + result + "\n"
-        main_report.write(message)
-        if result == 'FAIL':
-            failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    at_least_one_test_in_the_loop_failed = False
-    for card in data_json["cardSlots"]: 
-        if card['entPhysicalClass'] == "Linecard":
-            for sensor in card["tempSensors"]: 
-                hwStatus = sensor['hwStatus']
-                alertCount = sensor['alertCount']
-                description = sensor['description']
-                maxTemperature = sensor['maxTemperature']
-                inAlertState = sensor['inAlertState']
-                maxTemperatureLastChange_epoch = sensor['maxTemperatureLastChange']
-                maxTemperatureLastChange = datetime.datetime.fromtimestamp(maxTemperatureLastChange_epoch).strftime("%d %b %Y %H:%M:%S")
-                if hwStatus != 'ok' or alertCount!= 0 or str(inAlertState) != "False": 
-                    result = 'FAIL'
-                    at_least_one_test_in_the_loop_failed = True
-                else:
-                    result = 'PASS'
-                message = 'Description: ' + description + ' *** HW status: ' + hwStatus + ' *** Alert count: ' + str(alertCount) + ' *** In alert state: ' + str(inAlertState) + ' *** Max temperature (C): ' + str(int(maxTemperature)) + ' *** Max temperature last change: ' + maxTemperatureLastChange + ' *** Result: ' + result + "\n"
-                main_report.write(message)
-                if result == 'FAIL':
-                    failures_only_report.write(message)
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
-
-def check_reload_cause_history (device, root_dir):
-    """Check the cause for the last 10 reload and generates files with the tests result.
 
-    Required EOS command: show reload cause history | json
-    Test failure conditions: A test fails if a device reload was not requested by user.
-
-    Parameters
-    ----------
-    device : str
-        Device IP address or hostname.
-    root_dir: str
-        Root directory for all the outputs.
-    
     Returns
     -------
-    tuple
-        The name of the main report file and the name of the failures_only report file. 
+    list
+        The TopicResult returned by each function.
     """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show reload cause history"
-    main_report = open(main_reports_directory + '/check_reload_cause_history.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/check_reload_cause_history.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " Reload cause history " + '*'*10 + "\n"*2)
-        item.write('Description: include tests report about the cause for the last 10 reload\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: A test fails if the device reload was not requested by user\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    at_least_one_test_in_the_loop_failed = False
-    for reboot_id in range(0,10):
-        reboot_id = str(reboot_id)
-        if reboot_id in data_json["resetHistory"]:
-            for reboot in data_json["resetHistory"][reboot_id]:
-                description = data_json["resetHistory"][reboot_id][reboot][0]['description']
-                timestamp_epoch = data_json["resetHistory"][reboot_id][reboot][0]['timestamp']
-                timestamp = datetime.datetime.fromtimestamp(timestamp_epoch).strftime("%d %b %Y %H:%M:%S")
-                if description != "Reload requested by the user.": 
-                    result = "FAIL"
-                    at_least_one_test_in_the_loop_failed = True
-                else:
-                    result = "PASS" 
-                message = "Time: " + timestamp  + " *** Reason: " + description + " *** Result: " + result + '\n'
-                main_report.write(message)
-                if result == 'FAIL':
-                    failures_only_report.write(message) 
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
+    return audit_device(dev, topic, root_dir)[0]
 
-def check_reload_cause_full (device, root_dir):
-    """Check the cause for the most recent reload and generates files with the tests result.
+def generate_device_reports(dev, topic, root_dir, device_reports=True, topic_reports=False, fingerprints=None, metrics=False, profile=False, history=False): 
+    """Render the reports for a device without returning the results
 
-    Required EOS command: show reload cause full | json
-    Test failure conditions: The test fails if the device reload was not requested by user.
+    Used by generate_network_reports, so only the texts are sent back by the worker processes.
 
     Parameters
     ----------
-    device : str
+    dev : str
         Device IP address or hostname.
+    topic : list
+        The list of functions to use to generate the device report 
     root_dir: str
         Root directory for all the outputs.
-    
-    Returns
-    -------
-    tuple
-        The name of the main report file and the name of the failures_only report file. 
-    """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show reload cause full"
-    main_report = open(main_reports_directory + '/check_reload_cause_full.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/check_reload_cause_full.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " Reload cause full " + '*'*10 + "\n"*2)
-        item.write('Description: include tests report about the cause of the most recent reload\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: The test fails if the device reload was not requested by user\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    at_least_one_test_in_the_loop_failed = False
-    for item in data_json["resetCauses"]: 
-        description = item['description']
-        timestamp_epoch = item['timestamp']
-        timestamp = datetime.datetime.fromtimestamp(timestamp_epoch).strftime("%d %b %Y %H:%M:%S")
-        if description != "Reload requested by the user.": 
-            result = "FAIL"
-            at_least_one_test_in_the_loop_failed = True
-        else:
-            result = "PASS" 
-        message = "Time: " + timestamp  + " *** Reason: " + description + " *** Result: " + result + '\n'
-        main_report.write(message) 
-        if result == 'FAIL':
-            failures_only_report.write(message)
-    if at_least_one_test_in_the_loop_failed == True: 
-        failures_only_report.write("The other tests succesfully passed\n")
-    if at_least_one_test_in_the_loop_failed == False: 
-        failures_only_report.write("All tests successfully passed\n")
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
+    device_reports : bool
+        Write the device reports in root_dir/device/reports.
+    topic_reports : bool
+        Write the report of each topic in root_dir/device/reports/main and root_dir/device/reports/failures_only.
+    fingerprints : dict
+        Fingerprints of the device JSON outputs in the previous run, to reuse the results of the functions whose EOS commands outputs did not change. None to run all the functions.
+    metrics : bool
+        Return the metrics of the device audit.
+    profile : bool
+        Save the cProfile stats of the device audit in root_dir/device/reports/audit.prof.
+    history : bool
+        Return the rows of the results for the history (see audit.history.result_rows).
 
-def print_lldp (device, root_dir):
-    """Generates files with the LLDP topology.
-
-    Required EOS command: show lldp neighbors | json
-
-    Parameters
-    ----------
-    device : str
-        Device IP address or hostname.
-    root_dir: str
-        Root directory for all the outputs.
-    
     Returns
     -------
     tuple
-        name of the two generated files. 
+        The text of the main report, the text of the failures_only report, the fingerprints of the device JSON outputs (None if fingerprints is None), the metrics of the device (None if metrics is False) and the history rows of the device (None if history is False).
     """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show lldp neighbors"
-    main_report = open(main_reports_directory + '/print_lldp.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/print_lldp.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " LLDP topology " + '*'*10 + "\n"*2)
-        item.write('Description: include the lldp topology\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: This is a report without any test so there is no failure/passing condition\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    for item in data_json['lldpNeighbors']:  
-        neighborDevice = item['neighborDevice']
-        neighborPort = item['neighborPort']
-        port = item['port']
-        for f in [main_report, failures_only_report]:
-            f.write("Interface: " + port + ' *** LLDP neighbor: ' + neighborDevice + " *** LLDP remote port: " + neighborPort + "\n")
-    for f in [main_report, failures_only_report]:
-        f.write('\n')
-        f.close()
-    result = main_report.name, failures_only_report.name
-    return result
-
-def check_bgp (device, root_dir):
-    """Check BGP status for all configured vrf and generates files with the tests result.
-
-    Required EOS command: show ip bgp summary vrf all | json
-    Test failure conditions: A test fails if a BGP session is not established.
+    directories = device_directories(dev, root_dir)
+    cache = None
+    if fingerprints is not None:
+        cache = DeviceAuditCache(DeviceCommands(dev, root_dir), directories[4], fingerprints)
+    device_metrics = None
+    if metrics:
+        device_metrics = {}
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        result = audit_device(dev, topic, root_dir, device_reports, topic_reports, cache, device_metrics)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(directories[4] + '/audit.prof')
+    rows = None
+    if history:
+        rows = ([], [])
+        for item in result[0]:
+            records, values = result_rows(item)
+            rows[0].extend(records)
+            rows[1].extend(values)
+    if cache is None:
+        return result[1], result[2], None, device_metrics, rows
+    return result[1], result[2], cache.fingerprints, device_metrics, rows
+
+def render_network_header(devices, topic, failures_only=False, now=None): 
+    """Return the header of the report for all devices
 
     Parameters
     ----------
-    device : str
-        Device IP address or hostname.
-    root_dir: str
-        Root directory for all the outputs.
-
-    Returns
-    -------
-    tuple
-        The name of the main report file and the name of the failures_only report file. 
+    devices : list
+        List of devices IP addresses or hostnames. 
+    topic : list
+        The list of functions used to generate the device reports 
+    failures_only : bool
+        Header of the failures_only report instead of the main report.
+    now : datetime.datetime
+        Date of the report. Defaults to the current date.
     """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show ip bgp summary vrf all"
-    main_report = open(main_reports_directory + '/check_bgp.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/check_bgp.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " BGP sessions state " + '*'*10 + "\n"*2)
-        item.write('Description: include tests report about the bgp status for all configured vrf\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: A test fails if a BGP session is not established\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    for vrf in data_json['vrfs']: 
-        vrf = vrf
-        for item in [main_report, failures_only_report]:
-            item.write("vrf: " + vrf + "\n") 
-        at_least_one_test_in_the_loop_failed = False
-        for peer in data_json['vrfs'][vrf]['peers']: 
-            peer = peer
-            asn = data_json['vrfs'][vrf]['peers'][peer]['asn']
-            peerState = data_json['vrfs'][vrf]['peers'][peer]['peerState']
-            upDownTime = datetime.datetime.fromtimestamp(data_json['vrfs'][vrf]['peers'][peer]['upDownTime']).strftime("%d %b %Y %H:%M:%S")
-            if peerState != 'Established': 
-                result = 'FAIL'
-                at_least_one_test_in_the_loop_failed = True
-            else:
-                result = 'PASS'
-            message = "Peer: " + peer + " *** ASN: " + asn + " *** State: " + peerState + " *** Up/Down: " + upDownTime + " *** Result: " + result + "\n"
-            main_report.write(message)
-            if result == 'FAIL':
-                failures_only_report.write(message)
-        if at_least_one_test_in_the_loop_failed == True: 
-            failures_only_report.write("The other tests succesfully passed\n")
-        if at_least_one_test_in_the_loop_failed == False: 
-            failures_only_report.write("All tests successfully passed\n")
-        for item in [main_report, failures_only_report]:
-            item.write('\n')
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
+    if now is None:
+        now = datetime.datetime.now()
+    audit_str_list = []
+    for item in topic: 
+        audit_str_list.append(item.__name__)
+    header = 'Report generated using Python the ' + str(now.strftime("%d %b %Y at %H:%M:%S")) + "\n"*2
+    header = header + 'The list of devices audited is: ' + str(devices) + '\n'
+    header = header + 'The list of topics audited is: ' + str(audit_str_list) + '\n'*2
+    if failures_only:
+        header = header + 'The file failures_only.txt shows only the tests that failed.\n'
+        header = header + "The file main.txt shows the details for all the tests." + "\n"*2
+    else:
+        header = header + 'The file main.txt shows the details for all the tests.\n'
+        header = header + "The file failures_only.txt shows only the tests that failed." + "\n"*2
+    return header
 
-def check_mlag (device, root_dir):
-    """Check MLAG state and generates files with the tests result.
+def generate_network_reports(devices, topic, root_dir, jobs=1, device_reports=True, topic_reports=False, incremental=False, metrics=False, metrics_summary=False, profile=False, fleet=None, history=False): 
+    """Audit all devices and write the main report and the failures_only report for all devices
 
-    Required EOS command: show mlag detail | json
-    Test failure conditions: The test fails if the MLAG state is active and the negotiation status is not connected.
+    The section of each device is written in root_dir/main.txt and root_dir/failures_only.txt as soon as the device is audited, in the devices order.
+    The reports for all devices are never held in memory and are not assembled from the device reports.
+    With jobs > 1 the devices are audited by a pool of processes. The reports are the same as with a serial run.
 
     Parameters
     ----------
-    device : str
-        Device IP address or hostname.
+    devices : list
+        List of devices IP addresses or hostnames. 
+    topic : list
+        The list of functions to use to generate the device report 
     root_dir: str
         Root directory for all the outputs.
-
-    Returns
-    -------
-    tuple
-        The name of the main report file and the name of the failures_only report file. 
+    jobs : int
+        Number of processes to use.
+    device_reports : bool
+        Also write the reports of each device in root_dir/device/reports.
+    topic_reports : bool
+        Also write the report of each topic in root_dir/device/reports/main and root_dir/device/reports/failures_only.
+    incremental : bool
+        Reuse the results of the previous run for the functions whose EOS commands outputs and code (see audit.incremental.code_fingerprint) did not change.
+        The content hash and the modification time of the outputs are saved in root_dir/audit_manifest.json.
+    metrics : bool
+        Save the wall time, the bytes read and the JSON parse time of each function for each device, the peak RSS of the process which audited each device and the peak RSS of the run in root_dir/audit_metrics.json.
+    metrics_summary : bool
+        Also append the metrics of each function for all devices at the end of root_dir/main.txt.
+    profile : bool
+        Save the cProfile stats of each device audit in root_dir/device/reports/audit.prof.
+    fleet : list
+        The list of fleet functions (see audit.fleet) to audit all the devices at once, their reports are written after the devices sections.
+    history : bool
+        Append the results of the run to the history of the audit results in root_dir/audit_history.sqlite (see audit.history).
     """
-    directories = device_directories(device, root_dir)
-    json_directory = directories[2]
-    main_reports_directory = directories[5]
-    failures_only_reports_directory = directories[6]
-    command = "show mlag detail"
-    main_report = open(main_reports_directory + '/check_mlag.txt', 'w')
-    failures_only_report = open(failures_only_reports_directory + '/check_mlag.txt', 'w') 
-    for item in [main_report, failures_only_report]:
-        item.write('*'*10 + " MLAG state " + '*'*10 + "\n"*2)
-        item.write('Description: include tests report about the mlag status\n')
-        item.write("Required EOS command: " + command + ' | json\n')
-        item.write("Test failure conditions: The test fails if the MLAG state is active and the negotiation status is not connected\n\n")
-    f = open(json_directory + '/' + command + '.json', 'r') 
-    data = f.read()
-    f.close()
-    data_json = json.loads(data) 
-    state = data_json["state"] 
-    if state == "active": 
-        negStatus = data_json["negStatus"]
-        configSanity = data_json["configSanity"]
-        peerAddress = data_json["peerAddress"] 
-        if negStatus != 'connected': 
-            result = 'FAIL'
-        elif negStatus == 'connected':
-            result = 'PASS' 
-        if result == 'FAIL':
-            for item in [main_report, failures_only_report]:    
-                item.write("Peer: " + peerAddress + "\n")
-                item.write("State: " + state + "\n")
-                item.write("Negotiation Status: " + negStatus + "\n")
-                item.write("Config Sanity: " + configSanity + "\n")
-                item.write("\nTest result: " + result + "\n")  
-        elif result == 'PASS': 
-            main_report.write("Peer: " + peerAddress + "\n")
-            main_report.write("State: " + state + "\n")
-            main_report.write("Negotiation Status: " + negStatus + "\n")
-            main_report.write("Config Sanity: " + configSanity + "\n")
-            main_report.write("\nTest result: " + result + "\n")  
-            failures_only_report.write("All tests successfully passed\n")
-    elif state == "disabled": 
-        for item in [main_report, failures_only_report]:
-            item.write("MLAG is " + state +  "\n")  
-    for item in [main_report, failures_only_report]:
-        item.write('\n')
-        item.close()
-    result = main_report.name, failures_only_report.name
-    return result
+    now = datetime.datetime.now()
+    start = time.perf_counter()
+    metrics = metrics or metrics_summary
+    devices_metrics = {}
+    manifest = None
+    fingerprints = [None]*len(devices)
+    if incremental:
+        manifest = load_manifest(root_dir)
+        fingerprints = [manifest['devices'].get(dev, {}) for dev in devices]
+    network_report = open(root_dir + "/main.txt", "w")
+    network_report_failures_only = open(root_dir + "/failures_only.txt", "w")
+    network_report.write(render_network_header(devices, topic, False, now))
+    network_report_failures_only.write(render_network_header(devices, topic, True, now))
+    store = None
+    if history:
+        store = HistoryStore(root_dir + '/' + HISTORY_NAME)
+        run = store.add_run(now.timestamp(), devices, [item.__name__ for item in topic + (fleet or [])])
+    arguments = [devices, [topic]*len(devices), [root_dir]*len(devices), [device_reports]*len(devices), [topic_reports]*len(devices), fingerprints, [metrics]*len(devices), [profile]*len(devices), [history]*len(devices)]
+    executor = None
+    if jobs > 1 and len(devices) > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+        device_texts = executor.map(generate_device_reports, *arguments)
+    else:
+        device_texts = map(generate_device_reports, *arguments)
+    try:
+        for dev, (main_text, failures_only_text, device_fingerprints, device_metrics, rows) in zip(devices, device_texts):
+            network_report.write(main_text)
+            network_report_failures_only.write(failures_only_text)
+            if store is not None:
+                store.add_rows(run, now.timestamp(), rows)
+            if manifest is not None:
+                manifest['devices'][dev] = device_fingerprints
+            if metrics:
+                devices_metrics[dev] = device_metrics
+        if fleet:
+            network_report.write(render_fleet_header())
+            network_report_failures_only.write(render_fleet_header())
+            for item in fleet:
+                result = item(devices, root_dir)
+                main_text, failures_only_text = render_topic(result)
+                if store is not None:
+                    store.add_rows(run, now.timestamp(), result_rows(result))
+                network_report.write(main_text)
+                network_report_failures_only.write(failures_only_text)
+        if metrics_summary:
+            network_report.write(render_metrics_summary(summarize(devices_metrics), run_peak_rss(devices_metrics)))
+        if store is not None:
+            store.commit()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        network_report.close()
+        network_report_failures_only.close()
+        if store is not None:
+            store.close()
+    if manifest is not None:
+        save_manifest(root_dir, manifest)
+    if metrics:
+        # the peak RSS of the process which audited each device is in the metrics of the device
+        save_metrics(root_dir, {'date': now.isoformat(), 'jobs': jobs, 'incremental': incremental, 'wall_time': time.perf_counter() - start, 'peak_rss': run_peak_rss(devices_metrics), 'topics': summarize(devices_metrics), 'devices': devices_metrics})
 
 def generate_main_report(dev, topic, root_dir): 
     """Generate the main report for a device
 
+    The device is audited and both reports are written, see generate_reports.
+    To write the two reports of a device with one audit, call generate_reports, or generate_network_reports for all the devices, instead of this function and generate_failures_only_report.
+
     Parameters
     ----------
     dev : str
@@ -925,23 +635,14 @@ def generate_main_report(dev, topic, root_dir):
     root_dir: str
         Root directory for all the outputs.
     """
-    directories = device_directories(dev, root_dir)
-    reports_directory = directories[4]
-    outfile = open(reports_directory + "/main.txt", "w")
-    infile = open(init(dev, root_dir)[0], "r")
-    for line in infile:  
-        outfile.write(line)
-    infile.close()
-    for item in topic:
-        infile = open(item(dev, root_dir)[0], "r")
-        for line in infile:  
-            outfile.write(line)
-        infile.close()
-    outfile.close()
+    generate_reports(dev, topic, root_dir)
 
 def generate_failures_only_report(dev, topic, root_dir): 
     """Generate the failure_only report for a device
 
+    The device is audited and both reports are written, see generate_reports.
+    To write the two reports of a device with one audit, call generate_reports, or generate_network_reports for all the devices, instead of this function and generate_main_report.
+
     Parameters
     ----------
     dev : str
@@ -951,19 +652,7 @@ def generate_failures_only_report(dev, topic, root_dir):
     root_dir: str
         Root directory for all the outputs.
     """
-    directories = device_directories(dev, root_dir)
-    reports_directory = directories[4]
-    outfile = open(reports_directory + "/failures_only.txt", "w")
-    infile = open(init(dev, root_dir)[1], "r")
-    for line in infile:  
-        outfile.write(line)
-    infile.close()
-    for item in topic:
-        infile = open(item(dev, root_dir)[1], "r")
-        for line in infile:  
-            outfile.write(line)
-        infile.close()
-    outfile.close()
+    generate_reports(dev, topic, root_dir)
 
 def assemble_main_reports(devices, topic, root_dir):
     """Assembles the generated main report of each device into one report for all devices
@@ -977,15 +666,8 @@ def assemble_main_reports(devices, topic, root_dir):
     root_dir: str
         Root directory for all the outputs.
     """    
-    audit_str_list = []
-    for item in topic: 
-        audit_str_list.append(item.__name__)
     network_report = open(root_dir + "/main.txt", "w")
-    network_report.write('Report generated using Python the ' + str(datetime.datetime.now().strftime("%d %b %Y at %H:%M:%S")) + "\n"*2)
-    network_report.write ('The list of devices audited is: ' + str(devices) + '\n')
-    network_report.write ('The list of topics audited is: ' + str(audit_str_list) + '\n'*2)
-    network_report.write('The file main.txt shows the details for all the tests.\n')
-    network_report.write("The file failures_only.txt shows only the tests that failed." + "\n"*2)
+    network_report.write(render_network_header(devices, topic))
     for device in devices:
         directories = device_directories(device, root_dir)
         reports_directory = directories[4]
@@ -993,6 +675,7 @@ def assemble_main_reports(devices, topic, root_dir):
         for line in device_report:  
             network_report.write(line)
         device_report.close()
+    network_report.close()
 
 def assemble_failures_only_reports(devices, topic, root_dir): 
     """Assembles the generated failures_only report of each device into one report for all devices
@@ -1007,15 +690,8 @@ def assemble_failures_only_reports(devices, topic, root_dir):
         Root directory for all the outputs.
 
     """ 
-    audit_str_list = []
-    for item in topic: 
-        audit_str_list.append(item.__name__)
     network_report_failures_only = open(root_dir + "/failures_only.txt", "w")
-    network_report_failures_only.write('Report generated using Python the ' + str(datetime.datetime.now().strftime("%d %b %Y at %H:%M:%S")) + "\n"*2)
-    network_report_failures_only.write ('The list of devices audited is: ' + str(devices) + '\n')
-    network_report_failures_only.write ('The list of topics audited is: ' + str(audit_str_list) + '\n'*2)
-    network_report_failures_only.write('The file failures_only.txt shows only the tests that failed.\n')
-    network_report_failures_only.write("The file main.txt shows the details for all the tests." + "\n"*2)
+    network_report_failures_only.write(render_network_header(devices, topic, True))
     for device in devices:
         directories = device_directories(device, root_dir)
         reports_directory = directories[4]
@@ -1023,5 +699,6 @@ def assemble_failures_only_reports(devices, topic, root_dir):
         for line in device_report:  
             network_report_failures_only.write(line)
         device_report.close()
+    network_report_failures_only.close()
 
 
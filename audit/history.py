@@ -0,0 +1,168 @@
+import json
+import sqlite3
+import time
+
+# History of the audit results, next to the report for all devices
+HISTORY_NAME = 'audit_history.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, time REAL NOT NULL, devices INTEGER, topics TEXT);
+CREATE TABLE IF NOT EXISTS records (run INTEGER NOT NULL, time REAL NOT NULL, device TEXT NOT NULL, topic TEXT NOT NULL, section TEXT, item TEXT, status TEXT, fields TEXT);
+CREATE TABLE IF NOT EXISTS record_values (run INTEGER NOT NULL, time REAL NOT NULL, device TEXT NOT NULL, topic TEXT NOT NULL, item TEXT, label TEXT NOT NULL, value REAL);
+CREATE INDEX IF NOT EXISTS records_device_time ON records (device, time);
+CREATE INDEX IF NOT EXISTS records_topic_time ON records (topic, time);
+CREATE INDEX IF NOT EXISTS records_time ON records (time);
+CREATE INDEX IF NOT EXISTS records_failures_device_time ON records (device, time) WHERE status = 'FAIL';
+CREATE INDEX IF NOT EXISTS record_values_label_time ON record_values (label, time);
+CREATE INDEX IF NOT EXISTS record_values_device_label_time ON record_values (device, label, time);
+"""
+
+def result_rows (result):
+    """Return the rows of a TopicResult for the history
+
+    The rows are plain tuples, so they are cheap to send back from the worker processes.
+
+    Returns
+    -------
+    tuple
+        The list of (device, topic, section, item, status, fields as JSON) of the records
+        and the list of (device, topic, item, label, value) of the numeric fields and of the values (see Record) of the records.
+    """
+    records = []
+    values = []
+    for section in result.sections:
+        for record in section.records:
+            records.append((record.device, record.topic, section.title, str(record.item), record.status, json.dumps(record.fields, default=str)))
+            for label, value in tuple(record.fields) + tuple(record.values):
+                # bool is a subclass of int but not a measure
+                if label is not None and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values.append((record.device, record.topic, str(record.item), label, value))
+    return records, values
+
+class HistoryStore:
+    """Audit results of all the runs, in a SQLite database
+
+    Each run appends the records of all the devices with the time of the run.
+    The records are indexed by device, topic and time, the numeric fields of the records (temperature, counters, ...) are also saved one per row, indexed by label and time.
+
+    Parameters
+    ----------
+    name : str
+        SQLite database file, created if it does not exist.
+    """
+    def __init__ (self, name):
+        self.connection = sqlite3.connect(name)
+        self.connection.executescript(SCHEMA)
+
+    def add_run (self, run_time, devices, topics):
+        """Add a run and return its id
+
+        Parameters
+        ----------
+        run_time : float
+            Time of the run, in seconds since the epoch.
+        devices : list
+            List of devices IP addresses or hostnames.
+        topics : list
+            Names of the audit functions.
+        """
+        cursor = self.connection.execute('INSERT INTO runs (time, devices, topics) VALUES (?, ?, ?)', (run_time, len(devices), json.dumps(topics)))
+        return cursor.lastrowid
+
+    def add_rows (self, run, run_time, rows):
+        """Add the rows returned by result_rows for a run"""
+        records, values = rows
+        self.connection.executemany('INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [(run, run_time) + record for record in records])
+        self.connection.executemany('INSERT INTO record_values VALUES (?, ?, ?, ?, ?, ?, ?)', [(run, run_time) + value for value in values])
+
+    def commit (self):
+        """Save the runs added since the last commit"""
+        self.connection.commit()
+
+    def close (self):
+        """Close the database, the runs added since the last commit are discarded"""
+        self.connection.close()
+
+    def runs (self, since=None):
+        """Return the (id, time, number of devices, topics) of the runs, oldest first"""
+        rows = self.connection.execute('SELECT id, time, devices, topics FROM runs WHERE time >= ? ORDER BY time', (since or 0,))
+        return [(run, run_time, devices, json.loads(topics)) for run, run_time, devices, topics in rows]
+
+    def failures (self, device=None, topic=None, since=None, until=None):
+        """Return the failed tests, oldest first
+
+        Parameters
+        ----------
+        device : str
+            Only the failures of this device (use 'fleet' for the fleet topics).
+        topic : str
+            Only the failures of this audit function.
+        since : float
+            Only the runs at or after this time, in seconds since the epoch.
+        until : float
+            Only the runs before this time, in seconds since the epoch.
+
+        Returns
+        -------
+        list
+            (time, device, topic, section, item, fields) of each failed test.
+        """
+        query = "SELECT time, device, topic, section, item, fields FROM records WHERE status = 'FAIL' AND time >= ? AND time < ?"
+        parameters = [since or 0, until or float('inf')]
+        if device is not None:
+            query = query + ' AND device = ?'
+            parameters.append(device)
+        if topic is not None:
+            query = query + ' AND topic = ?'
+            parameters.append(topic)
+        rows = self.connection.execute(query + ' ORDER BY time', parameters)
+        return [(row_time, row_device, row_topic, section, item, tuple(tuple(field) for field in json.loads(fields))) for row_time, row_device, row_topic, section, item, fields in rows]
+
+    def daily (self, label, function='MAX', device=None, since=None, until=None):
+        """Aggregate a numeric field of the records per day (local time)
+
+        Parameters
+        ----------
+        label : str
+            Label of the field, 'Max temperature (C)' for example.
+        function : str
+            SQL aggregate function: MAX, MIN, AVG, SUM or COUNT.
+        device : str
+            Only the records of this device, all the devices if None.
+        since : float
+            Only the runs at or after this time, in seconds since the epoch.
+        until : float
+            Only the runs before this time, in seconds since the epoch.
+
+        Returns
+        -------
+        list
+            (day as YYYY-MM-DD, value) of each day, oldest first.
+        """
+        if function.upper() not in ('MAX', 'MIN', 'AVG', 'SUM', 'COUNT'):
+            raise ValueError('unsupported aggregate function ' + function)
+        query = "SELECT date(time, 'unixepoch', 'localtime') AS day, " + function.upper() + '(value) FROM record_values WHERE label = ? AND time >= ? AND time < ?'
+        parameters = [label, since or 0, until or float('inf')]
+        if device is not None:
+            query = query + ' AND device = ?'
+            parameters.append(device)
+        return list(self.connection.execute(query + ' GROUP BY day ORDER BY day', parameters))
+
+    def values (self, device, label, item=None, since=None, until=None):
+        """Return the values of a numeric field of the records of a device, oldest first
+
+        Returns
+        -------
+        list
+            (time, topic, item, value) of each record.
+        """
+        query = 'SELECT time, topic, item, value FROM record_values WHERE device = ? AND label = ? AND time >= ? AND time < ?'
+        parameters = [device, label, since or 0, until or float('inf')]
+        if item is not None:
+            query = query + ' AND item = ?'
+            parameters.append(item)
+        return list(self.connection.execute(query + ' ORDER BY time', parameters))
+
+def days_ago (days):
+    """Return the time, in seconds since the epoch, a number of days ago"""
+    return time.time() - days*86400
@@ -0,0 +1,195 @@
+import hashlib
+import importlib
+import json
+import os
+
+# Increase when the format of the cache changes, to discard the results of the previous runs
+# a change of the code of an audit function discards its results, see code_fingerprint
+CACHE_VERSION = 2
+
+# modules used by all the audit functions: the shared helpers and the rendering of the reports
+SHARED_MODULES = ['audit.functions', 'audit.results']
+
+# code fingerprint of each audit function, by module and name, computed once per process
+code_fingerprints = {}
+
+def code_fingerprint (function):
+    """Return the fingerprint of the code of an audit function
+
+    The fingerprint is the sha256 of the source files of the module of the function and of the SHARED_MODULES.
+    A cached result is not reused when the function, the helpers of its module or the rendering of the reports changed.
+    If the module of the function has no source file, the bytecode of the function is hashed instead.
+
+    Parameters
+    ----------
+    function : function
+        Audit function.
+
+    Returns
+    -------
+    str
+        sha256 of the code.
+    """
+    key = (function.__module__, function.__name__)
+    if key not in code_fingerprints:
+        sha256 = hashlib.sha256()
+        for module_name in [function.__module__] + SHARED_MODULES:
+            name = getattr(importlib.import_module(module_name), '__file__', None)
+            if name is None:
+                sha256.update(function.__code__.co_code)
+                continue
+            f = open(name, 'rb')
+            sha256.update(f.read())
+            f.close()
+        code_fingerprints[key] = sha256.hexdigest()
+    return code_fingerprints[key]
+
+def file_fingerprint (name, previous=None):
+    """Return the fingerprint of a file
+
+    The content hash of the previous fingerprint is reused if the modification time and the size did not change.
+
+    Parameters
+    ----------
+    name : str
+        File name.
+    previous : list
+        Previous fingerprint of the file.
+
+    Returns
+    -------
+    list
+        Modification time in ns, size and sha256 of the file, or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(name)
+    except OSError:
+        return None
+    if previous is not None and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size:
+        return previous
+    sha256 = hashlib.sha256()
+    f = open(name, 'rb')
+    for block in iter(lambda: f.read(1024*1024), b''):
+        sha256.update(block)
+    f.close()
+    return [stat.st_mtime_ns, stat.st_size, sha256.hexdigest()]
+
+def load_manifest (root_dir):
+    """Load root_dir/audit_manifest.json
+
+    Returns
+    -------
+    dict
+        The manifest of the previous run, or an empty manifest.
+    """
+    name = root_dir + '/audit_manifest.json'
+    if os.path.exists(name):
+        f = open(name, 'r')
+        manifest = json.load(f)
+        f.close()
+        if manifest.get('version') == CACHE_VERSION:
+            return manifest
+    return {'version': CACHE_VERSION, 'devices': {}}
+
+def save_manifest (root_dir, manifest):
+    """Save the manifest in root_dir/audit_manifest.json"""
+    f = open(root_dir + '/audit_manifest.json', 'w')
+    json.dump(manifest, f, indent=1, sort_keys=True)
+    f.close()
+
+class DeviceAuditCache:
+    """Results of the previous runs of the audit functions for a device
+
+    A topic result is reused if the content of all the EOS commands required by the topic and the code of the audit function (see code_fingerprint) did not change since it was generated.
+    The results are saved in the file audit_cache.json of the device reports directory.
+
+    Parameters
+    ----------
+    commands : DeviceCommands
+        Outputs of the EOS commands collected from the device.
+    reports_directory : str
+        Directory of the device reports.
+    fingerprints : dict
+        Fingerprints of the device JSON outputs in the previous run, by command.
+    """
+    def __init__ (self, commands, reports_directory, fingerprints=None):
+        self.commands = commands
+        self.name = reports_directory + '/audit_cache.json'
+        self.previous_fingerprints = fingerprints or {}
+        self.fingerprints = {}
+        self.topics = {}
+        if os.path.exists(self.name):
+            f = open(self.name, 'r')
+            data = json.load(f)
+            f.close()
+            if data.get('version') == CACHE_VERSION:
+                self.topics = data['topics']
+
+    def fingerprint (self, command):
+        """Return the fingerprint of the JSON output of an EOS command"""
+        if command not in self.fingerprints:
+            self.fingerprints[command] = self.commands.fingerprint(command, self.previous_fingerprints.get(command))
+        return self.fingerprints[command]
+
+    def inputs (self, commands):
+        """Return the size and the content hash of the JSON output of each command, or None if an output is missing"""
+        inputs = {}
+        for command in commands:
+            fingerprint = self.fingerprint(command)
+            if fingerprint is None:
+                return None
+            inputs[command] = [fingerprint[1], fingerprint[2]]
+        return inputs
+
+    def lookup (self, topic, commands, code):
+        """Return the cached result of a topic
+
+        Parameters
+        ----------
+        topic : str
+            Name of the audit function.
+        commands : list
+            EOS commands required by the audit function.
+        code : str
+            Fingerprint of the code of the audit function.
+
+        Returns
+        -------
+        dict
+            The cached result (keys result, main and failures_only) or None if one of the commands output or the code changed.
+        """
+        cached = self.topics.get(topic)
+        if cached is None:
+            return None
+        if cached.get('code') != code or cached['inputs'] != self.inputs(commands):
+            return None
+        return cached
+
+    def store (self, topic, commands, code, result, main, failures_only):
+        """Store the result of a topic
+
+        Parameters
+        ----------
+        topic : str
+            Name of the audit function.
+        commands : list
+            EOS commands required by the audit function.
+        code : str
+            Fingerprint of the code of the audit function.
+        result : dict
+            Result of the audit function, as returned by result_to_dict.
+        main : str
+            Text of the topic in the main report.
+        failures_only : str
+            Text of the topic in the failures_only report.
+        """
+        inputs = self.inputs(commands)
+        if inputs is None:
+            self.topics.pop(topic, None)
+            return
+        self.topics[topic] = {'inputs': inputs, 'code': code, 'result': result, 'main': main, 'failures_only': failures_only}
+
+    def save (self):
+        f = open(self.name, 'w')
+        json.dump({'version': CACHE_VERSION, 'topics': self.topics}, f)
+        f.close()
@@ -0,0 +1,149 @@
+import json
+import math
+import sys
+import threading
+import time
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+# Metrics of the audit, next to the report for all devices
+METRICS_NAME = 'audit_metrics.json'
+
+# Metrics of the collections, in the output directory
+COLLECTION_METRICS_NAME = 'collection_metrics.jsonl'
+
+def peak_rss ():
+    """Return the peak resident set size of the process in bytes, or None if it is not available"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == 'darwin':
+        return rss
+    return rss*1024
+
+def start_measure (commands):
+    """Return the counters of a DeviceCommands before running an audit function, see topic_metrics"""
+    return time.perf_counter(), commands.bytes_read, commands.parse_time
+
+def topic_metrics (commands, start, cached=False):
+    """Return the metrics of an audit function
+
+    Parameters
+    ----------
+    commands : DeviceCommands
+        Outputs of the EOS commands used by the function.
+    start : tuple
+        Value returned by start_measure before running the function.
+    cached : bool
+        The result was reused from a previous run, the function did not run.
+
+    Returns
+    -------
+    dict
+        Wall time in seconds, bytes of EOS commands outputs read and JSON parse time in seconds.
+        The peak RSS is the high-water mark of the whole process, it is only measured per device and per run, see run_peak_rss.
+    """
+    return {'wall_time': time.perf_counter() - start[0], 'bytes_read': commands.bytes_read - start[1], 'parse_time': commands.parse_time - start[2], 'cached': cached}
+
+def summarize (devices_metrics):
+    """Aggregate the metrics of all devices by audit function
+
+    Parameters
+    ----------
+    devices_metrics : dict
+        Metrics of each device, as filled by audit_device.
+
+    Returns
+    -------
+    dict
+        Total wall time, bytes read and parse time and number of cached results of each function.
+    """
+    summary = {}
+    for metrics in devices_metrics.values():
+        for topic, values in metrics['topics'].items():
+            total = summary.setdefault(topic, {'wall_time': 0.0, 'bytes_read': 0, 'parse_time': 0.0, 'devices': 0, 'cached': 0})
+            total['wall_time'] = total['wall_time'] + values['wall_time']
+            total['bytes_read'] = total['bytes_read'] + values['bytes_read']
+            total['parse_time'] = total['parse_time'] + values['parse_time']
+            total['devices'] = total['devices'] + 1
+            total['cached'] = total['cached'] + int(values['cached'])
+    return summary
+
+def run_peak_rss (devices_metrics):
+    """Return the peak RSS of the run in bytes: the highest of the main process and of the processes which audited the devices, or None if it is not available"""
+    values = [metrics['peak_rss'] for metrics in devices_metrics.values() if metrics.get('peak_rss') is not None]
+    rss = peak_rss()
+    if rss is not None:
+        values.append(rss)
+    if not values:
+        return None
+    return max(values)
+
+def render_metrics_summary (summary, rss=None):
+    """Return the table of the metrics of each audit function and the peak RSS of the run, appended to the main report for all devices"""
+    text = '********** Audit metrics **********\n\n'
+    for topic, total in sorted(summary.items(), key=lambda item: -item[1]['wall_time']):
+        text = text + 'Topic: ' + topic + ' *** Time (s): ' + '%.4f' % total['wall_time'] + ' *** Read (bytes): ' + str(total['bytes_read']) + ' *** JSON parse (s): ' + '%.4f' % total['parse_time'] + ' *** Cached: ' + str(total['cached']) + '/' + str(total['devices']) + '\n'
+    if rss is None:
+        text = text + 'Peak RSS of the run (MB): n/a\n'
+    else:
+        text = text + 'Peak RSS of the run (MB): ' + '%.1f' % (rss/1048576) + '\n'
+    return text + '\n'
+
+def save_metrics (root_dir, metrics):
+    """Save the metrics of the audit in root_dir/audit_metrics.json"""
+    f = open(root_dir + '/' + METRICS_NAME, 'w')
+    json.dump(metrics, f, indent=1, sort_keys=True)
+    f.close()
+
+def percentile (values, percent):
+    """Return the percentile of a list of values (nearest rank), or None if the list is empty"""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(1, int(math.ceil(percent/100.0*len(values))))
+    return values[rank - 1]
+
+class CollectionMetrics:
+    """Metrics of the collection of the EOS commands, saved as JSON lines
+
+    Each event is saved as soon as it is recorded, as one JSON object per line with the time, the collection run, the device and the event type:
+    connect (time to open or reuse the connection), request (one eAPI runCmds request), command (one EOS command, its time is None if it was sent in an eAPI request) and device (collection of the device).
+    Events can be recorded by several threads.
+
+    Parameters
+    ----------
+    name : str
+        JSON lines file, the events are appended to it. The events are only kept in memory if None.
+    """
+    def __init__ (self, name=None):
+        self.events = []
+        self.run = 0
+        self.lock = threading.Lock()
+        self.file = None
+        if name is not None:
+            self.file = open(name, 'a')
+
+    def record (self, device, event, **fields):
+        """Record an event of a device, with its fields (time in seconds, bytes, error message, ...)"""
+        fields.update({'timestamp': time.time(), 'run': self.run, 'device': device, 'event': event})
+        with self.lock:
+            self.events.append(fields)
+            if self.file is not None:
+                self.file.write(json.dumps(fields, sort_keys=True) + '\n')
+                self.file.flush()
+
+    def new_run (self):
+        """Start a new collection run, the events of the previous run are dropped from memory"""
+        with self.lock:
+            self.run = self.run + 1
+            self.events = []
+
+    def close (self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,126 @@
+import importlib
+import pkgutil
+try:
+    from importlib import metadata
+except ImportError:
+    # Python 3.7
+    try:
+        import importlib_metadata as metadata
+    except ImportError:
+        metadata = None
+
+# Package of the built-in audit functions, one module per function named after the function
+CHECKS_PACKAGE = 'audit.checks'
+
+# Entry points group of the audit functions installed by other packages, the entry point name is the function name
+ENTRY_POINT_GROUP = 'arista_audit.checks'
+
+# Package of the built-in fleet functions, the function fleet_<name> is in the module audit.fleet.<name>
+FLEET_PACKAGE = 'audit.fleet'
+FLEET_PREFIX = 'fleet_'
+
+# Entry points group of the fleet functions installed by other packages, the entry point name is the function name
+FLEET_ENTRY_POINT_GROUP = 'arista_audit.fleet'
+
+# audit functions already loaded, by name
+loaded = {}
+
+# fleet functions already loaded, by name
+loaded_fleet = {}
+
+def audit_check (commands):
+    """Decorator declaring the EOS commands (JSON format) required by an audit function
+
+    The commands are saved in the commands attribute of the function.
+
+    Parameters
+    ----------
+    commands : list
+        EOS commands.
+    """
+    def decorator (function):
+        function.commands = list(commands)
+        return function
+    return decorator
+
+def entry_points (group=ENTRY_POINT_GROUP):
+    """Return the entry points of the functions installed by other packages in a group, by name"""
+    if metadata is None:
+        return {}
+    eps = metadata.entry_points()
+    if hasattr(eps, 'select'):
+        eps = eps.select(group=group)
+    else:
+        eps = eps.get(group, [])
+    return dict((ep.name, ep) for ep in eps)
+
+def load_function (name, package, module_name, group):
+    """Import a function from its module in a package, or from the entry points of a group
+
+    Raises
+    ------
+    KeyError
+        Neither the module nor an entry point has this function.
+    """
+    module_name = package + '.' + module_name
+    try:
+        return getattr(importlib.import_module(module_name), name)
+    except ModuleNotFoundError as error:
+        if error.name not in (module_name, package):
+            raise
+    ep = entry_points(group).get(name)
+    if ep is None:
+        raise KeyError(name)
+    return ep.load()
+
+def get_check (name):
+    """Return an audit function, importing only its module
+
+    The function is looked up in the module audit.checks.<name>, then in the entry points of the group arista_audit.checks.
+
+    Raises
+    ------
+    KeyError
+        No audit function has this name.
+    """
+    if name in loaded:
+        return loaded[name]
+    function = load_function(name, CHECKS_PACKAGE, name, ENTRY_POINT_GROUP)
+    loaded[name] = function
+    return function
+
+def get_fleet_check (name):
+    """Return a fleet function, importing only its module
+
+    The function fleet_<name> is looked up in the module audit.fleet.<name>, then in the entry points of the group arista_audit.fleet.
+
+    Raises
+    ------
+    KeyError
+        No fleet function has this name.
+    """
+    if name in loaded_fleet:
+        return loaded_fleet[name]
+    if name.startswith(FLEET_PREFIX):
+        function = load_function(name, FLEET_PACKAGE, name[len(FLEET_PREFIX):], FLEET_ENTRY_POINT_GROUP)
+    else:
+        ep = entry_points(FLEET_ENTRY_POINT_GROUP).get(name)
+        if ep is None:
+            raise KeyError(name)
+        function = ep.load()
+    loaded_fleet[name] = function
+    return function
+
+def available_checks ():
+    """Return the names of all the audit functions, built-in and installed by other packages, without importing them"""
+    package = importlib.import_module(CHECKS_PACKAGE)
+    names = set(module.name for module in pkgutil.iter_modules(package.__path__) if not module.name.startswith('_'))
+    names.update(entry_points())
+    return sorted(names)
+
+def available_fleet_checks ():
+    """Return the names of all the fleet functions, built-in and installed by other packages, without importing them"""
+    package = importlib.import_module(FLEET_PACKAGE)
+    names = set(FLEET_PREFIX + module.name for module in pkgutil.iter_modules(package.__path__) if not module.name.startswith('_'))
+    names.update(entry_points(FLEET_ENTRY_POINT_GROUP))
+    return sorted(names)
@@ -0,0 +1,208 @@
+PASS = 'PASS'
+FAIL = 'FAIL'
+
+# Values of Section.summary
+# ALL: the failures_only report says whether all the tests of the section passed or only the other tests passed
+# SINGLE: the section has only one test, the failures_only report says only when it passed
+ALL = 'all'
+SINGLE = 'single'
+
+class Record:
+    """Result of one test, or one line of information when status is None
+
+    Attributes
+    ----------
+    device : str
+        Device IP address or hostname.
+    topic : str
+        Name of the audit function which generated the record.
+    item : str
+        Name of the tested item (power supply, sensor, peer, ...).
+    status : str
+        PASS, FAIL or None for a line of information.
+    fields : tuple
+        (label, value) pairs to print. A None label prints the value only.
+    values : tuple
+        (label, number) pairs not printed, saved in the history with the numeric fields (raw timestamps, current readings, ...).
+    """
+    __slots__ = ('device', 'topic', 'item', 'status', 'fields', 'values')
+
+    def __init__ (self, device, topic, item, status, fields, values=()):
+        self.device = device
+        self.topic = topic
+        self.item = item
+        self.status = status
+        self.fields = fields
+        self.values = values
+
+    def __repr__ (self):
+        return 'Record(' + ', '.join(repr(getattr(self, name)) for name in self.__slots__) + ')'
+
+class Section:
+    """Records printed under the same title
+
+    Attributes
+    ----------
+    title : str
+        Title printed before the records, None for no title.
+    records : list
+        List of Record.
+    summary : str
+        ALL, SINGLE or None if the failures_only report has no summary for the section.
+    note : str
+        Text printed in the failures_only report instead of the information records.
+    block : bool
+        Print each field of a record on its own line.
+    """
+    __slots__ = ('title', 'records', 'summary', 'note', 'block')
+
+    def __init__ (self, title=None, summary=None, note=None, block=False):
+        self.title = title
+        self.records = []
+        self.summary = summary
+        self.note = note
+        self.block = block
+
+class TopicResult:
+    """Result of an audit function for a device
+
+    Attributes
+    ----------
+    device : str
+        Device IP address or hostname.
+    topic : str
+        Name of the audit function.
+    title : str
+        Title of the topic in the reports.
+    description : str
+        Description of the topic.
+    command : str
+        Required EOS command.
+    conditions : str
+        Test failure conditions.
+    sections : list
+        List of Section.
+    """
+    __slots__ = ('device', 'topic', 'title', 'description', 'command', 'conditions', 'sections')
+
+    def __init__ (self, device, topic, title, description, command, conditions):
+        self.device = device
+        self.topic = topic
+        self.title = title
+        self.description = description
+        self.command = command
+        self.conditions = conditions
+        self.sections = []
+
+    def section (self, title=None, summary=None, note=None, block=False):
+        """Add a new section to the result and return it"""
+        section = Section(title, summary, note, block)
+        self.sections.append(section)
+        return section
+
+    def add (self, section, item, status, fields, values=()):
+        """Add a new record to a section of the result and return it"""
+        record = Record(self.device, self.topic, item, status, fields, values)
+        section.records.append(record)
+        return record
+
+    def records (self):
+        """Iterate over the records of all the sections"""
+        for section in self.sections:
+            for record in section.records:
+                yield record
+
+    def failed (self):
+        """Return True if at least one test failed"""
+        return any(record.status == FAIL for record in self.records())
+
+def format_field (label, value):
+    if label is None:
+        return str(value)
+    return label + ': ' + str(value)
+
+def format_record (record):
+    """Format a record as one line"""
+    message = ' *** '.join(format_field(label, value) for label, value in record.fields)
+    if record.status is not None:
+        message = message + ' *** Result: ' + record.status
+    return message + '\n'
+
+def format_block (record):
+    """Format a record with one line per field"""
+    message = ''.join(format_field(label, value) + '\n' for label, value in record.fields)
+    if record.status is not None:
+        message = message + '\nTest result: ' + record.status + '\n'
+    return message
+
+def render_device_header (device):
+    """Return the header of the reports of a device"""
+    return '-'*13 + ' Report for device ' + device + ' ' + '-'*13 + "\n"*2
+
+def render_fleet_header ():
+    """Return the header of the fleet topics in the reports for all devices"""
+    return '-'*13 + ' Report for all devices ' + '-'*13 + "\n"*2
+
+def render_topic (result):
+    """Render the result of an audit function
+
+    Parameters
+    ----------
+    result : TopicResult
+        Result of an audit function.
+
+    Returns
+    -------
+    tuple
+        The text of the main report and the text of the failures_only report.
+    """
+    header = '*'*10 + ' ' + result.title + ' ' + '*'*10 + "\n"*2
+    header = header + 'Description: ' + result.description + '\n'
+    header = header + "Required EOS command: " + result.command + ' | json\n'
+    header = header + "Test failure conditions: " + result.conditions + '\n\n'
+    main = [header]
+    failures_only = [header]
+    for section in result.sections:
+        if section.title is not None:
+            main.append(section.title + '\n')
+            failures_only.append(section.title + '\n')
+        if section.block:
+            format_function = format_block
+        else:
+            format_function = format_record
+        at_least_one_test_failed = False
+        for record in section.records:
+            message = format_function(record)
+            main.append(message)
+            if record.status == FAIL:
+                at_least_one_test_failed = True
+                failures_only.append(message)
+            elif record.status is None and section.note is None:
+                failures_only.append(message)
+        if section.note is not None:
+            failures_only.append(section.note + '\n')
+        if section.summary is not None:
+            if at_least_one_test_failed == False:
+                failures_only.append("All tests successfully passed\n")
+            elif section.summary == ALL:
+                failures_only.append("The other tests succesfully passed\n")
+        main.append('\n')
+        failures_only.append('\n')
+    return ''.join(main), ''.join(failures_only)
+
+def result_to_dict (result):
+    """Convert a TopicResult to a dict which can be saved as JSON"""
+    sections = []
+    for section in result.sections:
+        records = [[record.item, record.status, [list(field) for field in record.fields], [list(value) for value in record.values]] for record in section.records]
+        sections.append({'title': section.title, 'summary': section.summary, 'note': section.note, 'block': section.block, 'records': records})
+    return {'device': result.device, 'topic': result.topic, 'title': result.title, 'description': result.description, 'command': result.command, 'conditions': result.conditions, 'sections': sections}
+
+def result_from_dict (data):
+    """Convert a dict returned by result_to_dict back to a TopicResult"""
+    result = TopicResult(data['device'], data['topic'], data['title'], data['description'], data['command'], data['conditions'])
+    for item in data['sections']:
+        section = result.section(item['title'], item['summary'], item['note'], item['block'])
+        for record in item['records']:
+            result.add(section, record[0], record[1], tuple(tuple(field) for field in record[2]), tuple(tuple(value) for value in record[3]))
+    return result
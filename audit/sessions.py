@@ -0,0 +1,118 @@
+import threading
+import time
+
+class SessionPool:
+    """Open connections to the devices, reused from one collection to the next one
+
+    A device has at most one connection in the pool, used by one collection at a time.
+    A connection is checked before it is reused and opened again if it is not alive anymore.
+    The connections not used for more than idle_timeout seconds are closed.
+
+    Parameters
+    ----------
+    factory : function
+        Function called with the device IP address or hostname to open a new connection to the device.
+    idle_timeout : int
+        Time in seconds after which an unused connection is closed.
+    """
+    def __init__ (self, factory, idle_timeout=300):
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.device_locks = {}
+        self.lock = threading.Lock()
+
+    def device_lock (self, device):
+        with self.lock:
+            if device not in self.device_locks:
+                self.device_locks[device] = threading.Lock()
+            return self.device_locks[device]
+
+    def acquire (self, device):
+        """Return a connection to a device and reserve it until release is called
+
+        Returns
+        -------
+        tuple
+            The connection and True if it was already open, False if it was just opened.
+        """
+        self.device_lock(device).acquire()
+        try:
+            with self.lock:
+                session = self.sessions.pop(device, None)
+            if session is not None:
+                connection, last_used = session
+                if time.time() - last_used <= self.idle_timeout and is_alive(connection):
+                    return connection, True
+                close(connection)
+            return self.factory(device), False
+        except Exception:
+            self.device_lock(device).release()
+            raise
+
+    def release (self, device, connection, failed=False):
+        """Give back a connection to the pool
+
+        Parameters
+        ----------
+        device : str
+            Device IP address or hostname.
+        connection : object
+            Connection returned by acquire.
+        failed : bool
+            The connection failed, close it instead of keeping it.
+        """
+        try:
+            if failed:
+                close(connection)
+            else:
+                with self.lock:
+                    self.sessions[device] = (connection, time.time())
+        finally:
+            self.device_lock(device).release()
+
+    def evict_idle (self, next_use=None):
+        """Close the connections not used for more than idle_timeout seconds
+
+        Parameters
+        ----------
+        next_use : float
+            Time, in seconds since the epoch, of the next use of the connections: the connections which will be idle for more than idle_timeout seconds by then are closed now. Defaults to now.
+
+        Returns
+        -------
+        list
+            Devices whose connection was closed.
+        """
+        if next_use is None:
+            next_use = time.time()
+        with self.lock:
+            idle = [device for device, session in self.sessions.items() if next_use - session[1] > self.idle_timeout]
+            connections = [self.sessions.pop(device)[0] for device in idle]
+        for connection in connections:
+            close(connection)
+        return idle
+
+    def close (self):
+        """Close all the connections of the pool"""
+        with self.lock:
+            connections = [session[0] for session in self.sessions.values()]
+            self.sessions.clear()
+        for connection in connections:
+            close(connection)
+
+def is_alive (connection):
+    """Health check of a connection, using its is_alive method if it has one"""
+    try:
+        if hasattr(connection, 'is_alive'):
+            return connection.is_alive()
+        return True
+    except Exception:
+        return False
+
+def close (connection):
+    """Close a connection, ignoring the errors"""
+    try:
+        connection.disconnect()
+    except Exception:
+        pass
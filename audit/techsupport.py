@@ -0,0 +1,113 @@
+import concurrent.futures
+import gzip
+import io
+import mmap
+import os
+import shutil
+from audit.functions import device_directories, DeviceCommands
+
+def copy_file_contents (infile, outfile):
+    """Append the content of a binary file object to an output file without reading it in Python
+
+    The content is copied by the kernel with sendfile when both are plain files, otherwise it is memory-mapped and written at once.
+    Other file objects (archive members) are copied by blocks of 1 MB.
+
+    Parameters
+    ----------
+    infile : file
+        Binary file object to copy.
+    outfile : file
+        Binary file object to write to. It must be unbuffered (io.FileIO) to use sendfile.
+    """
+    try:
+        in_fd = infile.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        shutil.copyfileobj(infile, outfile, 1024*1024)
+        return
+    size = os.fstat(in_fd).st_size
+    offset = 0
+    if hasattr(os, 'sendfile') and isinstance(outfile, io.FileIO):
+        try:
+            while offset < size:
+                sent = os.sendfile(outfile.fileno(), in_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset = offset + sent
+            return
+        except OSError:
+            # sendfile is not supported for these files, copy the rest with mmap
+            pass
+    if offset < size:
+        data = mmap.mmap(in_fd, 0, access=mmap.ACCESS_READ)
+        view = memoryview(data)
+        outfile.write(view[offset:])
+        view.release()
+        data.close()
+
+def generate_custom_show_tech_support (device, root_dir, commands_list, compress=False):
+    """Assemble some of the collected text outputs of a device into one file
+
+    The file is root_dir/device/eos_commands/text/custom show tech-support.txt, or custom show tech-support.txt.gz with compress.
+
+    Parameters
+    ----------
+    device : str
+        Device IP address or hostname.
+    root_dir: str
+        Root directory for all the outputs.
+    commands_list : list
+        EOS commands (text format) to include in the file.
+    compress : bool
+        Write a gzip compressed file.
+
+    Returns
+    -------
+    str
+        The name of the generated file.
+    """
+    directories = device_directories(device, root_dir)
+    text_directory = directories[3]
+    commands = DeviceCommands(device, root_dir)
+    name = text_directory + "/custom show tech-support.txt"
+    if compress:
+        outfile = gzip.open(name + '.gz', 'wb')
+    else:
+        outfile = open(name, 'wb', buffering=0)
+    try:
+        for item in commands_list: 
+            outfile.write(('-'*13 + ' ' + item + ' ' + '-'*13 + '\n'*2).encode())
+            infile = commands.open(item, 'text')
+            copy_file_contents(infile, outfile)
+            infile.close()
+            outfile.write(('\n'*2).encode())
+    finally:
+        outfile.close()
+        commands.clear()
+    if compress:
+        return name + '.gz'
+    return name
+
+def generate_custom_show_tech_supports (devices, root_dir, commands_list, jobs=1, compress=False):
+    """Assemble the custom show tech-support file of several devices in parallel
+
+    Parameters
+    ----------
+    devices : list
+        List of devices IP addresses or hostnames. 
+    root_dir: str
+        Root directory for all the outputs.
+    commands_list : list
+        EOS commands (text format) to include in the files.
+    jobs : int
+        Number of devices processed at the same time.
+    compress : bool
+        Write gzip compressed files.
+
+    Returns
+    -------
+    list
+        The names of the generated files, in the devices order.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = [executor.submit(generate_custom_show_tech_support, device, root_dir, commands_list, compress) for device in devices]
+        return [future.result() for future in futures]
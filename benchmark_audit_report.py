@@ -0,0 +1,218 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from audit.functions import str_to_function, generate_network_reports, device_directories, DeviceCommands
+from audit.registry import available_checks
+
+def sensor (rng, name, description):
+    """Return a synthetic temperature sensor"""
+    alert = rng.random() < 0.01
+    return {'name': name, 'description': description, 'hwStatus': 'ok', 'alertCount': int(alert), 'inAlertState': alert, 'currentTemperature': rng.uniform(25, 70), 'maxTemperature': rng.uniform(30, 80), 'maxTemperatureLastChange': 1590000000 + rng.randint(0, 10**7), 'overheatThreshold': 85.0, 'criticalThreshold': 95.0}
+
+def synthetic_outputs (index, devices, rng, vrfs, peers, neighbors, linecards):
+    """Return the synthetic JSON outputs of a device, by EOS command
+
+    Parameters
+    ----------
+    index : int
+        Index of the device in the fabric.
+    devices : list
+        Names of all the devices of the fabric.
+    rng : random.Random
+        Random generator.
+    vrfs : int
+        Number of VRF in show ip bgp summary vrf all.
+    peers : int
+        Number of BGP peers per VRF, the other devices first.
+    neighbors : int
+        Number of LLDP neighbors.
+    linecards : int
+        Number of linecards, with 8 temperature sensors each.
+    """
+    name = devices[index]
+    outputs = {}
+    outputs['show hostname'] = {'hostname': name, 'fqdn': name + '.example.com'}
+    outputs['show version'] = {'modelName': 'DCS-7508', 'version': '4.24.1F', 'uptime': rng.uniform(0, 10**7), 'serialNumber': 'SN%06d' % index}
+    xcvrs = {}
+    for port in range(1, linecards*48 + 1):
+        xcvrs[str(port)] = {'mfgName': rng.choice(['Arista Networks', 'Arista Networks', 'Not Present', 'FINISAR CORP.']), 'serialNum': 'XS%06d' % port, 'modelName': '100GBASE-SR4'}
+    outputs['show inventory'] = {'systemInformation': {'description': 'Arista 7508 chassis'}, 'powerSupplySlots': {str(slot): {'name': 'PWR-3KT-AC-RED', 'serialNum': 'PS%d' % slot} for slot in range(1, 7)}, 'fanTraySlots': {str(slot): {'name': 'FM-7508'} for slot in range(1, 7)}, 'xcvrSlots': xcvrs}
+    outputs['show system environment power'] = {'powerSupplies': {str(slot): {'state': 'ok', 'outputPower': rng.uniform(200, 900)} for slot in range(1, 7)}}
+    outputs['show system environment cooling'] = {'powerSupplySlots': [{'fans': [{'label': 'PowerSupply%d/1' % slot, 'status': 'ok', 'actualSpeed': rng.randint(30, 90)}]} for slot in range(1, 7)], 'fanTraySlots': [{'fans': [{'label': '%d/%d' % (slot, fan), 'status': 'ok', 'actualSpeed': rng.randint(30, 90)} for fan in range(1, 4)]} for slot in range(1, 7)]}
+    cards = [{'entPhysicalClass': 'Linecard', 'relPos': str(card), 'tempSensors': [sensor(rng, 'TempSensor%d/%d' % (card, number), 'Linecard %d sensor %d' % (card, number)) for number in range(1, 9)]} for card in range(3, 3 + linecards)]
+    outputs['show system environment temperature'] = {'systemStatus': 'temperatureOk', 'tempSensors': [sensor(rng, 'TempSensor%d' % number, 'Board sensor %d' % number) for number in range(1, 9)], 'cardSlots': cards, 'powerSupplySlots': [{'tempSensors': [sensor(rng, 'TempSensorP%d/1' % slot, 'Power supply %d sensor' % slot)]} for slot in range(1, 7)]}
+    outputs['show system environment temperature transceiver'] = {'tempSensors': [sensor(rng, 'DomTemperatureSensor%d' % port, 'Xcvr %d temp sensor' % port) for port in range(1, 49)], 'cardSlots': [{'entPhysicalClass': 'Linecard', 'tempSensors': [sensor(rng, 'DomTemperatureSensor%d/%d' % (card, port), 'Xcvr %d/%d temp sensor' % (card, port)) for port in range(1, 49)]} for card in range(3, 3 + linecards)]}
+    outputs['show reload cause history'] = {'resetHistory': {str(number): {'cause': [{'description': 'Reload requested by the user.', 'timestamp': 1590000000 - number*86400}]} for number in range(10)}}
+    outputs['show reload cause full'] = {'resetCauses': [{'description': 'Reload requested by the user.', 'timestamp': 1590000000}]}
+    outputs['show lldp neighbors'] = {'lldpNeighbors': [{'port': 'Ethernet%d' % port, 'neighborDevice': devices[(index + port) % len(devices)], 'neighborPort': 'Ethernet%d' % port} for port in range(1, neighbors + 1)]}
+    bgp_vrfs = {}
+    for vrf in range(vrfs):
+        vrf_peers = {}
+        for peer in range(peers):
+            # the first peers are the next and previous devices of the fabric, the other ones are external
+            if peer < len(devices) - 1:
+                remote = (index + (peer // 2 + 1) * (1 - peer % 2 * 2)) % len(devices)
+                vrf_peers['10.%d.%d.%d' % (vrf % 256, remote // 256, remote % 256)] = {'asn': str(65000 + remote), 'peerState': rng.choice(['Established']*19 + ['Active']), 'upDownTime': 1590000000 + rng.uniform(0, 10**7)}
+            else:
+                vrf_peers['192.168.%d.%d' % (peer // 256 % 256, peer % 256)] = {'asn': '64512', 'peerState': rng.choice(['Established']*19 + ['Active']), 'upDownTime': 1590000000 + rng.uniform(0, 10**7)}
+        vrf_details = {'routerId': '10.%d.%d.%d' % (vrf % 256, index // 256, index % 256), 'asn': str(65000 + index), 'peers': vrf_peers}
+        if vrf == 0:
+            bgp_vrfs['default'] = vrf_details
+        else:
+            bgp_vrfs['VRF%d' % vrf] = vrf_details
+    outputs['show ip bgp summary vrf all'] = {'vrfs': bgp_vrfs}
+    # the loopback of each vrf has the router ID, the MLAG peer link is a /31 shared with the next or previous device
+    interfaces = {}
+    for vrf, vrf_details in bgp_vrfs.items():
+        interfaces['Loopback%d' % len(interfaces)] = {'name': 'Loopback%d' % len(interfaces), 'vrf': vrf, 'interfaceAddress': {'primaryIp': {'address': vrf_details['routerId'], 'maskLen': 32}, 'secondaryIpsOrderedList': []}}
+    interfaces['Vlan4094'] = {'name': 'Vlan4094', 'vrf': 'default', 'interfaceAddress': {'primaryIp': {'address': '10.255.%d.%d' % (index // 256, index % 256), 'maskLen': 31}, 'secondaryIpsOrderedList': []}}
+    outputs['show ip interface'] = {'interfaces': interfaces}
+    outputs['show mlag detail'] = {'state': 'active', 'negStatus': 'connected', 'configSanity': 'consistent', 'peerAddress': '10.255.%d.%d' % (index // 256, (index ^ 1) % 256), 'localInterface': 'Vlan4094', 'domainId': 'mlag%d' % (index // 2), 'systemId': '02:1c:73:%02x:%02x:%02x' % (index // 2 >> 16 & 255, index // 2 >> 8 & 255, index // 2 & 255), 'detail': {'mlagState': ['primary', 'secondary'][index & 1], 'peerMlagState': ['secondary', 'primary'][index & 1]}}
+    return outputs
+
+def generate_fabric (devices, root_dir, seed, vrfs, peers, neighbors, linecards):
+    """Write the synthetic eos_commands/json files of all the devices"""
+    rng = random.Random(seed)
+    for index, device in enumerate(devices):
+        json_directory = device_directories(device, root_dir)[2]
+        for command, output in synthetic_outputs(index, devices, rng, vrfs, peers, neighbors, linecards).items():
+            f = open(json_directory + '/' + command + '.json', 'w')
+            json.dump(output, f, indent=4)
+            f.close()
+
+def run_benchmark (devices, root_dir, audit_str_list, jobs=1, incremental=False):
+    """Time the audit pipeline of generate_audit_report.py, end to end and per audit function
+
+    Parameters
+    ----------
+    devices : list
+        Names of all the devices of the fabric.
+    root_dir : str
+        Root directory of the synthetic fabric.
+    audit_str_list : list
+        Names of the audit functions.
+    jobs : int
+        Number of processes auditing the devices.
+    incremental : bool
+        Run generate_network_reports with an empty cache, then again with the cache of the first run.
+
+    Returns
+    -------
+    dict
+        Timings in seconds.
+    """
+    timings = {}
+    start = time.perf_counter()
+    audit_func_list = str_to_function(audit_str_list)
+    timings['str_to_function'] = time.perf_counter() - start
+    if incremental:
+        # the first run starts with an empty cache, even in a directory of a previous benchmark
+        for name in [root_dir + '/audit_manifest.json'] + [device_directories(device, root_dir)[4] + '/audit_cache.json' for device in devices]:
+            if os.path.exists(name):
+                os.remove(name)
+    step = time.perf_counter()
+    generate_network_reports(devices, audit_func_list, root_dir, jobs, incremental=incremental)
+    timings['generate_network_reports'] = time.perf_counter() - step
+    if incremental:
+        # no output changed since the first run, every topic is read from the cache
+        step = time.perf_counter()
+        generate_network_reports(devices, audit_func_list, root_dir, jobs, incremental=True)
+        timings['generate_network_reports_cached'] = time.perf_counter() - step
+    timings['total'] = time.perf_counter() - start
+    # each function runs with its own DeviceCommands so its timing includes reading and parsing the JSON outputs
+    checks = {}
+    for item in audit_func_list:
+        step = time.perf_counter()
+        for device in devices:
+            item(device, root_dir, DeviceCommands(device, root_dir))
+        checks[item.__name__] = time.perf_counter() - step
+    timings['checks'] = checks
+    return timings
+
+def compare (timings, baseline, tolerance):
+    """Print the ratio of each timing to the baseline
+
+    Returns
+    -------
+    list
+        Names of the timings slower than the baseline by more than tolerance.
+    """
+    regressions = []
+    flat = dict((name, value) for name, value in timings.items() if name != 'checks')
+    flat.update(timings['checks'])
+    reference = dict((name, value) for name, value in baseline['timings'].items() if name != 'checks')
+    reference.update(baseline['timings'].get('checks', {}))
+    for name, value in flat.items():
+        if not reference.get(name):
+            continue
+        ratio = value / reference[name]
+        if ratio > 1 + tolerance:
+            result = 'REGRESSION'
+            regressions.append(name)
+        else:
+            result = 'OK'
+        print(name + ' *** Baseline (s): ' + '%.4f' % reference[name] + ' *** Current (s): ' + '%.4f' % value + ' *** Ratio: ' + '%.2f' % ratio + ' *** Result: ' + result)
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the audit pipeline on a synthetic fabric')
+    parser.add_argument('--devices', type=int, default=50, help='number of devices (default: 50)')
+    parser.add_argument('--vrfs', type=int, default=20, help='number of VRF per device (default: 20)')
+    parser.add_argument('--peers', type=int, default=50, help='number of BGP peers per VRF (default: 50)')
+    parser.add_argument('--neighbors', type=int, default=64, help='number of LLDP neighbors per device (default: 64)')
+    parser.add_argument('--linecards', type=int, default=8, help='number of linecards per device (default: 8)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic data (default: 0)')
+    parser.add_argument('--audit', nargs='+', default=available_checks(), help='audit functions to run (default: all)')
+    parser.add_argument('--jobs', type=int, default=1, help='number of processes auditing the devices (default: 1)')
+    parser.add_argument('--incremental', action='store_true', help='also time a second run reading the results of the first one from the incremental cache')
+    parser.add_argument('--directory', help='directory for the synthetic fabric and the reports (default: a temporary directory, removed at the end)')
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help='file to save the results in (default: benchmark_baseline.json)')
+    parser.add_argument('--compare', help='baseline file to compare the results with, exits with 1 if a timing regressed')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown compared to the baseline (default: 0.2)')
+    args = parser.parse_args()
+
+    baseline_file = os.path.abspath(args.baseline)
+    # read before the results are saved, the baseline to compare with can be the file the results are saved in
+    baseline = None
+    if args.compare is not None:
+        f = open(args.compare, 'r')
+        baseline = json.load(f)
+        f.close()
+    cwd = os.getcwd()
+    directory = args.directory or tempfile.mkdtemp(prefix='audit_benchmark_')
+    os.makedirs(directory, exist_ok=True)
+    os.chdir(directory)
+    try:
+        devices = ['leaf%04d' % index for index in range(args.devices)]
+        root_dir = 'output'
+        print('generating the synthetic fabric in ' + directory)
+        generate_fabric(devices, root_dir, args.seed, args.vrfs, args.peers, args.neighbors, args.linecards)
+        print('running the audit')
+        timings = run_benchmark(devices, root_dir, args.audit, args.jobs, args.incremental)
+    finally:
+        os.chdir(cwd)
+        if args.directory is None:
+            shutil.rmtree(directory)
+    parameters = {'devices': args.devices, 'vrfs': args.vrfs, 'peers': args.peers, 'neighbors': args.neighbors, 'linecards': args.linecards, 'seed': args.seed, 'audit': args.audit, 'jobs': args.jobs, 'incremental': args.incremental}
+    results = {'date': datetime.datetime.now().isoformat(), 'python': platform.python_version(), 'platform': platform.platform(), 'parameters': parameters, 'timings': timings}
+    f = open(baseline_file, 'w')
+    json.dump(results, f, indent=2)
+    f.close()
+    for name, value in timings.items():
+        if name != 'checks':
+            print(name + ': ' + '%.4f' % value + ' s')
+    for name, value in sorted(timings['checks'].items(), key=lambda item: -item[1]):
+        print('  ' + name + ': ' + '%.4f' % value + ' s')
+    print('results saved in ' + baseline_file)
+    if baseline is not None:
+        if baseline['parameters'] != parameters:
+            print('warning: the baseline was generated with different parameters: ' + str(baseline['parameters']))
+        if compare(timings, baseline, args.tolerance):
+            sys.exit(1)
@@ -1,7 +1,16 @@
-from netmiko import ConnectHandler
+import argparse
 import os
+import time
 import yaml
-from audit.functions import device_directories
+from audit.collect import collect_devices, create_session_pool, plan_audit_commands, print_collection_metrics, print_collection_summary
+from audit.fleet import str_to_fleet_function
+from audit.functions import str_to_function
+from audit.metrics import COLLECTION_METRICS_NAME, CollectionMetrics
+
+parser = argparse.ArgumentParser(description='Collect EOS commands from the devices')
+parser.add_argument('--interval', type=int, help='collect the commands again every INTERVAL seconds, keeping the connections to the devices open between the collections')
+parser.add_argument('--count', type=int, help='number of collections to run with --interval (default: run until interrupted)')
+args = parser.parse_args()
 
 input_f = open('input.yml', 'r')
 input_s = input_f.read()
@@ -9,72 +18,65 @@ input_f.close()
 input = yaml.load(input_s, Loader=yaml.FullLoader)
 
 devices = input['devices']
-output_directory = input['output_directory'] 
+output_directory = input['output_directory']
 username = input['username']
 password = input['password']
 text_cmds = input['text_cmds']
-json_cmds = input['json_cmds'] 
+json_cmds = input['json_cmds']
 text_and_json_cmds = input['text_and_json_cmds']
+max_parallel_sessions = input.get('max_parallel_sessions', 10)
+timeout = input.get('timeout', 180)
+transport = input.get('transport', 'ssh')
+eapi_protocol = input.get('eapi_protocol', 'https')
+eapi_port = input.get('eapi_port')
+eapi_verify_ssl = input.get('eapi_verify_ssl', False)
+derive_text = input.get('derive_text', False)
+native_text_cmds = input.get('native_text_cmds')
+session_idle_timeout = input.get('session_idle_timeout', 300)
+archive = input.get('archive', False)
+blob_store = input.get('blob_store', False)
 
-for device in devices:
-    # Create directories to save the commands output
-    directories = device_directories(device, output_directory)
-    device_directory = directories[0]
-    eos_commands_directory = directories[1]
-    json_directory = directories[2]
-    text_directory = directories[3]
-    # collect show commands
-    print("opening connection to " + device)
-    switch = {'device_type': 'arista_eos', 'host': device, 'username': username, 'password': password, 'port': '22', 'timeout': 180}
-    connection = ConnectHandler(**switch)
-    print("collecting show commands on device " + device)
-    # collect text commands
-    if text_cmds is not None: 
-        for cmd in text_cmds: 
-            print("collecting " + cmd)
-            cmd_output = connection.send_command(cmd)
-            f=open(text_directory + "/" + cmd + ".txt", "w")
-            f.write(cmd_output)
-            f.closed
-    if (text_and_json_cmds is not None) and (text_cmds is not None) : 
-        for cmd in text_and_json_cmds: 
-            if cmd not in text_cmds: 
-                print("collecting " + cmd)
-                cmd_output = connection.send_command(cmd)
-                f=open(text_directory + "/" + cmd + ".txt", "w")
-                f.write(cmd_output)
-                f.closed
-    elif (text_and_json_cmds is not None) and (text_cmds is None):
-        for cmd in text_and_json_cmds: 
-            print("collecting " + cmd)
-            cmd_output = connection.send_command(cmd)
-            f=open(text_directory + "/" + cmd + ".txt", "w")
-            f.write(cmd_output)
-            f.closed
-    # collect json commands
-    if json_cmds is not None: 
-        for cmd in json_cmds: 
-            print("collecting " + cmd + "| json")
-            cmd_output = connection.send_command(cmd + "| json")
-            f=open(json_directory + "/" + cmd + ".json", "w")
-            f.write(cmd_output)
-            f.closed
-    if (text_and_json_cmds is not None) and (json_cmds is not None) : 
-        for cmd in text_and_json_cmds: 
-            if cmd not in json_cmds: 
-                print("collecting " + cmd + "| json")
-                cmd_output = connection.send_command(cmd + "| json")
-                f=open(json_directory + "/" + cmd + ".json", "w")
-                f.write(cmd_output)
-                f.closed
-    elif (text_and_json_cmds is not None) and (json_cmds is None):
-        for cmd in text_and_json_cmds: 
-            print("collecting " + cmd + "| json")
-            cmd_output = connection.send_command(cmd + "| json")
-            f=open(json_directory + "/" + cmd + ".json", "w")
-            f.write(cmd_output)
-            f.closed
-    print("closing connection to " + device)
-    connection.disconnect()
+# collect only the commands required by the audit, the fleet audit and the custom show tech-support, and the text_cmds and json_cmds
+if input.get('plan_commands', False):
+    audit_func_list = str_to_function(input.get('audit') or []) + str_to_fleet_function(input.get('fleet_audit'))
+    text_cmds, json_cmds, text_and_json_cmds = plan_audit_commands(audit_func_list, input.get('custom_show_tech_support'), text_cmds, json_cmds)
+    print('commands collected in text format: ' + str(text_cmds))
+    print('commands collected in JSON format: ' + str(json_cmds))
+    print('commands collected in text and JSON format: ' + str(text_and_json_cmds))
 
+# connection time, time and size of each command and failures, appended to output_directory/collection_metrics.jsonl
+os.makedirs(output_directory, exist_ok=True)
+metrics = CollectionMetrics(output_directory + '/' + COLLECTION_METRICS_NAME)
 
+if args.interval is None:
+    results = collect_devices(devices, username, password, output_directory, text_cmds, json_cmds, text_and_json_cmds, max_parallel_sessions, timeout, transport, eapi_protocol, eapi_port, eapi_verify_ssl, derive_text, native_text_cmds, None, archive, metrics, blob_store)
+    print_collection_summary(results)
+    print_collection_metrics(metrics)
+    metrics.close()
+else:
+    # the connections are idle between two collections, they would be closed before each collection with a shorter idle timeout
+    if session_idle_timeout < args.interval:
+        print('session_idle_timeout (' + str(session_idle_timeout) + ' seconds) is shorter than the interval, it is raised to ' + str(args.interval) + ' seconds')
+        session_idle_timeout = args.interval
+    pool = create_session_pool(username, password, timeout, transport, eapi_protocol, eapi_port, eapi_verify_ssl, session_idle_timeout)
+    run = 0
+    try:
+        while args.count is None or run < args.count:
+            start = time.time()
+            metrics.new_run()
+            results = collect_devices(devices, username, password, output_directory, text_cmds, json_cmds, text_and_json_cmds, max_parallel_sessions, timeout, transport, eapi_protocol, eapi_port, eapi_verify_ssl, derive_text, native_text_cmds, pool, archive, metrics, blob_store)
+            print_collection_summary(results)
+            print_collection_metrics(metrics)
+            run = run + 1
+            if args.count is not None and run >= args.count:
+                break
+            # close the connections which would be too old for the next collection before waiting for it
+            next_start = start + args.interval
+            pool.evict_idle(next_start)
+            time.sleep(max(0, next_start - time.time()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("closing connections")
+        pool.close()
+        metrics.close()
@@ -1,6 +1,11 @@
-import os
+import argparse
 import yaml
-from audit.functions import device_directories
+from audit.techsupport import generate_custom_show_tech_supports
+
+parser = argparse.ArgumentParser(description='Assemble some of the collected text outputs of each device into a custom show tech-support file')
+parser.add_argument('-j', '--jobs', type=int, default=1, help='number of devices processed in parallel (default: 1)')
+parser.add_argument('-z', '--compress', action='store_true', help='write gzip compressed files')
+args = parser.parse_args()
 
 input_f = open('input.yml', 'r')
 input_s = input_f.read()
@@ -13,17 +18,4 @@ custom_show_tech_support = input['custom_show_tech_support']
 
 
 # assemble some of the collected txt files into one large file
-for device in devices: 
-    directories = device_directories(device, output_directory)
-    device_directory = directories[0]
-    eos_commands_directory = directories[1]
-    text_directory = directories[3]
-    outfile = open(text_directory + "/custom show tech-support.txt", "w")   
-    for item in custom_show_tech_support: 
-        infile = open(text_directory + "/" + item + ".txt", "r")
-        outfile.write('-'*13 + ' ' + item + ' ' + '-'*13 + '\n'*2)
-        for line in infile:  
-            outfile.write(line)
-        outfile.write('\n'*2)
-        infile.close()
-    outfile.close()
+generate_custom_show_tech_supports(devices, output_directory, custom_show_tech_support, args.jobs, args.compress)
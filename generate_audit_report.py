@@ -1,20 +1,31 @@
+import argparse
 import yaml 
-from audit.functions import str_to_function, generate_main_report, generate_failures_only_report, assemble_main_reports, assemble_failures_only_reports 
+from audit.fleet import str_to_fleet_function
+from audit.functions import str_to_function, generate_network_reports
 
-input_f = open('input.yml', 'r')
-input_s = input_f.read()
-input_f.close()
-input = yaml.load(input_s, Loader=yaml.FullLoader)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the audit reports from the collected EOS commands')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of processes used to audit the devices (default: 1)')
+    parser.add_argument('-i', '--incremental', action='store_true', help='reuse the results of the previous run for the topics whose EOS commands outputs and code did not change')
+    parser.add_argument('-m', '--metrics', action='store_true', help='save the time, bytes read and JSON parse time of each topic and the peak memory of the run in audit_metrics.json next to main.txt')
+    parser.add_argument('--metrics-summary', action='store_true', help='also add the metrics of each topic at the end of main.txt')
+    parser.add_argument('--profile', action='store_true', help='save the cProfile stats of the audit of each device in <device>/reports/audit.prof')
+    parser.add_argument('--history', action='store_true', help='append the results to the history of the audit results in audit_history.sqlite next to main.txt')
+    args = parser.parse_args()
 
-devices = input['devices']
-root_dir = input['output_directory'] 
-audit_str_list = input['audit']
+    input_f = open('input.yml', 'r')
+    input_s = input_f.read()
+    input_f.close()
+    input = yaml.load(input_s, Loader=yaml.FullLoader)
 
-audit_func_list = str_to_function (audit_str_list)
+    devices = input['devices']
+    root_dir = input['output_directory'] 
+    audit_str_list = input['audit']
+    device_reports = input.get('device_reports', True)
+    topic_reports = input.get('topic_reports', False)
+    fleet_audit_str_list = input.get('fleet_audit')
 
-for device in devices:
-    generate_main_report(device, audit_func_list, root_dir)
-    generate_failures_only_report(device, audit_func_list, root_dir)
+    audit_func_list = str_to_function (audit_str_list)
+    fleet_func_list = str_to_fleet_function (fleet_audit_str_list)
 
-assemble_main_reports(devices, audit_func_list, root_dir)
-assemble_failures_only_reports(devices, audit_func_list, root_dir)
+    generate_network_reports(devices, audit_func_list, root_dir, args.jobs, device_reports, topic_reports, args.incremental, args.metrics, args.metrics_summary, args.profile, fleet_func_list, args.history)
@@ -0,0 +1,48 @@
+import argparse
+import datetime
+import yaml
+from audit.history import HISTORY_NAME, HistoryStore, days_ago
+from audit.results import format_field
+
+def format_time (timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%d %b %Y %H:%M:%S")
+
+parser = argparse.ArgumentParser(description='Query the history of the audit results saved by generate_audit_report.py --history')
+parser.add_argument('--days', type=float, default=30, help='only the runs of the last days (default: 30)')
+subparsers = parser.add_subparsers(dest='query', required=True)
+runs_parser = subparsers.add_parser('runs', help='list the runs')
+failures_parser = subparsers.add_parser('failures', help='list the failed tests')
+failures_parser.add_argument('--device', help='only the failures of this device (fleet for the fleet topics)')
+failures_parser.add_argument('--topic', help='only the failures of this topic')
+daily_parser = subparsers.add_parser('daily', help='aggregate a numeric field of the reports per day')
+daily_parser.add_argument('label', help="label of the field in the reports, 'Max temperature (C)' for example")
+daily_parser.add_argument('--function', default='MAX', choices=['MAX', 'MIN', 'AVG', 'SUM', 'COUNT'], help='aggregate function (default: MAX)')
+daily_parser.add_argument('--device', help='only the values of this device')
+values_parser = subparsers.add_parser('values', help='list the values of a numeric field of the reports of a device')
+values_parser.add_argument('device', help='device IP address or hostname')
+values_parser.add_argument('label', help="label of the field in the reports, 'Max temperature (C)' for example")
+values_parser.add_argument('--item', help='only the values of this item (sensor, peer, ...)')
+args = parser.parse_args()
+
+input_f = open('input.yml', 'r')
+input_s = input_f.read()
+input_f.close()
+input = yaml.load(input_s, Loader=yaml.FullLoader)
+
+root_dir = input['output_directory']
+
+store = HistoryStore(root_dir + '/' + HISTORY_NAME)
+since = days_ago(args.days)
+if args.query == 'runs':
+    for run, run_time, devices, topics in store.runs(since):
+        print('Run: ' + str(run) + ' *** Date: ' + format_time(run_time) + ' *** Devices: ' + str(devices) + ' *** Topics: ' + ', '.join(topics))
+elif args.query == 'failures':
+    for run_time, device, topic, section, item, fields in store.failures(args.device, args.topic, since):
+        print('Date: ' + format_time(run_time) + ' *** Device: ' + device + ' *** Topic: ' + topic + ' *** ' + ' *** '.join(format_field(label, value) for label, value in fields))
+elif args.query == 'daily':
+    for day, value in store.daily(args.label, args.function, args.device, since):
+        print('Day: ' + day + ' *** ' + args.function + ': ' + str(value))
+else:
+    for run_time, topic, item, value in store.values(args.device, args.label, args.item, since):
+        print('Date: ' + format_time(run_time) + ' *** Topic: ' + topic + ' *** Item: ' + item + ' *** ' + args.label + ': ' + str(value))
+store.close()
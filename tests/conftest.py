@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+import threading
+import time
+import types
+import pytest
+
+# the tests import the audit package of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeSshConnection:
+    """netmiko connection to a fake EOS device"""
+    def __init__ (self, netmiko, host):
+        self.netmiko = netmiko
+        self.host = host
+        self.alive = True
+
+    def send_command (self, cmd):
+        netmiko = self.netmiko
+        with netmiko.lock:
+            netmiko.active = netmiko.active + 1
+            netmiko.peak = max(netmiko.peak, netmiko.active)
+        time.sleep(netmiko.delay)
+        with netmiko.lock:
+            netmiko.active = netmiko.active - 1
+        if not self.alive:
+            raise OSError('socket is closed')
+        if cmd.endswith('| json'):
+            return json.dumps({'host': self.host, 'command': cmd[:-len('| json')]}, indent=4)
+        return 'output of ' + cmd + ' on ' + self.host + '\n'
+
+    def is_alive (self):
+        return self.alive
+
+    def disconnect (self):
+        self.alive = False
+        with self.netmiko.lock:
+            self.netmiko.closed.append(self.host)
+
+class FakeNetmiko (types.ModuleType):
+    """netmiko module whose ConnectHandler opens connections to fake EOS devices
+
+    Attributes
+    ----------
+    opened : list
+        Host of each connection opened.
+    closed : list
+        Host of each connection closed.
+    failing : set
+        Hosts which refuse the connections.
+    peak : int
+        Maximum number of commands running at the same time.
+    """
+    def __init__ (self):
+        super().__init__('netmiko')
+        self.lock = threading.Lock()
+        self.opened = []
+        self.closed = []
+        self.failing = set()
+        self.active = 0
+        self.peak = 0
+        self.delay = 0.02
+
+    def ConnectHandler (self, **switch):
+        if switch['host'] in self.failing:
+            raise ConnectionRefusedError('connection to ' + switch['host'] + ' refused')
+        connection = FakeSshConnection(self, switch['host'])
+        with self.lock:
+            self.opened.append(switch['host'])
+        return connection
+
+@pytest.fixture
+def fake_netmiko (monkeypatch):
+    """Replace netmiko by FakeNetmiko, the collector imports netmiko when it opens an ssh connection"""
+    netmiko = FakeNetmiko()
+    monkeypatch.setitem(sys.modules, 'netmiko', netmiko)
+    return netmiko
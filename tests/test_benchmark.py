@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_audit_report.py')
+
+def run_benchmark (tmp_path, *options):
+    command = [sys.executable, SCRIPT, '--devices', '4', '--vrfs', '2', '--peers', '4', '--neighbors', '2', '--linecards', '1', '--audit', 'check_bgp_summary', 'print_hostname'] + list(options)
+    return subprocess.run(command, cwd=str(tmp_path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+
+def test_compare_with_the_baseline_file (tmp_path):
+    process = run_benchmark(tmp_path)
+    assert process.returncode == 0, process.stdout
+    name = str(tmp_path / 'benchmark_baseline.json')
+    f = open(name)
+    results = json.load(f)
+    f.close()
+    # a baseline much faster than any run
+    results['timings'] = {'total': 1e-9, 'checks': {'check_bgp_summary': 1e-9}}
+    f = open(name, 'w')
+    json.dump(results, f)
+    f.close()
+    process = run_benchmark(tmp_path, '--compare', 'benchmark_baseline.json')
+    assert process.returncode == 1, process.stdout
+    assert 'total *** Baseline (s): 0.0000' in process.stdout
+    assert process.stdout.count('Result: REGRESSION') == 2
+    # the results of the run replaced the baseline after the comparison
+    f = open(name)
+    assert json.load(f)['timings']['total'] > 1e-9
+    f.close()
+
+def test_compare_without_regression (tmp_path):
+    run_benchmark(tmp_path, '--baseline', 'first.json')
+    process = run_benchmark(tmp_path, '--baseline', 'second.json', '--compare', 'first.json', '--tolerance', '1000')
+    assert process.returncode == 0, process.stdout
+    assert 'REGRESSION' not in process.stdout
@@ -0,0 +1,48 @@
+import os
+from audit.collect import collect_devices
+
+DEVICES = ['leaf1', 'leaf2', 'leaf3', 'leaf4']
+TEXT_CMDS = ['show version', 'show clock']
+JSON_CMDS = ['show hostname']
+TEXT_AND_JSON_CMDS = ['show inventory']
+
+def collect (root_dir, devices, max_parallel_sessions):
+    return collect_devices(devices, 'admin', 'secret', root_dir, TEXT_CMDS, JSON_CMDS, TEXT_AND_JSON_CMDS, max_parallel_sessions)
+
+def read_tree (root_dir):
+    """Return the content of the eos_commands files of all the devices, by path relative to root_dir"""
+    files = {}
+    for directory, names, file_names in os.walk(root_dir):
+        for name in file_names:
+            path = os.path.join(directory, name)
+            f = open(path)
+            files[os.path.relpath(path, root_dir)] = f.read()
+            f.close()
+    return files
+
+def test_devices_collected_in_parallel (fake_netmiko, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = collect('output', DEVICES, 4)
+    assert [device for device, elapsed, error in results] == DEVICES
+    assert all(error is None for device, elapsed, error in results)
+    assert fake_netmiko.peak > 1
+    assert sorted(fake_netmiko.closed) == DEVICES
+
+def test_failing_device_does_not_stop_the_others (fake_netmiko, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fake_netmiko.failing.add('leaf2')
+    results = collect('output', DEVICES, 4)
+    errors = dict((device, error) for device, elapsed, error in results)
+    assert 'refused' in errors['leaf2']
+    assert [device for device in DEVICES if errors[device] is None] == ['leaf1', 'leaf3', 'leaf4']
+    assert os.listdir('output/leaf2/eos_commands/text') == []
+    assert sorted(os.listdir('output/leaf3/eos_commands/text')) == ['show clock.txt', 'show inventory.txt', 'show version.txt']
+
+def test_parallel_outputs_same_as_serial (fake_netmiko, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    collect('serial', DEVICES, 1)
+    assert fake_netmiko.peak == 1
+    collect('parallel', DEVICES, 4)
+    serial = read_tree('serial')
+    assert len(serial) == len(DEVICES)*(len(TEXT_CMDS) + len(JSON_CMDS) + 2*len(TEXT_AND_JSON_CMDS))
+    assert read_tree('parallel') == serial
@@ -0,0 +1,93 @@
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from audit.collect import collect_devices
+from audit.functions import device_directories
+
+USERNAME = 'admin'
+PASSWORD = 'secret'
+
+class FakeEapiHandler (BaseHTTPRequestHandler):
+    """runCmds endpoint of a fake EOS device, commands starting with show bogus are invalid"""
+    def do_POST (self):
+        credentials = base64.b64encode((USERNAME + ':' + PASSWORD).encode()).decode()
+        if self.path != '/command-api' or self.headers.get('Authorization') != 'Basic ' + credentials:
+            self.send_response(401, 'Unauthorized')
+            self.end_headers()
+            return
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        params = request['params']
+        self.server.requests.append((params['format'], params['cmds']))
+        results = []
+        response = None
+        for position, cmd in enumerate(params['cmds']):
+            if cmd.startswith('show bogus'):
+                # EOS stops at the first failing command
+                message = "CLI command " + str(position + 1) + " of " + str(len(params['cmds'])) + " '" + cmd + "' failed: invalid command"
+                response = {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': 1002, 'message': message, 'data': results + [{'errors': ['% Invalid input']}]}}
+                break
+            if params['format'] == 'json':
+                results.append({'command': cmd})
+            else:
+                results.append({'output': 'output of ' + cmd + '\n'})
+        if response is None:
+            response = {'jsonrpc': '2.0', 'id': request['id'], 'result': results}
+        data = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message (self, format, *args):
+        pass
+
+@pytest.fixture
+def eapi_server ():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeEapiHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def collect (server, text_cmds, json_cmds, text_and_json_cmds, password=PASSWORD):
+    return collect_devices(['127.0.0.1'], USERNAME, password, 'output', text_cmds, json_cmds, text_and_json_cmds, transport='eapi', eapi_protocol='http', eapi_port=server.server_address[1])
+
+def read_output (command, format):
+    directories = device_directories('127.0.0.1', 'output')
+    if format == 'json':
+        f = open(directories[2] + '/' + command + '.json')
+    else:
+        f = open(directories[3] + '/' + command + '.txt')
+    data = f.read()
+    f.close()
+    return data
+
+def test_one_request_per_format (eapi_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = collect(eapi_server, ['show version'], ['show hostname'], ['show inventory'])
+    assert results[0][2] is None
+    assert eapi_server.requests == [('text', ['show version', 'show inventory']), ('json', ['show hostname', 'show inventory'])]
+    assert read_output('show version', 'text') == 'output of show version\n'
+    assert json.loads(read_output('show inventory', 'json')) == {'command': 'show inventory'}
+
+def test_authentication_failure (eapi_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = collect(eapi_server, ['show version'], ['show hostname'], [], password='wrong')
+    assert '401' in results[0][2]
+    assert eapi_server.requests == []
+
+def test_failing_command_does_not_fail_the_device (eapi_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = collect(eapi_server, ['show version', 'show bogus', 'show clock'], ['show bogus', 'show hostname'], [])
+    assert results[0][2] is None
+    # the commands after the failing one are sent again
+    assert eapi_server.requests == [('text', ['show version', 'show bogus', 'show clock']), ('text', ['show clock']), ('json', ['show bogus', 'show hostname']), ('json', ['show hostname'])]
+    assert read_output('show bogus', 'text') == '% Invalid input\n'
+    assert read_output('show clock', 'text') == 'output of show clock\n'
+    assert read_output('show bogus', 'json') == '% Invalid input\n'
+    assert json.loads(read_output('show hostname', 'json')) == {'command': 'show hostname'}
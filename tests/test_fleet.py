@@ -0,0 +1,92 @@
+import json
+import pytest
+from audit.fleet.bgp import fleet_bgp
+from audit.fleet.mlag import fleet_mlag
+from audit.functions import device_directories
+from audit.results import FAIL, render_topic
+
+def write_outputs (root_dir, device, outputs):
+    """Write the JSON outputs of the EOS commands of a device, by command"""
+    json_directory = device_directories(device, root_dir)[2]
+    for command, output in outputs.items():
+        f = open(json_directory + '/' + command + '.json', 'w')
+        json.dump(output, f)
+        f.close()
+
+def interface (name, address, mask_length, vrf='default'):
+    return {name: {'name': name, 'vrf': vrf, 'interfaceAddress': {'primaryIp': {'address': address, 'maskLen': mask_length}, 'secondaryIpsOrderedList': []}}}
+
+def bgp_device (router_id, asn, peers, interfaces):
+    """Return the outputs of show ip bgp summary vrf all and show ip interface of a device with sessions in the default vrf"""
+    vrf_peers = dict((peer, {'asn': peer_asn, 'peerState': state}) for peer, peer_asn, state in peers)
+    return {'show ip bgp summary vrf all': {'vrfs': {'default': {'routerId': router_id, 'asn': asn, 'peers': vrf_peers}}}, 'show ip interface': {'interfaces': interfaces}}
+
+def fields (record):
+    return dict(record.fields)
+
+def test_bgp_sessions_on_interface_addresses (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    interfaces = interface('Loopback0', '1.1.1.1', 32)
+    interfaces.update(interface('Ethernet1', '10.0.0.0', 31))
+    write_outputs('output', 'leaf1', bgp_device('1.1.1.1', '65001', [('10.0.0.1', '65002', 'Established'), ('192.0.2.1', '64512', 'Established')], interfaces))
+    write_outputs('output', 'leaf2', bgp_device('2.2.2.2', '65002', [('10.0.0.0', '65001', 'Established')], interface('Ethernet1', '10.0.0.1', 31)))
+    result = fleet_bgp(['leaf1', 'leaf2'], 'output')
+    assert 'Required EOS command: show ip bgp summary vrf all | json, show ip interface | json\n' in render_topic(result)[0]
+    summary = fields(result.sections[0].records[0])
+    assert summary['Sessions between devices'] == 1
+    assert summary['Unmatched peers'] == 1
+    assert not result.failed()
+    unmatched = result.sections[1].records
+    assert [(fields(record)['Device'], fields(record)['Peer'], record.status) for record in unmatched] == [('leaf1', '192.0.2.1', None)]
+
+def test_bgp_problems_on_interface_addresses (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_outputs('output', 'leaf1', bgp_device('1.1.1.1', '65001', [('10.0.0.1', '65002', 'Established')], interface('Ethernet1', '10.0.0.0', 31)))
+    write_outputs('output', 'leaf2', bgp_device('2.2.2.2', '65002', [('10.0.0.0', '65009', 'Active')], interface('Ethernet1', '10.0.0.1', 31)))
+    write_outputs('output', 'leaf3', bgp_device('3.3.3.3', '65003', [('10.0.1.0', '65001', 'Active')], interface('Ethernet1', '10.0.1.1', 31)))
+    result = fleet_bgp(['leaf1', 'leaf2', 'leaf3'], 'output')
+    summary = fields(result.sections[0].records[0])
+    assert summary['Sessions between devices'] == 1
+    assert summary['Unmatched peers'] == 1
+    failures = [fields(record) for record in result.sections[0].records if record.status == FAIL][1:]
+    assert len(failures) == 1
+    assert failures[0]['Peer device'] == 'leaf2'
+    assert 'half-established' in failures[0]['Problem']
+    assert 'ASN mismatch' in failures[0]['Problem']
+    assert failures[0]['Likely culprit'] == 'leaf2'
+
+def mlag_device (domain, system_id, peer_address, local_address, mlag_state):
+    """Return the outputs of show mlag detail and show ip interface of a device with MLAG active"""
+    peer_mlag_state = {'primary': 'secondary', 'secondary': 'primary'}[mlag_state]
+    mlag = {'state': 'active', 'negStatus': 'connected', 'configSanity': 'consistent', 'domainId': domain, 'systemId': system_id, 'peerAddress': peer_address, 'localInterface': 'Vlan4094', 'detail': {'mlagState': mlag_state, 'peerMlagState': peer_mlag_state}}
+    return {'show mlag detail': mlag, 'show ip interface': {'interfaces': interface('Vlan4094', local_address, 31)}}
+
+def test_mlag_domain_id_mismatch (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_outputs('output', 'leaf1', mlag_device('mlag1', '02:1c:73:00:00:01', '10.255.0.1', '10.255.0.0', 'primary'))
+    write_outputs('output', 'leaf2', mlag_device('mlag2', '02:1c:73:00:00:02', '10.255.0.0', '10.255.0.1', 'secondary'))
+    write_outputs('output', 'leaf3', mlag_device('mlag3', '02:1c:73:00:00:03', '10.255.0.3', '10.255.0.2', 'primary'))
+    result = fleet_mlag(['leaf1', 'leaf2', 'leaf3'], 'output')
+    assert 'Required EOS command: show mlag detail | json, show ip interface | json\n' in render_topic(result)[0]
+    records = dict((record.item, fields(record)) for record in result.sections[0].records if record.status == FAIL)
+    assert sorted(records) == ['domains', 'leaf1, leaf2', 'leaf3']
+    assert records['leaf1, leaf2']['Domains'] == 'mlag1 (leaf1), mlag2 (leaf2)'
+    assert records['leaf1, leaf2']['Problem'].startswith('different domain IDs')
+    assert records['leaf3']['Problem'].startswith('orphan')
+
+def temperature_sensor (name, in_alert=False):
+    return {'name': name, 'description': name, 'hwStatus': 'ok', 'alertCount': int(in_alert), 'inAlertState': in_alert, 'currentTemperature': 40.0, 'overheatThreshold': 85.0, 'criticalThreshold': 95.0}
+
+def test_environment_transceivers_of_linecards_only (tmp_path, monkeypatch):
+    pytest.importorskip('numpy')
+    from audit.fleet.environment import fleet_environment
+    monkeypatch.chdir(tmp_path)
+    outputs = {}
+    outputs['show system environment temperature'] = {'tempSensors': [temperature_sensor('TempSensor1')], 'cardSlots': [], 'powerSupplySlots': []}
+    outputs['show system environment temperature transceiver'] = {'tempSensors': [], 'cardSlots': [{'entPhysicalClass': 'Linecard', 'tempSensors': [temperature_sensor('DomTemperatureSensor3/1')]}, {'entPhysicalClass': 'Supervisor', 'tempSensors': [temperature_sensor('DomTemperatureSensor1/1', True)]}]}
+    outputs['show system environment power'] = {'powerSupplies': {'1': {'state': 'ok', 'outputPower': 300.0}}}
+    outputs['show system environment cooling'] = {'powerSupplySlots': [], 'fanTraySlots': [{'fans': [{'label': '1/1', 'status': 'ok', 'actualSpeed': 50}]}]}
+    write_outputs('output', 'leaf1', outputs)
+    result = fleet_environment(['leaf1'], 'output')
+    assert fields(result.sections[0].records[0]) == {'Sensors': 2, 'Failed': 0, 'Devices with failures': 0}
+    assert not result.failed()
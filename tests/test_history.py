@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+from audit.checks.check_bgp import check_bgp
+from audit.checks.check_temperature import check_temperature
+from audit.functions import device_directories, generate_network_reports
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'query_audit_history.py')
+
+def sensor (name, current):
+    return {'name': name, 'description': name, 'hwStatus': 'ok', 'alertCount': 0, 'inAlertState': False, 'currentTemperature': current, 'maxTemperature': 60.0, 'maxTemperatureLastChange': 1590000000, 'overheatThreshold': 85.0, 'criticalThreshold': 95.0}
+
+def write_outputs (current, upDownTime):
+    json_directory = device_directories('leaf1', 'output')[2]
+    outputs = {}
+    outputs['show system environment temperature'] = {'systemStatus': 'temperatureOk', 'tempSensors': [sensor('TempSensor1', current)], 'cardSlots': [], 'powerSupplySlots': []}
+    outputs['show ip bgp summary vrf all'] = {'vrfs': {'default': {'routerId': '1.1.1.1', 'asn': '65001', 'peers': {'10.0.0.1': {'asn': '65002', 'peerState': 'Established', 'upDownTime': upDownTime}}}}}
+    for command, output in outputs.items():
+        f = open(json_directory + '/' + command + '.json', 'w')
+        json.dump(output, f)
+        f.close()
+
+def query (*arguments):
+    process = subprocess.run([sys.executable, SCRIPT] + list(arguments), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+    assert process.returncode == 0, process.stdout
+    return process.stdout.splitlines()
+
+def test_raw_values_in_history (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    f = open('input.yml', 'w')
+    f.write('output_directory: output\n')
+    f.close()
+    # the temperature creeps up, the BGP session flaps between the two runs
+    for current, upDownTime in [(41.5, 1590000000.5), (47.25, 1600000000.25)]:
+        write_outputs(current, upDownTime)
+        generate_network_reports(['leaf1'], [check_temperature, check_bgp], 'output', history=True)
+    lines = query('values', 'leaf1', 'Temperature (C)')
+    assert [line.split(' *** ')[1:] for line in lines] == [['Topic: check_temperature', 'Item: TempSensor1', 'Temperature (C): 41.5'], ['Topic: check_temperature', 'Item: TempSensor1', 'Temperature (C): 47.25']]
+    lines = query('values', 'leaf1', 'Up/Down time', '--item', '10.0.0.1')
+    assert [line.split(' *** ')[-1] for line in lines] == ['Up/Down time: 1590000000.5', 'Up/Down time: 1600000000.25']
+    lines = query('daily', 'Temperature (C)')
+    assert lines[0].endswith(' *** MAX: 47.25')
+    # the values are not printed in the reports
+    f = open('output/leaf1/reports/main.txt')
+    assert '47.25' not in f.read()
+    f.close()
@@ -0,0 +1,20 @@
+import pytest
+from audit.fleet import str_to_fleet_function
+from audit.functions import str_to_function
+from audit.registry import available_fleet_checks
+
+def test_fleet_functions_found_by_name ():
+    functions = str_to_fleet_function(['fleet_bgp', 'fleet_mlag'])
+    assert [function.__name__ for function in functions] == ['fleet_bgp', 'fleet_mlag']
+    assert 'show ip bgp summary vrf all' in functions[0].commands
+
+def test_available_fleet_functions ():
+    assert available_fleet_checks() == ['fleet_bgp', 'fleet_environment', 'fleet_lldp', 'fleet_mlag']
+
+def test_unknown_name ():
+    with pytest.raises(KeyError):
+        str_to_function(['check_bogus'])
+    with pytest.raises(KeyError):
+        str_to_fleet_function(['fleet_bogus'])
+    with pytest.raises(KeyError):
+        str_to_fleet_function(['bogus'])
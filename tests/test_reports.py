@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+from audit import functions
+from audit.archive import ArchiveWriter
+from audit.functions import DeviceCommands, device_directories, generate_failures_only_report, generate_main_report, generate_network_reports, generate_reports
+from audit.registry import audit_check
+from audit.results import TopicResult, PASS, FAIL
+
+calls = []
+
+def check_counted (device, root_dir, commands=None):
+    calls.append(device)
+    result = TopicResult(device, 'check_counted', 'counted', 'count the audits', 'show version', 'never fails')
+    section = result.section()
+    result.add(section, 'run', PASS, (('Run', len(calls)),))
+    result.add(section, 'failure', FAIL, (('Problem', 'always'),))
+    return result
+
+def read_report (name):
+    f = open(name)
+    text = f.read()
+    f.close()
+    return text
+
+def test_each_report_call_audits_the_device (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    del calls[:]
+    generate_main_report('leaf1', [check_counted], 'output')
+    assert 'Problem: always' in read_report('output/leaf1/reports/failures_only.txt')
+    generate_failures_only_report('leaf1', [check_counted], 'output')
+    assert calls == ['leaf1']*2
+    # both reports are written by each call, from the same audit
+    assert 'Run: 2' in read_report('output/leaf1/reports/main.txt')
+
+def test_one_audit_for_both_reports (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    del calls[:]
+    generate_reports('leaf1', [check_counted], 'output')
+    assert calls == ['leaf1']
+    assert 'Run: 1' in read_report('output/leaf1/reports/main.txt')
+    assert 'Problem: always' in read_report('output/leaf1/reports/failures_only.txt')
+
+@audit_check(commands=['show version'])
+def check_cached (device, root_dir, commands=None):
+    return check_counted(device, root_dir, commands)
+
+def test_incremental_cache_keyed_by_code (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    del calls[:]
+    json_directory = device_directories('leaf1', 'output')[2]
+    f = open(json_directory + '/show version.json', 'w')
+    f.write('{"version": "4.24.1F"}')
+    f.close()
+    generate_network_reports(['leaf1'], [check_cached], 'output', incremental=True)
+    generate_network_reports(['leaf1'], [check_cached], 'output', incremental=True)
+    assert calls == ['leaf1']
+    # the code of the function changed
+    monkeypatch.setattr(functions, 'code_fingerprint', lambda function: 'changed')
+    generate_network_reports(['leaf1'], [check_cached], 'output', incremental=True)
+    assert calls == ['leaf1']*2
+    generate_network_reports(['leaf1'], [check_cached], 'output', incremental=True)
+    assert calls == ['leaf1']*2
+
+def write_archive (output, hashes=True):
+    device_directory = device_directories('leaf1', 'output')[0]
+    writer = ArchiveWriter(device_directory)
+    writer.save('show version', 'json', output)
+    if hashes:
+        writer.close()
+    else:
+        writer.archive.close()
+        os.replace(writer.name + '.tmp', writer.name)
+
+def test_archive_fingerprint_is_sha256 (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = '{"version": "4.24.1F"}'
+    digest = hashlib.sha256(output.encode()).hexdigest()
+    for hashes in [True, False]:
+        write_archive(output, hashes)
+        commands = DeviceCommands('leaf1', 'output')
+        assert commands.fingerprint('show version')[1:] == [len(output), digest]
+        commands.clear()
+
+def test_incremental_cache_with_archive (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    del calls[:]
+    write_archive('{"version": "4.24.1F"}')
+    generate_network_reports(['leaf1'], [check_cached], 'output', incremental=True)
+    generate_network_reports(['leaf1'], [check_cached], 'output', incremental=True)
+    assert calls == ['leaf1']
+    write_archive('{"version": "4.25.0F"}')
+    generate_network_reports(['leaf1'], [check_cached], 'output', incremental=True)
+    assert calls == ['leaf1']*2
+
+def test_peak_rss_per_run_only (tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    device_directories('leaf1', 'output')
+    generate_network_reports(['leaf1'], [check_counted], 'output', metrics_summary=True)
+    f = open('output/audit_metrics.json')
+    metrics = json.load(f)
+    f.close()
+    assert 'peak_rss' not in metrics['topics']['check_counted']
+    assert 'peak_rss' not in metrics['devices']['leaf1']['topics']['check_counted']
+    assert metrics['peak_rss'] >= metrics['devices']['leaf1']['peak_rss']
+    assert 'Peak RSS of the run (MB): ' in read_report('output/main.txt')
+    assert 'Topic: check_counted *** Time (s): ' in read_report('output/main.txt')
@@ -0,0 +1,40 @@
+import time
+from audit.collect import collect_devices, create_session_pool
+
+DEVICES = ['leaf1', 'leaf2', 'leaf3']
+
+def collect (pool):
+    return collect_devices(DEVICES, 'admin', 'secret', 'output', ['show version'], ['show hostname'], [], 4, pool=pool)
+
+def test_connections_reused_across_runs (fake_netmiko, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pool = create_session_pool('admin', 'secret')
+    for run in range(3):
+        results = collect(pool)
+        assert all(error is None for device, elapsed, error in results)
+    assert sorted(fake_netmiko.opened) == DEVICES
+    assert fake_netmiko.closed == []
+    pool.close()
+    assert sorted(fake_netmiko.closed) == DEVICES
+
+def test_dead_connection_reopened (fake_netmiko, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pool = create_session_pool('admin', 'secret')
+    collect(pool)
+    # the device closed the connection between the two runs
+    pool.sessions['leaf2'][0].alive = False
+    results = collect(pool)
+    assert all(error is None for device, elapsed, error in results)
+    assert sorted(fake_netmiko.opened) == ['leaf1', 'leaf2', 'leaf2', 'leaf3']
+    pool.close()
+
+def test_evict_idle_before_next_use (fake_netmiko, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pool = create_session_pool('admin', 'secret', idle_timeout=60)
+    collect(pool)
+    assert pool.evict_idle(time.time() + 30) == []
+    assert sorted(pool.evict_idle(time.time() + 90)) == DEVICES
+    assert sorted(fake_netmiko.closed) == DEVICES
+    collect(pool)
+    assert len(fake_netmiko.opened) == 2*len(DEVICES)
+    pool.close()